@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+
+from typing import Callable, Dict, List, Tuple
+
+
+#benchmark
+#a repeatable benchmark suite for the geometry and rendering hot paths
+#run this file directly to run every benchmark and print the number of
+#operations per second of each; use --json to save the results and
+#--compare to show the change from a previous run
+#by default, the benchmarks that need Tk run against stub widgets
+#(see stub_tk.py), so the suite works on a machine with no display;
+#use --display to run them against a real Tk instance instead
+#note that stub widgets measure the Python side of each operation only,
+#as nothing is sent to a real Tcl interpreter
+
+
+#list of registered benchmarks as 2-tuples (name, setup function)
+#each setup function is called with the root widget to use and returns
+#a 2-tuple (operation, cleanup); operation is called once per timed
+#operation with no arguments, and cleanup (which may be None) is called
+#once timing is finished
+_benchmarks: List[Tuple[str, Callable]] = []
+
+#decorator that registers a setup function as a benchmark
+def benchmark(name: str):
+    def register(setupFunction: Callable):
+        _benchmarks.append((name, setupFunction))
+        return setupFunction
+    return register
+
+#returns a list of the names of the registered benchmarks, in the order they run
+def getBenchmarkNames() -> List[str]:
+    return [name for name, _ in _benchmarks]
+
+
+#internal function
+#delivers pending events and idle callbacks on a root widget,
+#whether it is a real Tk instance or a StubRoot
+def _processEvents(root):
+    root.update()
+
+#internal function
+#cancels every pending after() timer of a root widget
+#used to clean up after benchmarks of self-scheduling methods
+def _cancelTimers(root):
+    for afterId in root.tk.splitlist(root.tk.call("after", "info")):
+        root.after_cancel(afterId)
+
+#internal function
+#creates a Frame to hold the widgets of one benchmark
+#each benchmark gets its own parent, so Colliders of other
+#benchmarks aren't part of its sibling checks
+def _createParent(root, width: int = 1000, height: int = 1000):
+    from tkinter import Frame
+    parent = Frame(root, width=width, height=height)
+    parent.place(x=0, y=0)
+    _processEvents(root)
+    return parent
+
+
+#geometry benchmarks
+#these don't need Tk at all
+
+@benchmark("Collision.getRangeOverlap")
+def _benchRangeOverlap(root):
+    from collision import Collision
+    rangeA = (10, 60)
+    rangeB = (40, 90)
+    return (lambda: Collision.getRangeOverlap(rangeA, rangeB)), None
+
+@benchmark("Collision.getRectangleOverlap")
+def _benchRectangleOverlap(root):
+    from collision import Collision
+    rectA = ((10, 60), (10, 60))
+    rectB = ((40, 90), (40, 90))
+    return (lambda: Collision.getRectangleOverlap(rectA, rectB)), None
+
+#PartialCollision.getCollisionArea when neither Collider moved between calls
+@benchmark("PartialCollision.getCollisionArea[static]")
+def _benchPartialCollisionStatic(root):
+    from partial_collision import PartialCollision
+    from sim_core import SimBody
+    collision = PartialCollision(SimBody(0, 0, 100, 100), SimBody(50, 50, 100, 100))
+    return collision.getCollisionArea, None
+
+#PartialCollision.getCollisionArea when one Collider moves before every call
+@benchmark("PartialCollision.getCollisionArea[moving]")
+def _benchPartialCollisionMoving(root):
+    from partial_collision import PartialCollision
+    from sim_core import SimBody
+    movingBody = SimBody(0, 0, 100, 100)
+    collision = PartialCollision(movingBody, SimBody(50, 50, 100, 100))
+    state = {"step": 0}
+    def operation():
+        state["step"] = (state["step"] + 1) % 100
+        movingBody.originX = state["step"]
+        collision.getCollisionArea()
+    return operation, None
+
+@benchmark("ProportionalBB assignment")
+def _benchProportionalBBAssignment(root):
+    from proportional_bb import ProportionalBB
+    boundingBox = ProportionalBB(0.0, 1.0, 0.0, 1.0)
+    def operation():
+        boundingBox.xStart = 0.25
+        boundingBox.xEnd = 0.75
+    return operation, None
+
+
+#Collider.getCollisions with a varying number of siblings
+#siblings are Vehicles spread over a grid, so each one
+#only overlaps its immediate neighbours
+def _createCollisionBenchmark(siblingCount: int):
+    def setup(root):
+        from math import ceil, sqrt
+        from vehicle import Vehicle
+
+        columns = int(ceil(sqrt(siblingCount)))
+        parent = _createParent(root, columns * 40, columns * 40)
+        siblings = []
+        for index in range(siblingCount):
+            sibling = Vehicle(parent)
+            sibling.setPos((index % columns) * 40, (index // columns) * 40)
+            siblings.append(sibling)
+        _processEvents(root)
+
+        target = siblings[len(siblings) // 2]
+        def cleanup():
+            parent.destroy()
+        return (lambda: target.getCollisions()), cleanup
+    return setup
+
+for _siblingCount in (10, 100, 1000):
+    benchmark(f"Collider.getCollisions[{_siblingCount} siblings]")(_createCollisionBenchmark(_siblingCount))
+
+
+#Road.drawRoad for each TrafficLineType at several sizes
+#each operation resizes the Road (alternating between two lengths) and
+#redraws it, as happens when the window is resized
+def _createDrawRoadBenchmark(lineType: str, length: int):
+    def setup(root):
+        from road import Road
+
+        parent = _createParent(root, length + 10, length + 10)
+        road = Road(parent)
+        road.setLineType(lineType)
+        _processEvents(root)
+
+        sizes = ((100, length), (100, length + 10))
+        state = {"step": 0}
+        def operation():
+            state["step"] ^= 1
+            width, height = sizes[state["step"]]
+            road.currentWidth = width
+            road.currentHeight = height
+            road.drawRoad()
+        def cleanup():
+            parent.destroy()
+        return operation, cleanup
+    return setup
+
+for _lineType in ("solid", "dashed"):
+    for _length in (100, 600, 2000):
+        benchmark(f"Road.drawRoad[{_lineType}, {_length}px]")(_createDrawRoadBenchmark(_lineType, _length))
+
+
+#Vehicle._animStep throughput
+#the Vehicle drives towards a destination it never reaches; the timer each
+#step schedules is left pending and cancelled during cleanup
+@benchmark("Vehicle._animStep")
+def _benchAnimStep(root):
+    from vehicle import Vehicle
+
+    parent = _createParent(root)
+    vehicle = Vehicle(parent)
+    _processEvents(root)
+    vehicle.driveToPos(10 ** 9, 10 ** 9)
+
+    def cleanup():
+        vehicle.abortDrive()
+        _cancelTimers(root)
+        parent.destroy()
+    return vehicle._animStep, cleanup
+
+
+#one frame of many moving vehicles, drawn two ways: as a Vehicle widget
+#per vehicle (synced from its model with place) and as items on a single
+#WorldCanvas (moved with coords); each frame moves every model one pixel
+#and draws it, and then delivers the events raised while drawing
+def _createVehicleFrameBenchmark(vehicleCount: int, useWorldCanvas: bool):
+    def setup(root):
+        from sim_core import SimVehicle
+
+        parent = _createParent(root)
+        models = [SimVehicle((index % 50) * 20, (index // 50) * 20, 10, 10) for index in range(vehicleCount)]
+
+        if useWorldCanvas:
+            from world_canvas import WorldCanvas
+
+            worldCanvas = WorldCanvas(parent, 1000, 1000)
+            worldCanvas.place(x=0, y=0)
+            for model in models:
+                worldCanvas.addVehicle(model)
+            drawFrame = worldCanvas.render
+        else:
+            from vehicle import Vehicle
+
+            vehicles = [Vehicle(parent, model=model) for model in models]
+            def drawFrame():
+                for vehicle in vehicles:
+                    vehicle.syncFromModel()
+        _processEvents(root)
+
+        def operation():
+            for model in models:
+                model.originX += 1
+            drawFrame()
+            _processEvents(root)
+        def cleanup():
+            parent.destroy()
+        return operation, cleanup
+    return setup
+
+benchmark("Vehicle.syncFromModel[1000 widgets]")(_createVehicleFrameBenchmark(1000, False))
+benchmark("WorldCanvas.render[1000 items]")(_createVehicleFrameBenchmark(1000, True))
+
+
+#RoadNetwork construction, as a load test
+#each operation builds a complete grid in a new parent
+#and delivers the events raised while building it
+def _createRoadNetworkBenchmark(rows: int, columns: int):
+    def setup(root):
+        from road_network import buildGrid
+
+        builtNetworks = []
+        def operation():
+            parent = _createParent(root)
+            builtNetworks.append(buildGrid(parent, rows, columns))
+            _processEvents(root)
+        def cleanup():
+            for network in builtNetworks:
+                network.signalController.stop()
+                network.parent.destroy()
+        return operation, cleanup
+    return setup
+
+for _gridSize in (5, 20):
+    benchmark(f"RoadNetwork.build[{_gridSize}x{_gridSize}]")(_createRoadNetworkBenchmark(_gridSize, _gridSize))
+
+
+#times a single benchmark operation
+#the number of operations per sample is doubled until a sample takes at
+#least minTime seconds, then repeat samples of that size are taken
+#returns a dict of results; opsPerSec is based on the fastest sample,
+#as it is the one least disturbed by the rest of the system
+def timeOperation(operation: Callable, minTime: float = 0.05, repeat: int = 5) -> Dict[str, float]:
+    from time import perf_counter
+
+    #calibrate the number of operations per sample
+    operationCount = 1
+    while True:
+        startTime = perf_counter()
+        for _ in range(operationCount):
+            operation()
+        elapsed = perf_counter() - startTime
+        if elapsed >= minTime:
+            break
+        operationCount *= 2
+
+    samples = []
+    for _ in range(repeat):
+        startTime = perf_counter()
+        for _ in range(operationCount):
+            operation()
+        samples.append(perf_counter() - startTime)
+
+    bestTime = min(samples)
+    meanTime = sum(samples) / len(samples)
+    return {
+        "opsPerSec": operationCount / bestTime,
+        "secPerOp": bestTime / operationCount,
+        "meanSecPerOp": meanTime / operationCount,
+        "operationsPerSample": operationCount,
+        "samples": len(samples)
+        }
+
+
+#runs the registered benchmarks and returns a dict of results
+#the dict contains information about the run, and a dict "results" that
+#associates each benchmark name with the results of timeOperation
+#if nameFilter is provided, only benchmarks whose name contains it are run
+#if useDisplay is True, a real Tk instance is used; otherwise stub widgets are
+#if verbose is True, each result is printed as soon as it is available
+def runBenchmarks(
+    nameFilter: str = None,
+    useDisplay: bool = False,
+    minTime: float = 0.05,
+    repeat: int = 5,
+    verbose: bool = True
+    ) -> dict:
+    import platform
+    from datetime import datetime, timezone
+
+    if useDisplay:
+        from tkinter import Tk
+        root = Tk()
+    else:
+        from stub_tk import createStubRoot
+        root = createStubRoot()
+
+    results = {}
+    for name, setupFunction in _benchmarks:
+        if nameFilter != None and nameFilter.lower() not in name.lower():
+            continue
+
+        operation, cleanup = setupFunction(root)
+        try:
+            results[name] = timeOperation(operation, minTime, repeat)
+        finally:
+            if cleanup != None:
+                cleanup()
+            _processEvents(root)
+
+        if verbose:
+            print(formatResult(name, results[name]))
+
+    if useDisplay:
+        root.destroy()
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "widgets": "tk" if useDisplay else "stub",
+        "results": results
+        }
+
+
+#returns a line of text describing the result of one benchmark
+#if previousResult is provided, the change in speed from it is included
+def formatResult(name: str, result: Dict[str, float], previousResult: Dict[str, float] = None) -> str:
+    line = f"{name:<48} {result['opsPerSec']:>14,.0f} ops/sec {result['secPerOp'] * 1e6:>10.3f} usec/op"
+    if previousResult != None:
+        change = result["opsPerSec"] / previousResult["opsPerSec"] - 1
+        line += f" {change:>+8.1%}"
+    return line
+
+#prints a comparison of two runs, one line per benchmark in the current run
+#benchmarks missing from the previous run are marked as new
+def printComparison(current: dict, previous: dict):
+    previousResults = previous.get("results", {})
+    print(f"Compared with the run from {previous.get('timestamp', 'an unknown time')}:")
+    for name, result in current["results"].items():
+        previousResult = previousResults.get(name)
+        line = formatResult(name, result, previousResult)
+        if previousResult == None:
+            line += "      new"
+        print(line)
+
+
+#parses command line arguments and runs the benchmarks
+def main(args: List[str] = None):
+    import json
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Benchmarks for the geometry and rendering hot paths of py_traffic_light")
+    parser.add_argument("filter", nargs="?", default=None,
+        help="only run benchmarks whose name contains this text")
+    parser.add_argument("--json", metavar="PATH", dest="jsonPath",
+        help="save the results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", dest="comparePath",
+        help="compare the results with a JSON file saved by an earlier run")
+    parser.add_argument("--display", action="store_true",
+        help="use a real Tk instance instead of stub widgets (requires a display)")
+    parser.add_argument("--min-time", type=float, default=0.05, dest="minTime",
+        help="minimum duration of each timed sample, in seconds (default: 0.05)")
+    parser.add_argument("--repeat", type=int, default=5,
+        help="number of timed samples per benchmark (default: 5)")
+    parser.add_argument("--list", action="store_true", dest="listOnly",
+        help="list the benchmarks and exit")
+    options = parser.parse_args(args)
+
+    if options.listOnly:
+        for name in getBenchmarkNames():
+            print(name)
+        return
+
+    #read the previous results first, so a bad path fails before the run
+    previous = None
+    if options.comparePath != None:
+        with open(options.comparePath) as compareFile:
+            previous = json.load(compareFile)
+
+    current = runBenchmarks(
+        options.filter,
+        options.display,
+        options.minTime,
+        options.repeat,
+        verbose=previous == None
+        )
+
+    if previous != None:
+        printComparison(current, previous)
+
+    if options.jsonPath != None:
+        with open(options.jsonPath, "w") as jsonFile:
+            json.dump(current, jsonFile, indent=2)
+        print(f"Results saved to {options.jsonPath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 from position_reporter import PositionReporterInterface, PositionReporter
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Tuple
+from tkinter import Misc as BaseTkObject
 from collision import Collision
+from spatial_hash import SpatialHash
+from frame_stats import FrameStats, recordGlobalTime
 
 #Collider Interface
 #A subinterface of PositionReporter that can
@@ -33,12 +36,103 @@ class ColliderInterface(PositionReporterInterface):
     def createCollisionUpdateEvent(self) -> None:
         raise NotImplementedError(ColliderInterface._ERROR_MESSAGE_TEXT)
 
+    def createCollisionEvent(self, eventName: str, when: str = "tail") -> None:
+        raise NotImplementedError(ColliderInterface._ERROR_MESSAGE_TEXT)
+
+    def queueCollisionUpdate(self, collision: Collision) -> None:
+        raise NotImplementedError(ColliderInterface._ERROR_MESSAGE_TEXT)
+
+    def getChangedCollisions(self) -> List[Collision]:
+        raise NotImplementedError(ColliderInterface._ERROR_MESSAGE_TEXT)
+
 #Collider
 #a sub"concrete interface" of PositionReporter that can detect 
 #collisions between itself and other Collider instances
 
 class Collider(ColliderInterface, PositionReporter):
 
+    #dict that associates each parent widget with the SpatialHash
+    #that its Collider children are registered with
+    #Colliders are only ever compared against their siblings, 
+    #so each parent (and therefore each coordinate space) gets its own grid
+    _spatialHashes: Dict[BaseTkObject, SpatialHash] = {}
+
+    #override constructor to register this Collider
+    #with the SpatialHash of its parent widget
+    def __init__(self, *args, **kwargs):
+
+        #run superclass constructor
+        super().__init__(*args, **kwargs)
+
+        #init collision update queue
+        #Collisions that changed since the last <<CollisionUpdate>> event
+        #are stored here (as dict keys, to remove duplicates while keeping order)
+        #until the queue is flushed when tkinter is idle
+        self._pendingCollisionUpdates: Dict[Collision, None] = {}
+        self._collisionUpdateAfterId = None
+
+        #the Collisions reported by the most recent <<CollisionUpdate>> event
+        self._changedCollisions: List[Collision] = []
+
+        #register with the parent's SpatialHash
+        self.updateSpatialHash()
+
+        #keep the SpatialHash up to date as this Collider moves and resizes
+        #add is set so that this doesn't replace other <Configure> bindings
+        self.bind("<Configure>", self.updateSpatialHash, add=True)
+
+        #remove this Collider from the SpatialHash when it is destroyed
+        self.bind("<Destroy>", self._onDestroy, add=True)
+
+
+    #classmethod
+    #returns the SpatialHash used for the Colliders that are
+    #children of the specified parent widget, creating it if it doesn't exist
+    @classmethod
+    def getSpatialHash(cls, parent: BaseTkObject) -> SpatialHash:
+        spatialHash = cls._spatialHashes.get(parent)
+        if spatialHash == None:
+            spatialHash = SpatialHash()
+            cls._spatialHashes[parent] = spatialHash
+        return spatialHash
+
+    #moves this Collider to the cells of its parent's SpatialHash that
+    #its current dimension ranges cover
+    #event parameter is provided so this can be used as an event handler
+    def updateSpatialHash(self, event = None):
+        self.getSpatialHash(self.master).update(self, self.getDimensionRanges())
+
+    #internal method
+    #called when this Collider moves itself (e.g. Vehicle.setPos or
+    #Vehicle.syncFromModel); the SpatialHash is updated right away rather than
+    #when <Configure> is raised, which only happens once tkinter is idle, so
+    #getCollisions on another Collider in the same tick finds this one
+    def _onCachedPosChanged(self):
+        self.updateSpatialHash()
+
+    #internal method
+    #event handler for the <Destroy> event
+    #<Destroy> is also raised for every child of a destroyed widget,
+    #so events that aren't about this Collider are ignored
+    def _onDestroy(self, event):
+        if event.widget != self:
+            return
+
+        #cancel a queued <<CollisionUpdate>>; it would be raised on a dead widget
+        if self._collisionUpdateAfterId != None:
+            self.after_cancel(self._collisionUpdateAfterId)
+            self._collisionUpdateAfterId = None
+        self._pendingCollisionUpdates.clear()
+
+        spatialHash = self._spatialHashes.get(self.master)
+        if spatialHash == None:
+            return
+
+        spatialHash.remove(self)
+        #drop the SpatialHash once its last Collider is gone
+        if len(spatialHash) == 0:
+            del self._spatialHashes[self.master]
+
     #creates a new Collision object involving this Collider
     #and another provided Collider object
     #raises TypeError if the other object is not a Collider 
@@ -66,15 +160,27 @@ class Collider(ColliderInterface, PositionReporter):
     #collides with, use getCollidingObjects instead
     #checks against objectsToCheck if provided
     #checks against this object's direct siblings if objectsToCheck is left empty
+    #   note: when checking siblings, only the Colliders that share a cell of
+    #   the parent's SpatialHash with this object are checked, so the cost depends
+    #   on how crowded the area around this object is rather than the sibling count
     #   note: Collisions can raise a <<CollisionUpdate>> event on its Colliders
     #   but you will need to call the addBindings method to activate this
     #   The generateCollisions method may be a better option if
     #   you want all Collisions to have active bindings from the start
+    #the time spent here is recorded as collision time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.COLLISION_TIME)
     def getCollisions(self, objectsToCheck: Iterable[ColliderInterface] = None) -> List[Collision]:
 
         #if no object list was provided, use siblings of this object
+        #that are close enough to possibly overlap with it
         if objectsToCheck == None:
-            objectsToCheck = self.master.winfo_children()
+            spatialHash = self.getSpatialHash(self.master)
+
+            #make sure this object's own cells are current before querying
+            ranges = self.getDimensionRanges()
+            spatialHash.update(self, ranges)
+
+            objectsToCheck = spatialHash.query(ranges)
 
         #init list of found collisions
         foundCollisions = []
@@ -143,10 +249,49 @@ class Collider(ColliderInterface, PositionReporter):
         return collisions
 
     #raises a custom type of event on this Collider
-    #this is called by bound Collisions that 
-    #this Collider is involved in when the overlapping area changes
+    #this is called when the queue of changed Collisions is flushed
+    #(see queueCollisionUpdate)
     def createCollisionUpdateEvent(self):
-        self.event_generate("<<CollisionUpdate>>", when="tail")
+        self.createCollisionEvent("<<CollisionUpdate>>")
+
+    #raises the specified virtual event (e.g. "<<CollisionEnter>>") on this Collider
+    #this is used by CollisionManager to report changes in contact state
+    #when works the same as in tkinter's event_generate
+    def createCollisionEvent(self, eventName: str, when: str = "tail"):
+        self.event_generate(eventName, when=when)
+
+
+    #adds a Collision to the queue of Collisions that changed
+    #this is called by bound Collisions that this Collider 
+    #is involved in when the overlapping area may have changed
+    #rather than raising a <<CollisionUpdate>> event right away, the queue
+    #is flushed once tkinter is idle, so a Collider only gets one 
+    #<<CollisionUpdate>> event no matter how many of its Collisions 
+    #changed or how many <Configure> events were raised in the meantime
+    def queueCollisionUpdate(self, collision: Collision):
+        self._pendingCollisionUpdates[collision] = None
+
+        if self._collisionUpdateAfterId == None:
+            self._collisionUpdateAfterId = self.after_idle(self._flushCollisionUpdates)
+
+    #internal method
+    #called by tkinter when idle after a Collision was queued
+    #raises a single <<CollisionUpdate>> event for every queued Collision
+    def _flushCollisionUpdates(self):
+        self._collisionUpdateAfterId = None
+        self._changedCollisions = list(self._pendingCollisionUpdates)
+        self._pendingCollisionUpdates.clear()
+
+        #the event is raised immediately rather than added to the end of
+        #the event queue; this way getChangedCollisions reports this event's
+        #Collisions even if more Collisions are queued before it is handled
+        self.createCollisionEvent("<<CollisionUpdate>>", when="now")
+
+    #returns a list of the Collisions that changed, as reported by
+    #the most recent <<CollisionUpdate>> event on this Collider
+    #use this from a <<CollisionUpdate>> handler to only handle the Collisions that changed
+    def getChangedCollisions(self) -> List[Collision]:
+        return list(self._changedCollisions)
 
 #end Collider
         
\ No newline at end of file
@@ -85,6 +85,74 @@ class Collision():
         return (areaX, areaY, areaWidth, areaHeight)
 
 
+    #vectorized version of getRangeOverlap that compares many pairs of ranges at once
+    #rangesA and rangesB are array-likes of shape (N, 2), one (start, stop) range per row
+    #returns a 2-tuple (overlaps, mask) where overlaps is an array of shape (N, 2)
+    #holding the overlapping range of each pair and mask is a boolean array of
+    #shape (N,) that is True where the pair overlaps. Rows of overlaps where
+    #mask is False (where getRangeOverlap would return None) are set to zero
+    #requires NumPy
+    @staticmethod
+    def getRangeOverlapBatch(rangesA, rangesB):
+        import numpy as np
+
+        rangesA = np.asarray(rangesA)
+        rangesB = np.asarray(rangesB)
+
+        #order each range the same way getRangeOverlap does;
+        #taking the min and max of each row swaps incorrectly ordered ranges
+        startA = np.minimum(rangesA[:, 0], rangesA[:, 1])
+        endA = np.maximum(rangesA[:, 0], rangesA[:, 1])
+        startB = np.minimum(rangesB[:, 0], rangesB[:, 1])
+        endB = np.maximum(rangesB[:, 0], rangesB[:, 1])
+
+        #A starts before B ends and B starts before A ends
+        #both comparisons are inclusive, as in getRangeOverlap
+        mask = (startA <= endB) & (startB <= endA)
+
+        #the overlap is the largest start and the smallest end
+        overlaps = np.stack((np.maximum(startA, startB), np.minimum(endA, endB)), axis=1)
+        overlaps[~mask] = 0
+
+        return (overlaps, mask)
+
+
+    #vectorized version of getRectangleOverlap that compares many pairs of rectangles at once
+    #rectsA and rectsB are array-likes of either shape (N, 2, 2), one
+    #((x0, x1), (y0, y1)) set of ranges per row, or shape (N, 4), one
+    #flattened (x0, x1, y0, y1) set of ranges per row
+    #returns a 2-tuple (areas, mask) where areas is an array of shape (N, 4)
+    #holding the (x, y, width, height) of each overlapping area and mask is a
+    #boolean array of shape (N,) that is True where the pair overlaps. Rows of areas
+    #where mask is False (where getRectangleOverlap would return None) are set to zero
+    #requires NumPy
+    @classmethod
+    def getRectangleOverlapBatch(cls, rectsA, rectsB):
+        import numpy as np
+
+        #flatten (N, 2, 2) input to (N, 4) so both shapes are handled the same way
+        rectsA = np.asarray(rectsA).reshape(-1, 4)
+        rectsB = np.asarray(rectsB).reshape(-1, 4)
+
+        #check for overlap in both dimensions
+        xOverlaps, xMask = cls.getRangeOverlapBatch(rectsA[:, 0:2], rectsB[:, 0:2])
+        yOverlaps, yMask = cls.getRangeOverlapBatch(rectsA[:, 2:4], rectsB[:, 2:4])
+
+        #there is only an overlap area if both dimensions overlap
+        mask = xMask & yMask
+
+        #determine the position and dimensions of each overlap area
+        areas = np.stack((
+            xOverlaps[:, 0],
+            yOverlaps[:, 0],
+            xOverlaps[:, 1] - xOverlaps[:, 0],
+            yOverlaps[:, 1] - yOverlaps[:, 0]
+            ), axis=1)
+        areas[~mask] = 0
+
+        return (areas, mask)
+
+
     #calculates the collision area between collisionSource and collidedWith
     #returns a 4-tuple (x, y, width, height) of the collision area
     #or None if there is no collision
@@ -104,11 +172,12 @@ class Collision():
 
     #called whenever either of the Colliders has a <Configure> event
     #(assuming bindings have been set with Collision.addBindings())
-    #raises a <<CollisionUpdate>> event on both Colliders
+    #queues this Collision on both Colliders; each Collider raises a single
+    #<<CollisionUpdate>> event for all of its queued Collisions once tkinter is idle
     def relayCollisionUpdateEvent(self, event = None):
 
-        self.collisionSource.createCollisionUpdateEvent()
-        self.collidedWith.createCollisionUpdateEvent()
+        self.collisionSource.queueCollisionUpdate(self)
+        self.collidedWith.queueCollisionUpdate(self)
 
     #constructor requires two Collider objects; these are the objects involved
     #with this specific Collision instance
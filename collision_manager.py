@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from tkinter import TclError
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+from collision import Collision
+from frame_stats import FrameStats, recordGlobalTime
+if TYPE_CHECKING:
+    from collider import ColliderInterface
+
+
+#CollisionManager
+#Tracks the contact state of a set of Collisions across frames
+#Unlike Collision.addBindings, which raises <<CollisionUpdate>> on every
+#<Configure> whether or not anything changed, a CollisionManager only
+#recomputes the Collisions whose Colliders moved, and only raises events
+#when the contact state of a Collision actually changes:
+#   <<CollisionEnter>>  is raised when two Colliders start overlapping
+#   <<CollisionExit>>   is raised when two Colliders stop overlapping
+#   <<CollisionChange>> is raised when the overlapping area of two Colliders
+#                       that were already overlapping changes
+#                       (only if emitChangeEvents is True)
+#Events are raised on both Colliders of the Collision; use getActiveCollisions
+#or getCollisionState from the event handler to find out which Collision changed
+class CollisionManager():
+
+    #names of the events raised by CollisionManager
+    ENTER_EVENT = "<<CollisionEnter>>"
+    EXIT_EVENT = "<<CollisionExit>>"
+    CHANGE_EVENT = "<<CollisionChange>>"
+
+    #constructor
+    #if emitChangeEvents is True, <<CollisionChange>> events are raised
+    #in addition to <<CollisionEnter>> and <<CollisionExit>>
+    #if autoUpdate is True (default), moved Colliders are processed once tkinter
+    #is idle; if it is False, update must be called manually (e.g. once per frame)
+    def __init__(self, emitChangeEvents: bool = False, autoUpdate: bool = True):
+
+        self.emitChangeEvents = emitChangeEvents
+        self.autoUpdate = autoUpdate
+
+        #dict that associates each tracked Collision with its last known
+        #collision area, or None if its Colliders weren't overlapping
+        self._collisionAreas: Dict[Collision, Tuple[int, int, int, int]] = {}
+
+        #dict that associates each Collider with the
+        #set of tracked Collisions it is involved in
+        self._collisionsByCollider: Dict[ColliderInterface, Set[Collision]] = {}
+
+        #set of Colliders that moved since the last update
+        self._movedColliders: Set[ColliderInterface] = set()
+
+        #dict that associates each Collider that has a <Configure> binding to
+        #this manager with the funcid of that binding
+        #the binding is removed once the Collider's last Collision is
+        #removed (see _unbindCollider), so Colliders that are no longer
+        #tracked don't keep calling markMoved or keep this manager alive
+        self._boundColliders: Dict[ColliderInterface, str] = {}
+
+        #the widget and id of the pending after_idle call to update, if any
+        #the call is made on the root window rather than on a Collider, as
+        #tkinter deletes a widget's callbacks when it is destroyed, and a
+        #Collider destroyed before the call would otherwise leave it pending forever
+        self._pendingUpdate = None
+
+
+    #starts tracking a Collision
+    #the current contact state is recorded without raising any events
+    def addCollision(self, collision: Collision):
+
+        if collision in self._collisionAreas:
+            return
+
+        self._collisionAreas[collision] = collision.getCollisionArea()
+
+        for collider in (collision.collisionSource, collision.collidedWith):
+            self._collisionsByCollider.setdefault(collider, set()).add(collision)
+
+            #bind to <Configure> once per Collider; this is what
+            #lets the manager know which Colliders moved
+            if collider not in self._boundColliders:
+                funcId = collider.bind("<Configure>", lambda event, collider=collider: self.markMoved(collider), add=True)
+                self._boundColliders[collider] = funcId
+
+    #creates a Collision between two Colliders, starts tracking it, and returns it
+    def addPair(self, collisionSource: ColliderInterface, collidedWith: ColliderInterface) -> Collision:
+        collision = collisionSource.getCollisionWith(collidedWith)
+        self.addCollision(collision)
+        return collision
+
+    #stops tracking a Collision
+    #returns True if the Collision was tracked, False if it was not
+    def removeCollision(self, collision: Collision) -> bool:
+
+        if collision not in self._collisionAreas:
+            return False
+
+        del self._collisionAreas[collision]
+
+        for collider in (collision.collisionSource, collision.collidedWith):
+            collisions = self._collisionsByCollider.get(collider)
+            if collisions == None:
+                continue
+            collisions.discard(collision)
+            if len(collisions) == 0:
+                del self._collisionsByCollider[collider]
+                self._movedColliders.discard(collider)
+                self._unbindCollider(collider)
+
+        return True
+
+    #internal method
+    #removes this manager's <Configure> binding from a Collider, if it has one
+    #tkinter's unbind would remove every binding for the sequence, including
+    #the ones made by other classes (e.g. Collider's own), so only the line of
+    #the bind script that calls this manager's binding is removed
+    def _unbindCollider(self, collider: ColliderInterface):
+        funcId = self._boundColliders.pop(collider, None)
+        if funcId == None:
+            return
+
+        try:
+            script = collider.bind("<Configure>")
+            remainingLines = [line for line in script.split("\n") if line != "" and funcId not in line]
+            collider.bind("<Configure>", "\n".join(remainingLines))
+            collider.deletecommand(funcId)
+        except TclError:
+            #the Collider was destroyed, along with its bindings
+            pass
+
+
+    #records that a Collider moved or resized, so its Collisions
+    #are recomputed during the next update
+    #this is bound to <Configure> on each tracked Collider, but can also
+    #be called directly for Colliders that moved without raising that event
+    def markMoved(self, collider: ColliderInterface):
+
+        #ignore Colliders that are no longer tracked
+        if collider not in self._collisionsByCollider:
+            return
+
+        self._movedColliders.add(collider)
+
+        #schedule a single update for when tkinter is idle;
+        #any other Colliders that move before then are handled by the same update
+        if self.autoUpdate and self._pendingUpdate == None:
+            root = collider._root()
+            self._pendingUpdate = (root, root.after_idle(self._onIdle))
+
+    #internal method
+    #called by tkinter when idle after a Collider moved
+    def _onIdle(self):
+        self._pendingUpdate = None
+        self.update()
+
+
+    #recomputes the Collisions of every Collider that moved since the last
+    #update and raises events for each Collision whose contact state changed
+    #Collisions whose Colliders didn't move are not recomputed
+    #returns a list of the Collisions whose contact state changed
+    #the time spent here is recorded as collision time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.COLLISION_TIME)
+    def update(self) -> List[Collision]:
+
+        if len(self._movedColliders) == 0:
+            return []
+
+        #gather the Collisions involving moved Colliders
+        #a dict is used so a Collision where both Colliders moved is only
+        #recomputed once, while keeping a stable order
+        collisionsToCheck = {}
+        for collider in self._movedColliders:
+            for collision in self._collisionsByCollider.get(collider, ()):
+                collisionsToCheck[collision] = None
+        self._movedColliders.clear()
+
+        changedCollisions = []
+        for collision in collisionsToCheck:
+
+            oldArea = self._collisionAreas[collision]
+            newArea = collision.getCollisionArea()
+
+            #determine which event, if any, this change calls for
+            if oldArea == None and newArea != None:
+                eventName = self.ENTER_EVENT
+            elif oldArea != None and newArea == None:
+                eventName = self.EXIT_EVENT
+            elif oldArea != newArea:
+                eventName = self.CHANGE_EVENT
+            else:
+                #nothing changed for this Collision
+                continue
+
+            self._collisionAreas[collision] = newArea
+            changedCollisions.append(collision)
+
+            if eventName == self.CHANGE_EVENT and not self.emitChangeEvents:
+                continue
+
+            collision.collisionSource.createCollisionEvent(eventName)
+            collision.collidedWith.createCollisionEvent(eventName)
+
+        return changedCollisions
+
+
+    #returns the last known collision area of a tracked Collision as
+    #a 4-tuple (x, y, width, height), or None if its Colliders weren't overlapping
+    #this doesn't recompute anything; it reports the state as of the last update
+    #raises a KeyError if the Collision is not tracked
+    def getCollisionState(self, collision: Collision) -> Tuple[int, int, int, int]:
+        return self._collisionAreas[collision]
+
+    #returns a list of tracked Collisions whose Colliders were overlapping as of the last update
+    #if collider is provided, only Collisions involving that Collider are returned
+    def getActiveCollisions(self, collider: ColliderInterface = None) -> List[Collision]:
+
+        if collider == None:
+            collisions = self._collisionAreas.keys()
+        else:
+            collisions = self._collisionsByCollider.get(collider, ())
+
+        return [collision for collision in collisions if self._collisionAreas[collision] != None]
+
+    #returns a list of every tracked Collision
+    def getCollisions(self) -> List[Collision]:
+        return list(self._collisionAreas)
+
+    #stops tracking every Collision and cancels any pending update
+    #every binding made by this manager is removed
+    def clear(self):
+        if self._pendingUpdate != None:
+            widget, afterId = self._pendingUpdate
+            try:
+                widget.after_cancel(afterId)
+            except TclError:
+                #the root window was destroyed, along with the pending call
+                pass
+            self._pendingUpdate = None
+
+        self._collisionAreas.clear()
+        self._collisionsByCollider.clear()
+        self._movedColliders.clear()
+        for collider in list(self._boundColliders):
+            self._unbindCollider(collider)
+
+#end CollisionManager
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
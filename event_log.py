@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from struct import Struct
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from lamp_state import LampState
+    from sim_core import SimVehicle
+    from vehicle import Vehicle
+    from collision_manager import CollisionManager
+    from simulation_clock import SimulationClock
+    from world_canvas import WorldCanvas
+
+
+#Event Log
+#Records a run as an append-only binary log, and replays it
+#Every record is the same size (see RECORD_STRUCT), so record n is always at
+#the same offset and the file can be read through mmap without parsing
+#anything before it. Each tick, an EventRecorder appends a record for each
+#state change: vehicles that moved, lamps that changed, drives that
+#completed, and collisions that started or ended. Every keyframeInterval
+#ticks it also writes a keyframe, a full copy of the state, and appends its
+#position to an index file next to the log (the log's path plus ".idx")
+#An EventLog maps the file and uses the index to find the state at any tick:
+#it starts from the last keyframe at or before that tick and applies the
+#records that follow, so seeking never reads more than one keyframe interval
+#of records, no matter how long the recording is
+#Records are tuples (tick, eventType, value, entityId, otherId, x, y);
+#which fields are used depends on the event type (see the EVENT constants)
+
+
+#the file starts with a header: magic bytes, format version,
+#header size, record size, and keyframe interval
+MAGIC = b"PTLLOG"
+FORMAT_VERSION = 1
+HEADER_STRUCT = Struct("<6sHHHI")
+
+#each record is: tick, eventType, value, entityId, otherId, x, y
+RECORD_STRUCT = Struct("<IBBHHff")
+
+#each index entry is: tick, record index of the keyframe
+INDEX_STRUCT = Struct("<II")
+
+INDEX_SUFFIX = ".idx"
+
+#event types
+#the start of a keyframe; the state is reset and rebuilt from the records that follow
+EVENT_KEYFRAME = 0
+#a vehicle was added; x and y are its width and height
+EVENT_VEHICLE_ADDED = 1
+#a vehicle was removed
+EVENT_VEHICLE_REMOVED = 2
+#a vehicle moved; x and y are its new position
+EVENT_VEHICLE_MOVED = 3
+#a traffic light was added; x and y are its position, value is its lamp state
+EVENT_LIGHT_ADDED = 4
+#a traffic light's lamps changed; value is its new lamp state (see LampState)
+EVENT_LAMP_CHANGED = 5
+#a vehicle's drive completed; x and y are its position
+EVENT_DRIVE_COMPLETE = 6
+#two objects started or stopped overlapping; entityId and otherId are the
+#ids of the objects, which may be objects that have no other records (e.g. roads)
+EVENT_COLLISION_STARTED = 7
+EVENT_COLLISION_ENDED = 8
+
+#the largest entity id that fits in a record
+MAX_ENTITY_ID = 2 ** 16 - 1
+
+
+#EventRecorder
+#Writes the event log of a run (see the top of this file)
+#Register the vehicles, lights, and collision managers to record, then call
+#recordTick once per tick (or use attachToClock); close the recorder when done
+#Vehicles can be Vehicle widgets or SimVehicles, and lights can be
+#TrafficLights or any other LampState (such as a CanvasTrafficLight)
+class EventRecorder():
+
+    #the default number of ticks between keyframes
+    DEFAULT_KEYFRAME_INTERVAL = 600
+
+    def __init__(self, path: str, keyframeInterval: int = None):
+
+        if keyframeInterval == None:
+            keyframeInterval = self.DEFAULT_KEYFRAME_INTERVAL
+        if keyframeInterval < 1:
+            errMsg = f"Keyframe interval must be at least 1 ({repr(keyframeInterval)})"
+            raise ValueError(errMsg)
+
+        self.path = path
+        self.keyframeInterval = keyframeInterval
+
+        #the tick being recorded; records made before the next
+        #recordTick call are stamped with this tick
+        self.tick = 0
+
+        #number of records written (or waiting to be written) so far
+        self._recordCount = 0
+
+        #records made since the last recordTick, already packed
+        self._pendingRecords: List[bytes] = []
+
+        #dict that associates each object that appears in the log with its
+        #id, and the reverse; ids are released (see _releaseUnusedIds) once
+        #their object is no longer recorded, so objects that come and go
+        #aren't kept alive and the ids are reused
+        self._entityIds: Dict[object, int] = {}
+        self._entities: Dict[int, object] = {}
+
+        #ids that were released and can be given to new objects
+        self._freeIds: List[int] = []
+
+        #dict that associates the id of each recorded vehicle with its SimVehicle
+        #(the model, for Vehicle widgets), and with the last position recorded for it
+        self._vehicles: Dict[int, SimVehicle] = {}
+        self._vehiclePositions: Dict[int, Tuple[float, float]] = {}
+
+        #dict that associates the id of each recorded light with the light,
+        #and with its position
+        self._lights: Dict[int, LampState] = {}
+        self._lightPositions: Dict[int, Tuple[float, float]] = {}
+
+        #the recorded CollisionManagers, and the set of pairs of ids of the
+        #Collisions that were active as of the last tick
+        self._collisionManagers: List[CollisionManager] = []
+        self._activeCollisionIds: Set[Tuple[int, int]] = set()
+
+        self._logFile = open(path, "wb")
+        self._indexFile = open(path + INDEX_SUFFIX, "wb")
+        self._logFile.write(HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, HEADER_STRUCT.size, RECORD_STRUCT.size, keyframeInterval))
+
+        #write the header to disk right away, so the log can be opened
+        #by an EventLog before the first tick is flushed
+        self._logFile.flush()
+
+
+    #internal method
+    #returns the id of an object, assigning it a new one if it doesn't have one
+    #released ids are reused before new ones are used
+    #raises a ValueError if there are no ids left, which only happens if more
+    #than MAX_ENTITY_ID + 1 objects are recorded at once
+    def _getEntityId(self, entity: object) -> int:
+        entityId = self._entityIds.get(entity)
+        if entityId == None:
+            if len(self._freeIds) > 0:
+                entityId = self._freeIds.pop()
+            else:
+                entityId = len(self._entityIds)
+                if entityId > MAX_ENTITY_ID:
+                    errMsg = f"Too many objects to record at once (at most {MAX_ENTITY_ID + 1})"
+                    raise ValueError(errMsg)
+            self._entityIds[entity] = entityId
+            self._entities[entityId] = entity
+        return entityId
+
+    #internal method
+    #releases each of the given ids whose object is no longer recorded: it
+    #isn't a recorded vehicle or light, and isn't part of an active collision
+    #(whose end still needs to be recorded with the same id)
+    #a released id can be given to a new object in a later record; replays
+    #aren't confused by this, as the object's removal (or the end of its
+    #last collision) is recorded before the id is reused
+    def _releaseUnusedIds(self, entityIds: Iterable[int]):
+        for entityId in entityIds:
+            if entityId in self._vehicles or entityId in self._lights or entityId not in self._entities:
+                continue
+            if any(entityId in pair for pair in self._activeCollisionIds):
+                continue
+            del self._entityIds[self._entities.pop(entityId)]
+            self._freeIds.append(entityId)
+
+    #internal method
+    #adds a record for the current tick
+    def _addRecord(self, eventType: int, entityId: int = 0, value: int = 0, otherId: int = 0, x: float = 0.0, y: float = 0.0):
+        self._pendingRecords.append(RECORD_STRUCT.pack(self.tick, eventType, value, entityId, otherId, x, y))
+        self._recordCount += 1
+
+
+    #starts recording a vehicle (a Vehicle widget or a SimVehicle)
+    #returns the id the vehicle has in the log
+    def addVehicle(self, vehicle: Vehicle) -> int:
+        from sim_core import SimVehicle
+
+        model = vehicle if isinstance(vehicle, SimVehicle) else vehicle.model
+        entityId = self._getEntityId(vehicle)
+        if entityId in self._vehicles:
+            return entityId
+
+        self._vehicles[entityId] = model
+        self._vehiclePositions[entityId] = (model.originX, model.originY)
+        self._addRecord(EVENT_VEHICLE_ADDED, entityId, x=model.width, y=model.height)
+        self._addRecord(EVENT_VEHICLE_MOVED, entityId, x=model.originX, y=model.originY)
+
+        #drives of Vehicle widgets are advanced by their model,
+        #so this catches the drives of both kinds of vehicle
+        model.addDriveCompleteListener(self._onDriveComplete)
+        return entityId
+
+    #stops recording a vehicle
+    def removeVehicle(self, vehicle: Vehicle):
+        entityId = self._entityIds.get(vehicle)
+        if entityId == None or entityId not in self._vehicles:
+            return
+
+        model = self._vehicles.pop(entityId)
+        del self._vehiclePositions[entityId]
+        model.removeDriveCompleteListener(self._onDriveComplete)
+        self._addRecord(EVENT_VEHICLE_REMOVED, entityId)
+        self._releaseUnusedIds((entityId,))
+
+    #internal method
+    #called by a recorded vehicle's model when its drive completes
+    def _onDriveComplete(self, model: SimVehicle):
+        for entityId, recordedModel in self._vehicles.items():
+            if recordedModel is model:
+                self._addRecord(EVENT_DRIVE_COMPLETE, entityId, x=model.originX, y=model.originY)
+                return
+
+    #starts recording a traffic light's lamps
+    #xPos and yPos are recorded as the light's position, so a replay can draw
+    #it; by default, the position of a CanvasTrafficLight or of the light's
+    #widget (as currently laid out) is used
+    #returns the id the light has in the log
+    def addTrafficLight(self, light: LampState, xPos: float = None, yPos: float = None) -> int:
+        entityId = self._getEntityId(light)
+        if entityId in self._lights:
+            return entityId
+
+        if xPos == None or yPos == None:
+            if hasattr(light, "xPos"):
+                xPos, yPos = light.xPos, light.yPos
+            elif hasattr(light, "winfo_x"):
+                xPos, yPos = light.winfo_x(), light.winfo_y()
+            else:
+                xPos, yPos = 0, 0
+
+        self._lights[entityId] = light
+        self._lightPositions[entityId] = (xPos, yPos)
+        self._addRecord(EVENT_LIGHT_ADDED, entityId, light.getLampState(), x=xPos, y=yPos)
+        light.addLampListener(self._onLampChanged)
+        return entityId
+
+    #internal method
+    #called by a recorded light whenever its lamps change
+    #(e.g. from setActiveLamp), so every change is recorded as it happens
+    def _onLampChanged(self, light: LampState):
+        self._addRecord(EVENT_LAMP_CHANGED, self._entityIds[light], light.getLampState())
+
+    #starts recording when the Collisions tracked by a CollisionManager
+    #start and stop overlapping, as of the manager's last update
+    def addCollisionManager(self, manager: CollisionManager):
+        if manager not in self._collisionManagers:
+            self._collisionManagers.append(manager)
+
+
+    #records every change of the current tick, then moves on to the next tick
+    #each vehicle whose position changed since it was last recorded gets a
+    #record, as does each Collision that started or ended
+    #every keyframeInterval ticks a keyframe is written after the changes
+    def recordTick(self):
+        addRecord = self._addRecord
+        vehiclePositions = self._vehiclePositions
+
+        for entityId, model in self._vehicles.items():
+            position = (model.originX, model.originY)
+            if position != vehiclePositions[entityId]:
+                vehiclePositions[entityId] = position
+                addRecord(EVENT_VEHICLE_MOVED, entityId, x=position[0], y=position[1])
+
+        if len(self._collisionManagers) > 0:
+            activeCollisionIds = set()
+            for manager in self._collisionManagers:
+                for collision in manager.getActiveCollisions():
+                    activeCollisionIds.add((
+                        self._getEntityId(collision.collisionSource),
+                        self._getEntityId(collision.collidedWith)
+                        ))
+            for entityId, otherId in sorted(activeCollisionIds - self._activeCollisionIds):
+                addRecord(EVENT_COLLISION_STARTED, entityId, otherId=otherId)
+            endedCollisionIds = sorted(self._activeCollisionIds - activeCollisionIds)
+            for entityId, otherId in endedCollisionIds:
+                addRecord(EVENT_COLLISION_ENDED, entityId, otherId=otherId)
+            self._activeCollisionIds = activeCollisionIds
+
+            #objects that were only recorded because of a collision
+            #(e.g. roads) don't keep their ids once it ends
+            self._releaseUnusedIds(set(entityId for pair in endedCollisionIds for entityId in pair))
+
+        if self.tick % self.keyframeInterval == 0:
+            self._addKeyframe()
+
+        self._logFile.write(b"".join(self._pendingRecords))
+        self._pendingRecords.clear()
+        self.tick += 1
+
+    #internal method
+    #adds a keyframe: a full copy of the current state, and an index entry for it
+    def _addKeyframe(self):
+        self._indexFile.write(INDEX_STRUCT.pack(self.tick, self._recordCount))
+        self._addRecord(EVENT_KEYFRAME)
+
+        for entityId, model in self._vehicles.items():
+            self._addRecord(EVENT_VEHICLE_ADDED, entityId, x=model.width, y=model.height)
+            self._addRecord(EVENT_VEHICLE_MOVED, entityId, x=model.originX, y=model.originY)
+        for entityId, light in self._lights.items():
+            xPos, yPos = self._lightPositions[entityId]
+            self._addRecord(EVENT_LIGHT_ADDED, entityId, light.getLampState(), x=xPos, y=yPos)
+        for entityId, otherId in sorted(self._activeCollisionIds):
+            self._addRecord(EVENT_COLLISION_STARTED, entityId, otherId=otherId)
+
+    #has a SimulationClock record a tick at the end of each of its ticks
+    def attachToClock(self, clock: SimulationClock):
+        clock.subscribe(lambda deltaTime: self.recordTick(), clock.LATE_PHASE)
+
+
+    #writes any buffered data to disk, so the log can be
+    #read (up to the last recorded tick) while recording continues
+    def flush(self):
+        self._logFile.flush()
+        self._indexFile.flush()
+
+    #stops recording and closes the log
+    #records made since the last recordTick are written as part of the current tick
+    #registered lights and vehicles stop being recorded
+    def close(self):
+        if self._logFile.closed:
+            return
+
+        self._logFile.write(b"".join(self._pendingRecords))
+        self._pendingRecords.clear()
+
+        for light in self._lights.values():
+            light.removeLampListener(self._onLampChanged)
+        for model in self._vehicles.values():
+            model.removeDriveCompleteListener(self._onDriveComplete)
+        self._lights.clear()
+        self._vehicles.clear()
+
+        self._logFile.close()
+        self._indexFile.close()
+
+    def __enter__(self) -> EventRecorder:
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+#end EventRecorder
+
+
+#ReplayState
+#The state of a recorded run at one tick, rebuilt from an event log
+class ReplayState():
+
+    def __init__(self):
+        #the tick this state is for
+        self.tick = None
+
+        #the index of the first record that hasn't been applied
+        self.nextRecordIndex = 0
+
+        #dict that associates each vehicle id with a 4-tuple (x, y, width, height)
+        self.vehicles: Dict[int, Tuple[float, float, float, float]] = {}
+
+        #dict that associates each light id with a 3-tuple (x, y, lampState)
+        self.lights: Dict[int, Tuple[float, float, int]] = {}
+
+        #set of the pairs of ids of the objects that are overlapping
+        self.activeCollisions: Set[Tuple[int, int]] = set()
+
+    #applies a record to this state
+    def apply(self, record: Tuple[int, int, int, int, int, float, float]):
+        tick, eventType, value, entityId, otherId, x, y = record
+
+        if eventType == EVENT_VEHICLE_MOVED:
+            _, _, width, height = self.vehicles[entityId]
+            self.vehicles[entityId] = (x, y, width, height)
+        elif eventType == EVENT_LAMP_CHANGED:
+            lightX, lightY, _ = self.lights[entityId]
+            self.lights[entityId] = (lightX, lightY, value)
+        elif eventType == EVENT_KEYFRAME:
+            self.vehicles.clear()
+            self.lights.clear()
+            self.activeCollisions.clear()
+        elif eventType == EVENT_VEHICLE_ADDED:
+            #the position is set by the EVENT_VEHICLE_MOVED record that follows
+            self.vehicles[entityId] = (0.0, 0.0, x, y)
+        elif eventType == EVENT_VEHICLE_REMOVED:
+            self.vehicles.pop(entityId, None)
+        elif eventType == EVENT_LIGHT_ADDED:
+            self.lights[entityId] = (x, y, value)
+        elif eventType == EVENT_COLLISION_STARTED:
+            self.activeCollisions.add((entityId, otherId))
+        elif eventType == EVENT_COLLISION_ENDED:
+            self.activeCollisions.discard((entityId, otherId))
+
+        self.tick = tick
+
+#end ReplayState
+
+
+#EventLog
+#Reads an event log written by an EventRecorder
+#The log is memory mapped, so opening it only reads the header and the
+#keyframe index, and only the pages that are actually used are read from disk
+#A log that is still being recorded can be opened; it contains the ticks that
+#were flushed when it was opened
+class EventLog():
+
+    def __init__(self, path: str):
+        import mmap
+        import os
+
+        self.path = path
+        self._file = open(path, "rb")
+
+        #a log always starts with its header (which an EventRecorder writes
+        #to disk as soon as it is created); mmap can't map an empty file
+        fileSize = os.fstat(self._file.fileno()).st_size
+        if fileSize < HEADER_STRUCT.size:
+            self._file.close()
+            errMsg = f"{path} is not an event log (it is shorter than the log header)"
+            raise ValueError(errMsg)
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, headerSize, recordSize, keyframeInterval = HEADER_STRUCT.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            errMsg = f"{path} is not an event log"
+            raise ValueError(errMsg)
+        if version != FORMAT_VERSION or recordSize != RECORD_STRUCT.size:
+            self.close()
+            errMsg = f"{path} uses an unsupported event log format (version {version})"
+            raise ValueError(errMsg)
+
+        self.keyframeInterval = keyframeInterval
+        self._headerSize = headerSize
+
+        #a partial record at the end (from a recording that was
+        #interrupted mid-write) is ignored
+        self._recordCount = (len(self._map) - headerSize) // recordSize
+
+        #load the keyframe index as a list of ticks and a list of record indices
+        #only the keyframes that are complete in the log are used
+        self._keyframeTicks: List[int] = []
+        self._keyframeIndices: List[int] = []
+        indexPath = path + INDEX_SUFFIX
+        if os.path.exists(indexPath):
+            with open(indexPath, "rb") as indexFile:
+                indexData = indexFile.read()
+            usableLength = len(indexData) - len(indexData) % INDEX_STRUCT.size
+            for tick, recordIndex in INDEX_STRUCT.iter_unpack(indexData[:usableLength]):
+                if recordIndex < self._recordCount:
+                    self._keyframeTicks.append(tick)
+                    self._keyframeIndices.append(recordIndex)
+        else:
+            self._rebuildIndex()
+
+    #internal method
+    #finds every keyframe by reading the whole log
+    #this is only needed if the index file is missing
+    def _rebuildIndex(self):
+        for recordIndex, record in enumerate(self.iterRecords()):
+            if record[1] == EVENT_KEYFRAME:
+                self._keyframeTicks.append(record[0])
+                self._keyframeIndices.append(recordIndex)
+
+
+    #returns the number of records in the log
+    def getRecordCount(self) -> int:
+        return self._recordCount
+
+    #returns the record with the specified index
+    def getRecord(self, recordIndex: int) -> Tuple[int, int, int, int, int, float, float]:
+        if recordIndex < 0 or recordIndex >= self._recordCount:
+            raise IndexError(f"Record index out of range ({recordIndex})")
+        return RECORD_STRUCT.unpack_from(self._map, self._headerSize + recordIndex * RECORD_STRUCT.size)
+
+    #returns an iterator of the records from startIndex up to (not including) stopIndex
+    #by default, every record in the log
+    def iterRecords(self, startIndex: int = 0, stopIndex: int = None) -> Iterator[Tuple[int, int, int, int, int, float, float]]:
+        if stopIndex == None or stopIndex > self._recordCount:
+            stopIndex = self._recordCount
+        if startIndex >= stopIndex:
+            return iter(())
+        recordSize = RECORD_STRUCT.size
+        startOffset = self._headerSize + startIndex * recordSize
+        stopOffset = self._headerSize + stopIndex * recordSize
+        return RECORD_STRUCT.iter_unpack(memoryview(self._map)[startOffset:stopOffset])
+
+    #returns the last tick in the log, or None if the log has no records
+    def getLastTick(self) -> int:
+        if self._recordCount == 0:
+            return None
+        return self.getRecord(self._recordCount - 1)[0]
+
+    #returns the index of the first record with a tick at or after the specified one
+    #(the record count if there is none); records are in order of tick, so this
+    #is a binary search that reads only a few records
+    def findRecordIndex(self, tick: int) -> int:
+        low = 0
+        high = self._recordCount
+        while low < high:
+            middle = (low + high) // 2
+            if self.getRecord(middle)[0] < tick:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+    #returns a 2-tuple (tick, recordIndex) of the last keyframe
+    #at or before the specified tick, or None if there is none
+    def getKeyframeBefore(self, tick: int) -> Tuple[int, int]:
+        from bisect import bisect_right
+
+        position = bisect_right(self._keyframeTicks, tick) - 1
+        if position < 0:
+            return None
+        return (self._keyframeTicks[position], self._keyframeIndices[position])
+
+    #returns the state of the run at the end of the specified tick as a ReplayState
+    #if a state is provided, it is brought forward to the tick when possible
+    #(that is, if it is for an earlier tick that is no further back than the
+    #last keyframe), rather than being rebuilt from a keyframe
+    def getStateAt(self, tick: int, state: ReplayState = None) -> ReplayState:
+        keyframe = self.getKeyframeBefore(tick)
+
+        if state == None or state.tick == None or state.tick > tick or (keyframe != None and state.tick < keyframe[0]):
+            state = ReplayState()
+            if keyframe != None:
+                state.nextRecordIndex = keyframe[1]
+
+        recordIndex = state.nextRecordIndex
+        for record in self.iterRecords(recordIndex):
+            if record[0] > tick:
+                break
+            state.apply(record)
+            recordIndex += 1
+        state.nextRecordIndex = recordIndex
+        state.tick = tick
+        return state
+
+    #returns a list of the records of the specified event types (by default,
+    #drive completions and collisions) from startTick up to (not including) stopTick
+    def getEvents(self, startTick: int, stopTick: int, eventTypes: Tuple[int, ...] = None) -> List[Tuple[int, int, int, int, int, float, float]]:
+        if eventTypes == None:
+            eventTypes = (EVENT_DRIVE_COMPLETE, EVENT_COLLISION_STARTED, EVENT_COLLISION_ENDED)
+        startIndex = self.findRecordIndex(startTick)
+        stopIndex = self.findRecordIndex(stopTick)
+        return [record for record in self.iterRecords(startIndex, stopIndex) if record[1] in eventTypes]
+
+
+    #closes the log
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> EventLog:
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+#end EventLog
+
+
+#LogPlayer
+#Replays an EventLog on a WorldCanvas: recorded vehicles are drawn as
+#SimVehicles and recorded lights as CanvasTrafficLights
+#(roads aren't recorded; add them to the WorldCanvas separately)
+#Use showTick to jump to any tick, or play to replay in real time
+class LogPlayer():
+
+    #the default number of ticks replayed per second
+    DEFAULT_TICK_RATE = 60
+
+    def __init__(self, log: EventLog, worldCanvas: WorldCanvas, tickRate: float = None):
+
+        self.log = log
+        self.worldCanvas = worldCanvas
+        self.tickRate = tickRate if tickRate != None else self.DEFAULT_TICK_RATE
+
+        #the ReplayState of the tick that is shown, or None before the first showTick
+        self.state: ReplayState = None
+
+        #dicts that associate each recorded id with the model or light drawing it
+        self._vehicles: Dict[int, SimVehicle] = {}
+        self._lights: Dict[int, LampState] = {}
+
+        #id of the pending after() call, or None if not playing
+        self._afterId = None
+
+    #returns the tick that is shown, or None if nothing was shown yet
+    def getTick(self) -> int:
+        return self.state.tick if self.state != None else None
+
+    #shows the state of the run at the end of the specified tick
+    #moving forward a few ticks at a time (as play does) only reads the records
+    #in between; jumping anywhere else reads from the nearest keyframe
+    def showTick(self, tick: int):
+        from sim_core import SimVehicle
+
+        self.state = self.log.getStateAt(tick, self.state)
+        worldCanvas = self.worldCanvas
+
+        #remove what no longer exists, then add or update everything else
+        for entityId in [entityId for entityId in self._vehicles if entityId not in self.state.vehicles]:
+            worldCanvas.removeVehicle(self._vehicles.pop(entityId))
+
+        for entityId, (x, y, width, height) in self.state.vehicles.items():
+            model = self._vehicles.get(entityId)
+            if model == None:
+                model = SimVehicle(x, y, width, height)
+                self._vehicles[entityId] = model
+                worldCanvas.addVehicle(model)
+            else:
+                model.setPos(x, y)
+                model.setDimensions(width, height)
+
+        for entityId, (x, y, lampState) in self.state.lights.items():
+            light = self._lights.get(entityId)
+            if light == None:
+                light = worldCanvas.addTrafficLight(int(round(x)), int(round(y)))
+                self._lights[entityId] = light
+            light.setLampState(lampState)
+
+        worldCanvas.render()
+
+    #starts replaying from the tick that is shown (or from tick 0) at tickRate
+    #ticks per second; stops by itself at the end of the log
+    def play(self):
+        if self._afterId != None:
+            return
+        if self.state == None:
+            self.showTick(0)
+        self._scheduleNextTick()
+
+    #stops replaying; the tick that is shown stays shown
+    def stop(self):
+        if self._afterId != None:
+            self.worldCanvas.after_cancel(self._afterId)
+            self._afterId = None
+
+    #returns True if the log is being replayed, False otherwise
+    def isPlaying(self) -> bool:
+        return self._afterId != None
+
+    #internal method
+    #schedules the next tick of the replay
+    def _scheduleNextTick(self):
+        delayMs = max(1, int(round(1000 / self.tickRate)))
+        self._afterId = self.worldCanvas.after(delayMs, self._onTimer)
+
+    #internal method
+    #called by the tkinter timer; shows the next tick
+    def _onTimer(self):
+        self._afterId = None
+        lastTick = self.log.getLastTick()
+        if lastTick == None or self.getTick() >= lastTick:
+            return
+        self.showTick(self.getTick() + 1)
+        self._scheduleNextTick()
+
+#end LogPlayer
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
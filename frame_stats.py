@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+from typing import Dict, List
+
+
+#Frame Stats
+#Opt-in instrumentation of frame timing
+#Vehicles, the SimulationClock, and the collision and draw code can record
+#how long their frames took and how late they ran into FrameStats objects,
+#which keep the most recent values of each metric in fixed-size ring buffers
+#and summarize them as percentiles. This shows when the Tk event loop is
+#saturated: frames arrive late, get dropped, or move zero pixels
+#Nothing is recorded unless it is enabled: use enableGlobalStats for
+#the shared stats, and Vehicle.enableFrameStats for per-vehicle stats
+#All times are recorded in milliseconds
+
+
+#RingBuffer
+#A fixed-size buffer of floats; once full, each new value replaces the oldest one
+class RingBuffer():
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            errMsg = f"Capacity must be at least 1 ({repr(capacity)})"
+            raise ValueError(errMsg)
+
+        self._values = [0.0] * capacity
+        #index that the next value is written to
+        self._nextIndex = 0
+        #number of values stored (up to capacity)
+        self._count = 0
+
+    #returns the maximum number of values this buffer keeps
+    def getCapacity(self) -> int:
+        return len(self._values)
+
+    #returns the number of values stored
+    def __len__(self) -> int:
+        return self._count
+
+    #adds a value, replacing the oldest value if the buffer is full
+    def append(self, value: float):
+        self._values[self._nextIndex] = value
+        self._nextIndex += 1
+        if self._nextIndex == len(self._values):
+            self._nextIndex = 0
+        if self._count < len(self._values):
+            self._count += 1
+
+    #returns a list of the stored values, oldest first
+    def getValues(self) -> List[float]:
+        if self._count < len(self._values):
+            return self._values[:self._count]
+        return self._values[self._nextIndex:] + self._values[:self._nextIndex]
+
+    #removes every stored value
+    def clear(self):
+        self._nextIndex = 0
+        self._count = 0
+
+#end RingBuffer
+
+
+#given a sorted list of values and a percentage (0 to 100),
+#returns the value at that percentile, interpolating linearly
+#between the two closest values; returns None for an empty list
+def getPercentile(sortedValues: List[float], percent: float) -> float:
+    if len(sortedValues) == 0:
+        return None
+
+    position = (len(sortedValues) - 1) * percent / 100
+    lowerIndex = int(position)
+    upperIndex = min(lowerIndex + 1, len(sortedValues) - 1)
+    fraction = position - lowerIndex
+    return sortedValues[lowerIndex] + (sortedValues[upperIndex] - sortedValues[lowerIndex]) * fraction
+
+
+#FrameStats
+#A set of named metrics (each kept in a RingBuffer) and named counters
+#metrics are created the first time a value is recorded for them
+class FrameStats():
+
+    #the default number of values kept per metric
+    DEFAULT_CAPACITY = 1024
+
+    #the percentiles included in summaries
+    SUMMARY_PERCENTILES = (50, 90, 99)
+
+    #names of the metrics recorded by this project
+    #time between frames, as measured
+    FRAME_INTERVAL = "frameInterval"
+    #how much later than scheduled each frame ran (negative if it ran early)
+    LATENESS = "lateness"
+    #time spent moving widgets and drawing on canvases
+    DRAW_TIME = "drawTime"
+    #time spent detecting and updating collisions
+    COLLISION_TIME = "collisionTime"
+    #time spent running a SimulationClock tick
+    TICK_TIME = "tickTime"
+
+    #names of the counters incremented by this project
+    #number of frames run
+    FRAMES = "frames"
+    #number of frames that should have run but didn't, because a frame
+    #ran so late that one or more whole frame intervals were skipped
+    DROPPED_FRAMES = "droppedFrames"
+    #number of frames in which a driving Vehicle didn't move a whole pixel
+    ZERO_MOVEMENT_FRAMES = "zeroMovementFrames"
+
+    #names of the frame metrics and counters of Vehicles that move on their
+    #own timer, as recorded in the shared stats; these are kept apart from
+    #the frames of the SimulationClock, as they are scheduled at a
+    #different interval (per-vehicle stats use the usual names)
+    VEHICLE_FRAME_INTERVAL = "vehicleFrameInterval"
+    VEHICLE_LATENESS = "vehicleLateness"
+    VEHICLE_FRAMES = "vehicleFrames"
+    VEHICLE_DROPPED_FRAMES = "vehicleDroppedFrames"
+
+    def __init__(self, capacity: int = None):
+
+        if capacity == None:
+            capacity = self.DEFAULT_CAPACITY
+        self.capacity = capacity
+
+        #dict that associates each metric name with its RingBuffer
+        self._metrics: Dict[str, RingBuffer] = {}
+
+        #dict that associates each counter name with its count
+        self._counters: Dict[str, int] = {}
+
+
+    #records a value for the specified metric
+    def record(self, name: str, value: float):
+        buffer = self._metrics.get(name)
+        if buffer == None:
+            buffer = RingBuffer(self.capacity)
+            self._metrics[name] = buffer
+        buffer.append(value)
+
+    #adds amount to the specified counter
+    def increment(self, name: str, amount: int = 1):
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    #records a frame: its measured interval and the interval it was scheduled for
+    #(both in milliseconds), and counts any frames dropped before it
+    #if vehicleFrame is True, the frame is recorded under the VEHICLE_ names
+    def recordFrame(self, interval: float, expectedInterval: float, vehicleFrame: bool = False):
+        if vehicleFrame:
+            intervalName, latenessName = self.VEHICLE_FRAME_INTERVAL, self.VEHICLE_LATENESS
+            framesName, droppedFramesName = self.VEHICLE_FRAMES, self.VEHICLE_DROPPED_FRAMES
+        else:
+            intervalName, latenessName = self.FRAME_INTERVAL, self.LATENESS
+            framesName, droppedFramesName = self.FRAMES, self.DROPPED_FRAMES
+
+        self.record(intervalName, interval)
+        self.record(latenessName, interval - expectedInterval)
+        self.increment(framesName)
+
+        #every whole interval that passed beyond the first is a frame that never ran
+        if expectedInterval > 0 and interval >= expectedInterval * 2:
+            self.increment(droppedFramesName, int(interval // expectedInterval) - 1)
+
+
+    #returns the recorded values of a metric, oldest first
+    #returns an empty list if nothing has been recorded for it
+    def getValues(self, name: str) -> List[float]:
+        buffer = self._metrics.get(name)
+        if buffer == None:
+            return []
+        return buffer.getValues()
+
+    #returns the value of a counter (0 if it was never incremented)
+    def getCount(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    #returns a summary of the recorded values of a metric as a dict with keys
+    #count, min, mean, max, and one key per percentile (p50, p90, p99)
+    #returns None if nothing has been recorded for the metric
+    def getSummary(self, name: str) -> Dict[str, float]:
+        values = sorted(self.getValues(name))
+        if len(values) == 0:
+            return None
+
+        summary = {
+            "count": len(values),
+            "min": values[0],
+            "mean": sum(values) / len(values),
+            "max": values[-1]
+            }
+        for percent in self.SUMMARY_PERCENTILES:
+            summary[f"p{percent}"] = getPercentile(values, percent)
+        return summary
+
+    #returns a dict with a summary of every metric (see getSummary)
+    #under "metrics" and the value of every counter under "counters"
+    def stats(self) -> dict:
+        return {
+            "metrics": {name: self.getSummary(name) for name in self._metrics},
+            "counters": dict(self._counters)
+            }
+
+    #removes every recorded value and resets every counter
+    def clear(self):
+        self._metrics.clear()
+        self._counters.clear()
+
+#end FrameStats
+
+
+#the FrameStats shared by everything in the simulation, or None if disabled
+_globalStats: FrameStats = None
+
+#enables the shared FrameStats, creating them if needed, and returns them
+#capacity is only used if the stats don't exist yet
+def enableGlobalStats(capacity: int = None) -> FrameStats:
+    global _globalStats
+    if _globalStats == None:
+        _globalStats = FrameStats(capacity)
+    return _globalStats
+
+#disables the shared FrameStats; recorded values are discarded
+def disableGlobalStats():
+    global _globalStats
+    _globalStats = None
+
+#returns the shared FrameStats, or None if they are not enabled
+#instrumented code checks this before timing anything, so
+#nothing is measured while the stats are disabled
+def getGlobalStats() -> FrameStats:
+    return _globalStats
+
+#decorator that records the time spent in the decorated function
+#in the specified metric of the shared FrameStats
+#while the shared stats are disabled, the function is called without timing it
+def recordGlobalTime(metricName: str):
+    from functools import wraps
+    from time import perf_counter
+
+    def decorator(function):
+        @wraps(function)
+        def timedFunction(*args, **kwargs):
+            stats = _globalStats
+            if stats == None:
+                return function(*args, **kwargs)
+
+            startTime = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.record(metricName, (perf_counter() - startTime) * 1000)
+        return timedFunction
+    return decorator
+
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
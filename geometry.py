@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+from typing import Tuple
+
+#Geometry
+#Definitions for rectangular things that don't depend on tkinter
+#These can be used by the headless simulation core (see sim_core.py)
+#as well as by widgets; position_reporter.py imports them from here
+
+#Position Reporter Interface
+#An "interface" (implemented as an abstract class) 
+#for rectangular things to report their current position and dimensions
+#Descriptions of the expected behavior of each method can be found
+#in the concrete PositionReporter definition
+class PositionReporterInterface:
+
+    _ERROR_MESSAGE_TEXT = "PositionReporterInterface is abstract and does not provide concrete method definitions"
+
+    def getPos(self) -> Tuple[int, int]:
+        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
+
+    def getDimensions(self) -> Tuple[int, int]:
+        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
+
+    def getCorners(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
+
+
+#Rectangle
+#A class that stores an origin and dimensions
+#and exposes them using the PositionReporterInterface
+class Rectangle(PositionReporterInterface):
+
+    def __init__(self,
+        originX: int or float,
+        originY: int or float,
+        width: int or float,
+        height: int or float
+        ):
+
+        self.originX = originX
+        self.originY = originY
+        self.width = width
+        self.height = height
+
+    #return the origin coordinates
+    def getPos(self) -> Tuple[int, int]:
+        return (self.originX, self.originY)
+
+    #return the dimensions
+    def getDimensions(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    #return two 2-tuples representing the coordinates
+    #of the top left and bottom right corners of this rectangle
+    def getCorners(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        
+        #top left corner is just the origin coordinates
+        cornerTL = (self.originX, self.originY)
+
+        #bottom right corner is origin coordinates
+        #offset by the width and height
+        cornerBR = (self.originX + self.width, self.originY + self.height)
+
+        return (cornerTL, cornerBR)
+
+    def __str__(self):
+        return f"({repr(self.originX)}, {repr(self.originY)}, {repr(self.width)}, {repr(self.height)})"
+
+    def __repr__(self):
+        return "Rectangle"+self.__str__()
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Callable, Iterator, List, Tuple
+
+
+#LampState
+#A mixin class that keeps the state of a traffic light's lamps in Python
+#The state is a bitmask with one bit per lamp (see LAMP_BITS), so reading it
+#never involves tkinter. Classes that draw the lamps (TrafficLight, or the
+#lights drawn by WorldCanvas) override _onLampStateChanged to find out when
+#to redraw, and use getChangedLamps to redraw only the lamps that changed
+class LampState():
+
+    #define which lamp names exist
+    #these are ordered from top to bottom
+    LAMP_NAMES = ("red", "yellow", "green")
+
+    #define the bit used for each lamp in the lamp state bitmask
+    #the first lamp is the lowest bit
+    LAMP_BITS = {lampName: 1 << index for index, lampName in enumerate(LAMP_NAMES)}
+
+    #override constructor to make LampState a mixin class
+    #all lamps start turned off
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lampState = 0
+
+        #list of functions to call when the lamp state changes
+        #each is called with this object as the only argument
+        self._lampListeners: List[Callable[[LampState], None]] = []
+
+
+    #returns the state of the lamps as a bitmask
+    #each lamp that is on has its bit (from LAMP_BITS) set
+    def getLampState(self) -> int:
+        return self._lampState
+
+    #sets the state of the lamps from a bitmask (see getLampState)
+    def setLampState(self, lampState: int):
+        if lampState == self._lampState:
+            return
+        self._lampState = lampState
+        self._onLampStateChanged()
+        for listener in self._lampListeners:
+            listener(self)
+
+    #adds a function to be called (with this object) each time the lamp state
+    #changes, whichever method changed it (e.g. setActiveLamp or turnLampOn)
+    def addLampListener(self, listener: Callable[[LampState], None]):
+        self._lampListeners.append(listener)
+
+    #removes a function added with addLampListener
+    def removeLampListener(self, listener: Callable[[LampState], None]):
+        self._lampListeners.remove(listener)
+
+    #internal method
+    #called whenever the lamp state changes
+    #override this to redraw the lamps
+    def _onLampStateChanged(self):
+        pass
+
+    #given the lamp state that is currently drawn, yields a 2-tuple
+    #(lampName, isOn) for each lamp whose state differs from it
+    def getChangedLamps(self, drawnLampState: int) -> Iterator[Tuple[str, bool]]:
+        changedBits = self._lampState ^ drawnLampState
+        if changedBits == 0:
+            return
+        for lampName, lampBit in self.LAMP_BITS.items():
+            if changedBits & lampBit:
+                yield (lampName, (self._lampState & lampBit) != 0)
+
+
+    #given a lamp color ("red", "yellow", or "green"),
+    #"turns the lamp on" by setting its bit in the lamp state
+    def turnLampOn(self, lampColor):
+        self.setLampState(self._lampState | self.LAMP_BITS[lampColor])
+
+
+    #similar to self.turnLampOn, but turns the lamp off
+    def turnLampOff(self, lampColor):
+        self.setLampState(self._lampState & ~self.LAMP_BITS[lampColor])
+
+
+    #returns True if the selected lamp is currently
+    #turned on, False if it is turned off
+    #this reads the lamp state, not the canvas, so it doesn't call into Tcl
+    def isLampOn(self, lampColor):
+        return (self._lampState & self.LAMP_BITS[lampColor]) != 0
+
+
+    #returns an iterator of lamp names ("red", "yellow", "green")
+    #"containing" the names of every lamp that is currently turned on
+    #if asList is true, returns a list rather than an iterator
+    def getActiveLamps(self, asList = False):
+        activeLampsIterator = filter(self.isLampOn, self.LAMP_NAMES)
+        if not asList:
+            return activeLampsIterator
+        else:
+            return list(activeLampsIterator)
+
+
+    #turns the selected lamp on, and also
+    #turns all other lamps off
+    #if lampColor is None, all lamps are turned off
+    def setActiveLamp(self, lampColor = None):
+        if lampColor == None:
+            self.setLampState(0)
+        else:
+            self.setLampState(self.LAMP_BITS[lampColor])
+
+
+    #returns the name of the lamp that is directly
+    #after the currently active lamp (ordering top to bottom)
+    #if no lamps are active, returns the first lamp
+    #if the last lamp is active, returns None
+    #if multiple lamps are active, only the first is considered
+    def getNextLamp(self):
+         #get a list of all currently active lamps
+        activeLamps = self.getActiveLamps(asList=True)
+
+        #if no lamps are active, return the first lamp
+        if len(activeLamps) == 0:
+            return self.LAMP_NAMES[0]
+        else:
+            #if at least one lamp is active, treat the first
+            #active lamp as the only active lamp
+            activeLamp = activeLamps[0]
+
+            #if the active lamp is the last lamp,
+            #return None
+            if activeLamp == self.LAMP_NAMES[-1]:
+                return None
+
+            #otherwise, find the currently active lamp's index,
+            #add 1, then turn that lamp's name
+            else:
+                lampIndex = self.LAMP_NAMES.index(activeLamp)
+                nextLamp = self.LAMP_NAMES[lampIndex + 1]
+                return nextLamp
+
+
+    #increments the state of this traffic light
+    #that is, turns the current lamp off and
+    #turns the next lamp on ("next lamp" being defined
+    # by the self.getNextLamp function)
+    def incrementState(self):
+        nextLamp = self.getNextLamp()
+        self.setActiveLamp(nextLamp)
+
+#end LampState
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
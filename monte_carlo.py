@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+from lamp_state import LampState
+from sim_core import SimVehicle, SimWorld
+if TYPE_CHECKING:
+    from signal_controller import SignalController
+    from telemetry import TelemetrySink
+
+
+#Monte Carlo
+#Runs the same intersection many times with different random arrivals, to
+#compare signal timings without opening a window per run
+#A Scenario is a headless version of the intersection shown by PrimaryFrame
+#(or of a row of them): crossing roads, a stream of vehicles arriving at
+#random on each, and a SignalController running a light for each stream. Nothing here uses tkinter,
+#so Scenarios can run in worker processes; runScenarios fans them out over
+#a ProcessPoolExecutor and yields each run's summary as soon as it completes
+#All randomness comes from a random.Random seeded with the Scenario's seed,
+#and time only advances in fixed steps, so a Scenario run twice with the
+#same seed produces exactly the same summary (apart from runTime)
+#Run this file to run a batch from the command line; see main
+
+
+#internal class
+#one stream of vehicles: the vehicles that enter a road at one end,
+#stop at the light before each intersection if it isn't green, and leave
+#the road at the other end
+class _Approach():
+
+    def __init__(self, name: str, axis: int, startPos: float, stopPositions: List[float], endPos: float, crossPos: float):
+        self.name = name
+
+        #the axis the vehicles drive along; 0 for x, 1 for y
+        self.axis = axis
+
+        #positions (of each vehicle's origin) along the axis where vehicles
+        #enter and leave the road
+        self.startPos = startPos
+        self.endPos = endPos
+
+        #position of each vehicle's origin on the other axis
+        self.crossPos = crossPos
+
+        #list of 2-tuples (stopPos, light), one for each intersection on
+        #the road in the order vehicles reach them; stopPos is where
+        #vehicles wait while light isn't green
+        self.stops: List[Tuple[float, LampState]] = [(stopPos, LampState()) for stopPos in stopPositions]
+
+        #vehicles on the road, from front to back
+        self.vehicles: List[SimVehicle] = []
+
+        #dict that associates each vehicle with the time it arrived
+        self.arrivalTimes: Dict[SimVehicle, float] = {}
+
+        #times of the arrivals that couldn't enter yet because the
+        #end of the road was occupied, oldest first
+        self.waitingArrivals: List[float] = []
+
+        #the time of the next arrival
+        self.nextArrivalTime: float = None
+
+    #returns the position of a vehicle along this approach's axis
+    def getPos(self, vehicle: SimVehicle) -> float:
+        return vehicle.originX if self.axis == 0 else vehicle.originY
+
+    #returns the 2-tuple (x, y) of the specified position along the axis
+    def getCoords(self, pos: float) -> Tuple[float, float]:
+        return (pos, self.crossPos) if self.axis == 0 else (self.crossPos, pos)
+
+    #returns the stop position of the next intersection a vehicle at the
+    #specified position reaches, if its light isn't green, or None if
+    #nothing stops the vehicle before the end of the road
+    def getStopLimit(self, pos: float) -> float:
+        for stopPos, light in self.stops:
+            if pos <= stopPos:
+                return None if light.isLampOn("green") else stopPos
+        return None
+
+#end _Approach
+
+
+#Scenario
+#The settings of one headless run, and the code that runs it
+#Times are in seconds, except for the signal timings, which are in
+#milliseconds like those of CyclePlan; distances are in pixels
+#The scenario is a horizontal road crossed by intersectionCount vertical
+#roads; vehicles drive east along the horizontal road and south along
+#each vertical road. At each intersection, the eastbound light is green for
+#greenTime and the southbound light for crossingGreenTime (by default the
+#same), each followed by yellowTime; each light is red while the other one
+#is green or yellow. intersectionOffset (in milliseconds) delays the cycle
+#of each intersection relative to the one before it, the same way as
+#RoadNetwork's intersectionOffset
+#arrivalRate is the mean number of vehicles arriving per second on the
+#horizontal road, and crossingArrivalRate (by default the same) on each
+#vertical road
+class Scenario():
+
+    #layout of the intersections; with one intersection, this
+    #matches the size of PrimaryFrame (600 pixels square)
+    ROAD_WIDTH = 60
+    BLOCK_SIZE = 270
+
+    #size of each vehicle, and the gap kept between queued vehicles
+    VEHICLE_SIZE = 20
+    VEHICLE_GAP = 5
+
+    DEFAULT_DURATION = 300
+    DEFAULT_TIME_STEP = 0.02
+    DEFAULT_ARRIVAL_RATE = 0.15
+    DEFAULT_GREEN_TIME = 5000
+    DEFAULT_YELLOW_TIME = 2000
+
+    def __init__(self,
+        seed: int,
+        duration: float = None,
+        timeStep: float = None,
+        arrivalRate: float = None,
+        greenTime: int = None,
+        yellowTime: int = None,
+        speed: float = None,
+        crossingGreenTime: int = None,
+        crossingArrivalRate: float = None,
+        intersectionCount: int = 1,
+        intersectionOffset: int = 0
+        ):
+
+        self.seed = seed
+        self.duration = duration if duration != None else self.DEFAULT_DURATION
+        self.timeStep = timeStep if timeStep != None else self.DEFAULT_TIME_STEP
+        self.arrivalRate = arrivalRate if arrivalRate != None else self.DEFAULT_ARRIVAL_RATE
+        self.greenTime = greenTime if greenTime != None else self.DEFAULT_GREEN_TIME
+        self.yellowTime = yellowTime if yellowTime != None else self.DEFAULT_YELLOW_TIME
+        self.speed = speed if speed != None else SimVehicle.DEFAULT_SPEED
+        self.crossingGreenTime = crossingGreenTime if crossingGreenTime != None else self.greenTime
+        self.crossingArrivalRate = crossingArrivalRate if crossingArrivalRate != None else self.arrivalRate
+        self.intersectionCount = intersectionCount
+        self.intersectionOffset = intersectionOffset
+
+        if self.timeStep <= 0 or self.duration <= 0:
+            errMsg = f"Duration and time step must be greater than zero ({self.duration}, {self.timeStep})"
+            raise ValueError(errMsg)
+        if self.arrivalRate <= 0 or self.crossingArrivalRate <= 0:
+            errMsg = f"Arrival rates must be greater than zero ({self.arrivalRate}, {self.crossingArrivalRate})"
+            raise ValueError(errMsg)
+        if self.intersectionCount < 1:
+            errMsg = f"A Scenario needs at least one intersection ({repr(self.intersectionCount)})"
+            raise ValueError(errMsg)
+
+    #returns a copy of this Scenario with a different seed
+    def withSeed(self, seed: int) -> Scenario:
+        from copy import copy
+
+        scenario = copy(self)
+        scenario.seed = seed
+        return scenario
+
+    #returns a copy of this Scenario with the specified settings
+    #(any of the constructor's arguments) changed
+    def withSettings(self, **settings) -> Scenario:
+        newSettings = self.getSettings()
+        newSettings.update(settings)
+        return Scenario(**newSettings)
+
+    #returns a dict of this Scenario's settings
+    def getSettings(self) -> dict:
+        return {
+            "seed": self.seed,
+            "duration": self.duration,
+            "timeStep": self.timeStep,
+            "arrivalRate": self.arrivalRate,
+            "greenTime": self.greenTime,
+            "yellowTime": self.yellowTime,
+            "speed": self.speed,
+            "crossingGreenTime": self.crossingGreenTime,
+            "crossingArrivalRate": self.crossingArrivalRate,
+            "intersectionCount": self.intersectionCount,
+            "intersectionOffset": self.intersectionOffset
+            }
+
+    #returns the length of the signal cycle in milliseconds
+    def getCycleLength(self) -> int:
+        return self.greenTime + self.crossingGreenTime + 2 * self.yellowTime
+
+    #returns the length of the horizontal road
+    #(the vertical roads are always 2 blocks and one road width long)
+    def getRoadLength(self) -> int:
+        return self.intersectionCount * self.ROAD_WIDTH + (self.intersectionCount + 1) * self.BLOCK_SIZE
+
+    #returns the position of the vertical road with the specified index along the
+    #horizontal road; this matches RoadNetwork.getRoadPos
+    def getRoadPos(self, index: int) -> int:
+        return self.BLOCK_SIZE + index * (self.ROAD_WIDTH + self.BLOCK_SIZE)
+
+    def __repr__(self):
+        settings = ", ".join(f"{name}={repr(value)}" for name, value in self.getSettings().items())
+        return f"Scenario({settings})"
+
+
+    #internal method
+    #creates the roads of the scenario in world and returns its approaches:
+    #eastbound vehicles on the horizontal road first, then southbound
+    #vehicles on each vertical road
+    #the lights of every approach are added to controller
+    def _createApproaches(self, world: SimWorld, controller: SignalController) -> List[_Approach]:
+        from signal_controller import CyclePlan, SignalPhase
+
+        horizontalLength = self.getRoadLength()
+        verticalLength = 2 * self.BLOCK_SIZE + self.ROAD_WIDTH
+        horizontalPos = self.BLOCK_SIZE
+        laneOffset = (self.ROAD_WIDTH - self.VEHICLE_SIZE) / 2
+
+        world.addRoad(0, horizontalPos, horizontalLength, self.ROAD_WIDTH, horizontal=True)
+        for index in range(self.intersectionCount):
+            world.addRoad(self.getRoadPos(index), 0, self.ROAD_WIDTH, verticalLength, horizontal=False)
+
+        #vehicles enter just before the start of their road, wait with their
+        #front at the edge of each intersection, and leave once past the end
+        startPos = -self.VEHICLE_SIZE
+        eastbound = _Approach(
+            "eastbound", 0, startPos,
+            [self.getRoadPos(index) - self.VEHICLE_SIZE for index in range(self.intersectionCount)],
+            horizontalLength,
+            horizontalPos + laneOffset
+            )
+        southbound = [
+            _Approach(
+                f"southbound{index}", 1, startPos,
+                [horizontalPos - self.VEHICLE_SIZE],
+                verticalLength,
+                self.getRoadPos(index) + laneOffset
+                )
+            for index in range(self.intersectionCount)
+            ]
+
+        #the southbound light of each intersection turns green
+        #when the eastbound light turns red
+        plan = CyclePlan([
+            SignalPhase("green", self.greenTime),
+            SignalPhase("yellow", self.yellowTime),
+            SignalPhase("red", self.crossingGreenTime + self.yellowTime)
+            ])
+        crossingPlan = CyclePlan([
+            SignalPhase("green", self.crossingGreenTime),
+            SignalPhase("yellow", self.yellowTime),
+            SignalPhase("red", self.greenTime + self.yellowTime)
+            ], self.greenTime + self.yellowTime)
+        for index in range(self.intersectionCount):
+            offset = index * self.intersectionOffset
+            controller.addLight(eastbound.stops[index][1], plan, offset)
+            controller.addLight(southbound[index].stops[0][1], crossingPlan, offset)
+
+        return [eastbound] + southbound
+
+    #runs the scenario and returns a summary of the run as a dict
+    #(see the end of this method for its keys); delays are in seconds
+    #if telemetrySink is provided, the telemetry of every step (see
+    #telemetry.py) is written to it as the run goes; each vehicle's lane is
+    #the name of its approach, as is the lane of the light it stops at
+    def run(self, telemetrySink: TelemetrySink = None) -> dict:
+        from random import Random
+        from time import perf_counter
+        from signal_controller import SignalController
+        from telemetry import TelemetrySource
+        from frame_stats import getPercentile
+
+        runStartTime = perf_counter()
+        random = Random(self.seed)
+
+        world = SimWorld()
+        controller = SignalController()
+        approaches = self._createApproaches(world, controller)
+
+        telemetry = None
+        if telemetrySink != None:
+            telemetry = TelemetrySource()
+            for approach in approaches:
+                for stopPos, light in approach.stops:
+                    telemetry.addTrafficLight(light, approach.name, *approach.getCoords(stopPos))
+
+        #the first approach is the eastbound one
+        arrivalRates = {approach: self.crossingArrivalRate for approach in approaches}
+        arrivalRates[approaches[0]] = self.arrivalRate
+        for approach in approaches:
+            approach.nextArrivalTime = random.expovariate(arrivalRates[approach])
+
+        spacing = self.VEHICLE_SIZE + self.VEHICLE_GAP
+        delays: List[float] = []
+        arrivalCount = 0
+        maxQueueLength = 0
+
+        stepCount = int(round(self.duration / self.timeStep))
+        previousTimeMs = 0
+        for stepIndex in range(stepCount):
+            #time is calculated from the step index rather than
+            #accumulated, so it has no rounding drift
+            time = stepIndex * self.timeStep
+            #the controller carries over time that doesn't make up a whole
+            #tick of its own, so it is advanced by the time since the last step
+            timeMs = int(round(time * 1000))
+            controller.advance(timeMs - previousTimeMs)
+            previousTimeMs = timeMs
+
+            queueLength = 0
+            for approach in approaches:
+
+                #record the arrivals that are due
+                while approach.nextArrivalTime <= time:
+                    approach.waitingArrivals.append(approach.nextArrivalTime)
+                    approach.nextArrivalTime += random.expovariate(arrivalRates[approach])
+                    arrivalCount += 1
+
+                #let the oldest waiting arrival enter if the start of the road is clear
+                if len(approach.waitingArrivals) > 0:
+                    if len(approach.vehicles) == 0 or approach.getPos(approach.vehicles[-1]) >= approach.startPos + spacing:
+                        startX, startY = approach.getCoords(approach.startPos)
+                        vehicle = world.addVehicle(startX, startY, self.VEHICLE_SIZE, self.VEHICLE_SIZE, self.speed)
+                        approach.vehicles.append(vehicle)
+                        approach.arrivalTimes[vehicle] = approach.waitingArrivals.pop(0)
+                        if telemetry != None:
+                            telemetry.addVehicle(vehicle, approach.name)
+                queueLength += len(approach.waitingArrivals)
+
+                #drive each vehicle as far as it may go: no further than the vehicle
+                #ahead of it allows, and no further than the next stop line
+                #unless its light is green
+                limit = approach.endPos
+                for vehicle in approach.vehicles:
+                    pos = approach.getPos(vehicle)
+                    vehicleLimit = limit
+                    stopLimit = approach.getStopLimit(pos)
+                    if stopLimit != None:
+                        vehicleLimit = min(vehicleLimit, stopLimit)
+                    if vehicleLimit - pos < self.speed * self.timeStep / 2:
+                        queueLength += 1
+                    vehicle.abortDrive()
+                    vehicle.driveToPos(*approach.getCoords(max(pos, vehicleLimit)))
+                    limit = pos - spacing
+
+            maxQueueLength = max(maxQueueLength, queueLength)
+            world.step(self.timeStep)
+
+            exitTime = time + self.timeStep
+            if telemetry != None:
+                telemetrySink.writeRows(telemetry.iterRows(stepIndex + 1, exitTime))
+
+            #remove the vehicles that reached the end of their road
+            #only the front vehicle can have reached it first
+            for approach in approaches:
+                while len(approach.vehicles) > 0 and approach.getPos(approach.vehicles[0]) >= approach.endPos:
+                    vehicle = approach.vehicles.pop(0)
+                    world.removeBody(vehicle)
+                    if telemetry != None:
+                        telemetry.removeVehicle(vehicle)
+                    freeFlowTime = (approach.endPos - approach.startPos) / self.speed
+                    delays.append(exitTime - approach.arrivalTimes.pop(vehicle) - freeFlowTime)
+
+        sortedDelays = sorted(delays)
+        completedCount = len(delays)
+        return {
+            "seed": self.seed,
+            #number of vehicles that arrived, and the number that got through
+            "arrivals": arrivalCount,
+            "completed": completedCount,
+            #completed vehicles per minute of simulated time
+            "throughput": completedCount * 60 / self.duration,
+            #time lost to the lights and to queueing, per completed vehicle
+            "meanDelay": sum(delays) / completedCount if completedCount > 0 else None,
+            "p90Delay": getPercentile(sortedDelays, 90),
+            "maxDelay": sortedDelays[-1] if completedCount > 0 else None,
+            #the most vehicles stopped or waiting to enter at once
+            "maxQueueLength": maxQueueLength,
+            #wall clock time of the run in seconds; this is the
+            #only value that differs between runs of the same seed
+            "runTime": perf_counter() - runStartTime
+            }
+
+#end Scenario
+
+
+#runs a Scenario and returns its summary
+#this is the function that runs in each worker process
+#if telemetryPath is provided, the run's telemetry is written to it (see
+#openTelemetrySink in telemetry.py); "{seed}" in the path is replaced
+#with the seed of the Scenario, so each run can have its own file
+def runScenario(scenario: Scenario, telemetryPath: str = None) -> dict:
+    from telemetry import openTelemetrySink
+
+    if telemetryPath == None:
+        return scenario.run()
+    with openTelemetrySink(telemetryPath.replace("{seed}", str(scenario.seed))) as telemetrySink:
+        return scenario.run(telemetrySink)
+
+#runs each of the given Scenarios and yields their summaries as they complete,
+#which is not necessarily the order the Scenarios were given in
+#(each summary includes the seed of its Scenario)
+#the Scenarios run in a ProcessPoolExecutor with maxWorkers processes
+#(by default, one per CPU); each run is independent and only its Scenario and
+#summary are sent between processes, so throughput scales with the workers
+#if maxWorkers is 1, the Scenarios run one at a time in this process instead
+#telemetryPath is passed on to runScenario
+def runScenarios(scenarios: Iterable[Scenario], maxWorkers: int = None, telemetryPath: str = None) -> Iterator[dict]:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if maxWorkers == 1:
+        for scenario in scenarios:
+            yield runScenario(scenario, telemetryPath)
+        return
+
+    executor = ProcessPoolExecutor(maxWorkers)
+    try:
+        futures = [executor.submit(runScenario, scenario, telemetryPath) for scenario in scenarios]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        #if the caller stops early, the runs that haven't started are dropped
+        executor.shutdown(wait=True, cancel_futures=True)
+
+#runs the given Scenario once for each seed (see runScenarios)
+def runSeeds(scenario: Scenario, seeds: Iterable[int], maxWorkers: int = None, telemetryPath: str = None) -> Iterator[dict]:
+    return runScenarios((scenario.withSeed(seed) for seed in seeds), maxWorkers, telemetryPath)
+
+#given a list of run summaries, returns a dict that associates each metric
+#with a dict of its mean, p50, p90, and max over the runs
+#runs that have no value for a metric (e.g. no vehicle completed) are left out of it
+def summarizeRuns(summaries: List[dict]) -> Dict[str, Dict[str, float]]:
+    from frame_stats import getPercentile
+
+    aggregate = {}
+    for metric in ("completed", "throughput", "meanDelay", "p90Delay", "maxDelay", "maxQueueLength"):
+        values = sorted(summary[metric] for summary in summaries if summary[metric] != None)
+        if len(values) == 0:
+            continue
+        aggregate[metric] = {
+            "mean": sum(values) / len(values),
+            "p50": getPercentile(values, 50),
+            "p90": getPercentile(values, 90),
+            "max": values[-1]
+            }
+    return aggregate
+
+
+#internal function
+#formats a number for printing; None is printed as "-"
+def _formatValue(value) -> str:
+    if value == None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+#parses command line arguments and runs a batch of seeded Scenarios,
+#printing each run's summary as it completes and the aggregate at the end
+def main(args: List[str] = None):
+    import json
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description="Runs a headless intersection many times with different random arrivals")
+    parser.add_argument("--runs", type=int, default=100,
+        help="number of runs (default: 100)")
+    parser.add_argument("--seed", type=int, default=0,
+        help="seed of the first run; each run uses the next seed (default: 0)")
+    parser.add_argument("--workers", type=int, default=None,
+        help="number of worker processes (default: one per CPU; 1 runs in this process)")
+    parser.add_argument("--duration", type=float, default=Scenario.DEFAULT_DURATION,
+        help=f"simulated seconds per run (default: {Scenario.DEFAULT_DURATION})")
+    parser.add_argument("--time-step", type=float, default=Scenario.DEFAULT_TIME_STEP, dest="timeStep",
+        help=f"simulated seconds per step (default: {Scenario.DEFAULT_TIME_STEP})")
+    parser.add_argument("--arrival-rate", type=float, default=Scenario.DEFAULT_ARRIVAL_RATE, dest="arrivalRate",
+        help=f"vehicles per second arriving on each road (default: {Scenario.DEFAULT_ARRIVAL_RATE})")
+    parser.add_argument("--green", type=int, default=Scenario.DEFAULT_GREEN_TIME, dest="greenTime",
+        help=f"green time in milliseconds (default: {Scenario.DEFAULT_GREEN_TIME})")
+    parser.add_argument("--yellow", type=int, default=Scenario.DEFAULT_YELLOW_TIME, dest="yellowTime",
+        help=f"yellow time in milliseconds (default: {Scenario.DEFAULT_YELLOW_TIME})")
+    parser.add_argument("--crossing-green", type=int, default=None, dest="crossingGreenTime",
+        help="green time of the crossing roads in milliseconds (default: same as --green)")
+    parser.add_argument("--crossing-arrival-rate", type=float, default=None, dest="crossingArrivalRate",
+        help="vehicles per second arriving on each crossing road (default: same as --arrival-rate)")
+    parser.add_argument("--intersections", type=int, default=1, dest="intersectionCount",
+        help="number of intersections along the main road (default: 1)")
+    parser.add_argument("--offset", type=int, default=0, dest="intersectionOffset",
+        help="delay of each intersection's cycle after the previous one, in milliseconds (default: 0)")
+    parser.add_argument("--json", metavar="PATH", dest="jsonPath",
+        help="save the settings, every run's summary, and the aggregate to a JSON file")
+    parser.add_argument("--telemetry", metavar="PATH", dest="telemetryPath",
+        help="write every step of each run to PATH, with {seed} replaced by the run's seed; "
+            "CSV if PATH ends in .csv or .csv.gz, compressed columnar chunks otherwise")
+    options = parser.parse_args(args)
+    if options.telemetryPath != None and options.runs > 1 and "{seed}" not in options.telemetryPath:
+        parser.error("--telemetry needs {seed} in the path when there is more than one run")
+
+    scenario = Scenario(
+        options.seed,
+        duration=options.duration,
+        timeStep=options.timeStep,
+        arrivalRate=options.arrivalRate,
+        greenTime=options.greenTime,
+        yellowTime=options.yellowTime,
+        crossingGreenTime=options.crossingGreenTime,
+        crossingArrivalRate=options.crossingArrivalRate,
+        intersectionCount=options.intersectionCount,
+        intersectionOffset=options.intersectionOffset
+        )
+
+    columns = ("seed", "arrivals", "completed", "throughput", "meanDelay", "p90Delay", "maxDelay", "maxQueueLength")
+    print("  ".join(f"{column:>14}" for column in columns))
+
+    startTime = perf_counter()
+    summaries = []
+    seeds = range(options.seed, options.seed + options.runs)
+    for summary in runSeeds(scenario, seeds, options.workers, options.telemetryPath):
+        summaries.append(summary)
+        print("  ".join(f"{_formatValue(summary[column]):>14}" for column in columns), flush=True)
+    elapsed = perf_counter() - startTime
+
+    aggregate = summarizeRuns(summaries)
+    print()
+    print(f"{len(summaries)} runs in {elapsed:.2f} s ({len(summaries) / elapsed:.2f} runs/sec)")
+    for metric, values in aggregate.items():
+        print(f"{metric:>14}  " + "  ".join(f"{name} {_formatValue(value)}" for name, value in values.items()))
+
+    if options.jsonPath != None:
+        settings = scenario.getSettings()
+        del settings["seed"]
+        settings["seeds"] = [seeds.start, seeds.stop]
+        with open(options.jsonPath, "w") as jsonFile:
+            json.dump({
+                "settings": settings,
+                "runs": sorted(summaries, key=lambda summary: summary["seed"]),
+                "aggregate": aggregate
+                }, jsonFile, indent=2)
+        print(f"Results saved to {options.jsonPath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from collision import Collision
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple
 
 from proportional_bb import ProportionalBB
 if TYPE_CHECKING:
@@ -21,6 +21,11 @@ class PartialCollision(Collision):
     #define the default active area bounds
     DEFAULT_ACTIVE_START = 0.0
     DEFAULT_ACTIVE_END = 1.0
+
+    #the maximum number of results kept by the collision area cache
+    #once this is reached the cache is emptied; moving Colliders report
+    #new ranges every frame, so old entries would rarely be hit again
+    MAX_CACHED_AREAS = 16
     
 
     #override constructor
@@ -32,27 +37,64 @@ class PartialCollision(Collision):
         #init the active area bound vars
         #each Collider needs a ProportionalBB
         #to store the bounding box of its active area
-        self.collisionSourceActiveArea = ProportionalBB(
+        #both start with the same bounds, so they are created together
+        #with createMany, which only validates those bounds once
+        defaultBounds = (
             self.DEFAULT_ACTIVE_START,
             self.DEFAULT_ACTIVE_END,
             self.DEFAULT_ACTIVE_START,
             self.DEFAULT_ACTIVE_END
             )
+        self.collisionSourceActiveArea, self.collidedWithActiveArea = ProportionalBB.createMany((defaultBounds, defaultBounds))
 
-        self.collidedWithActiveArea = ProportionalBB(
-            self.DEFAULT_ACTIVE_START,
-            self.DEFAULT_ACTIVE_END,
-            self.DEFAULT_ACTIVE_START,
-            self.DEFAULT_ACTIVE_END
-            )
+        #init the collision area cache
+        #this associates the dimension ranges of both Colliders
+        #with the collision area calculated from them
+        #the cached areas are only valid for the active areas (and their versions)
+        #recorded in _activeAreaStamp; the cache is emptied when that changes
+        self._collisionAreaCache: Dict[Tuple, Tuple[int, int, int, int]] = {}
+        self._activeAreaStamp = None
 
     #override collision area calculation
     #to only include active areas for each Collider
+    #results are cached by the ranges of both Colliders, so asking again
+    #before either Collider moves (or either active area changes) is a dict lookup
     def getCollisionArea(self) -> Tuple[int, int, int, int]:
         #get the ranges that both objects cover
         srcRanges = self.collisionSource.getDimensionRanges()
         objRanges = self.collidedWith.getDimensionRanges()
 
+        #empty the cache if either active area was replaced or had a bound set
+        srcActiveArea = self.collisionSourceActiveArea
+        objActiveArea = self.collidedWithActiveArea
+        activeAreaStamp = (
+            srcActiveArea, srcActiveArea.getVersion(),
+            objActiveArea, objActiveArea.getVersion()
+            )
+        if activeAreaStamp != self._activeAreaStamp:
+            self._collisionAreaCache.clear()
+            self._activeAreaStamp = activeAreaStamp
+
+        #return the cached result if there is one
+        #None is a valid result (no collision), so a missing
+        #entry is detected with a membership check instead
+        cacheKey = (srcRanges, objRanges)
+        if cacheKey in self._collisionAreaCache:
+            return self._collisionAreaCache[cacheKey]
+
+        collisionArea = self._calculateCollisionArea(srcRanges, objRanges)
+
+        if len(self._collisionAreaCache) >= self.MAX_CACHED_AREAS:
+            self._collisionAreaCache.clear()
+        self._collisionAreaCache[cacheKey] = collisionArea
+
+        return collisionArea
+
+    #internal method
+    #calculates the collision area of the active areas of both Colliders
+    #given the dimension ranges of both Colliders
+    def _calculateCollisionArea(self, srcRanges, objRanges) -> Tuple[int, int, int, int]:
+
         #use the ProportionalBB of each Collider to get the
         #active area for collision
         srcActiveRanges = self.collisionSourceActiveArea.calculateDimensionRanges(*srcRanges[0], *srcRanges[1])
@@ -2,31 +2,15 @@
 
 from typing import Tuple
 from tkinter import Misc as BaseTkObject
+#PositionReporterInterface and Rectangle don't depend on tkinter, so they are
+#defined in geometry.py; they are imported here so existing imports keep working
+from geometry import PositionReporterInterface, Rectangle
 #I import tkinter.Misc as BaseTkObject to be more representative of what it is;
 #This is a personal preference and is by no means required
 #(you may consider this bad form as there is another class
 # in tkinter called BaseWidget already; as it happens that class
 # already inherits )
 
-#Position Reporter Interface
-#An "interface" (implemented as an abstract class) 
-#for rectangular things to report their current position and dimensions
-#Descriptions of the expected behavior of each method can be found
-#in the concrete PositionReporter definition
-class PositionReporterInterface:
-
-    _ERROR_MESSAGE_TEXT = "PositionReporterInterface is abstract and does not provide concrete method definitions"
-
-    def getPos(self) -> Tuple[int, int]:
-        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
-
-    def getDimensions(self) -> Tuple[int, int]:
-        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
-
-    def getCorners(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        raise NotImplementedError(PositionReporterInterface._ERROR_MESSAGE_TEXT)
-
-
 #Position Reporter
 #A "concrete interface" (implemented as a mixin) for widgets to report their current position
 #When I say "concrete interface", I mean that this class is to be used 
@@ -49,6 +33,22 @@ class PositionReporter(PositionReporterInterface, BaseTkObject):
         #this is because tkinter.Misc (aka BaseTkObject) has no __init__ method
         #(I beleive it was designed as an interface similar to this one)
 
+        #init the geometry cache
+        #this is a list [x, y, width, height] of this widget's geometry within
+        #its parent (adjusted for the parent's border), or None if the geometry
+        #needs to be read from tkinter the next time it is requested
+        #reading these values from Python attributes is much cheaper than
+        #asking Tcl for them each time, which matters for collision checks
+        self._cachedGeometry = None
+
+        #the parent's border width is cached as well, as it is needed to
+        #adjust the coordinates reported by <Configure> events
+        self._cachedParentBorderWidth = None
+
+        #keep the cache up to date whenever this widget moves or resizes
+        #add is set so that this doesn't replace other <Configure> bindings
+        self.bind("<Configure>", self._onConfigureGeometry, add=True)
+
     #return coordinates within parent
     #as a 2-tuple (x, y)
     #adjusts for parent having a border
@@ -81,6 +81,69 @@ class PositionReporter(PositionReporterInterface, BaseTkObject):
         return coordinates
         
     
+    #internal method
+    #reads this widget's geometry from tkinter and stores it in the cache
+    #returns the new cached geometry
+    def _refreshGeometry(self):
+
+        #use the staticmethods with forceStatic set to True
+        #(if forceStatic were False, they would call getPos and getDimensions
+        # again and we would be stuck in an infinite loop)
+        x, y = self.getPosOfWidget(self, forceStatic=True)
+        width, height = self.getDimensionsOfWidget(self, forceStatic=True)
+
+        self._cachedGeometry = [x, y, width, height]
+        return self._cachedGeometry
+
+    #internal method
+    #event handler for the <Configure> event
+    #updates the cache using the geometry reported by the event
+    #rather than reading it back from tkinter
+    def _onConfigureGeometry(self, event):
+
+        #the parent's border width only needs to be read once
+        if self._cachedParentBorderWidth == None:
+            self._cachedParentBorderWidth = self.master.cget("borderwidth")
+
+        #the position reported by the event is relative to the parent's
+        #outer edge; adjust for the border the same way getPosOfWidget does
+        self._cachedGeometry = [
+            event.x - self._cachedParentBorderWidth,
+            event.y - self._cachedParentBorderWidth,
+            event.width,
+            event.height
+            ]
+
+    #internal method
+    #updates the cached position without waiting for a <Configure> event
+    #this is used by subclasses that move themselves (e.g. Vehicle.setPos)
+    #so their position is correct right away
+    def _setCachedPos(self, x: int, y: int):
+
+        if self._cachedGeometry == None:
+            self._refreshGeometry()
+
+        self._cachedGeometry[0] = x
+        self._cachedGeometry[1] = y
+
+        self._onCachedPosChanged()
+
+    #internal method
+    #called after _setCachedPos moved this widget, before tkinter raises
+    #<Configure> for the move; does nothing by default
+    #subclasses that index their position elsewhere (e.g. Collider)
+    #override this to update that index right away
+    def _onCachedPosChanged(self):
+        pass
+
+    #clears the cached geometry of this widget;
+    #it will be read from tkinter the next time it is needed
+    #call this if the geometry may have changed in a way that doesn't
+    #raise a <Configure> event, such as the parent's border width changing
+    def invalidateGeometry(self):
+        self._cachedGeometry = None
+        self._cachedParentBorderWidth = None
+
     #return the (x, y) coordinates of this widget
     #you can override this method to define custom 
     #corner-locating behavior on a class by class basis
@@ -89,10 +152,13 @@ class PositionReporter(PositionReporterInterface, BaseTkObject):
     #from different coordinate spaces, etc)
     def getPos(self) -> Tuple[int,int]:
 
-        #by default, getPos simply uses getPosOfWidget with forceStatic set to True 
-        #(if forceStatic were False, getPosOfWidget would call getPos again and we
-        # would be stuck in an infinite loop)
-        return self.getPosOfWidget(self, forceStatic=True)
+        #by default, getPos reports the cached position,
+        #reading it from tkinter first if the cache is empty
+        geometry = self._cachedGeometry
+        if geometry == None:
+            geometry = self._refreshGeometry()
+
+        return (geometry[0], geometry[1])
 
     #return the width and height of the specified widget
     #as a 2-tuple (width, height)
@@ -112,8 +178,14 @@ class PositionReporter(PositionReporterInterface, BaseTkObject):
     #overridable instancemethod version of getDimensionsOfWidget
     #see description of getPosOfWidget for a more detailed example
     #of this staticmethod + instancemethod pairing concept
+    #the dimensions are read from the geometry cache, like getPos
     def getDimensions(self) -> Tuple[int, int]:
-        return self.getDimensionsOfWidget(self, forceStatic=True)
+
+        geometry = self._cachedGeometry
+        if geometry == None:
+            geometry = self._refreshGeometry()
+
+        return (geometry[2], geometry[3])
 
     #return the x and y coordinates of the top left
     #and bottom right corners of the specified widget 
@@ -145,47 +217,3 @@ class PositionReporter(PositionReporterInterface, BaseTkObject):
     #and bottom right corners of this widget
     def getCorners(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
         return self.getCornersOfWidget(self)
-
-#Rectangle
-#A class that stores an origin and dimensions
-#and exposes them using the PositionReporterInterface
-class Rectangle(PositionReporterInterface):
-
-    def __init__(self,
-        originX: int or float,
-        originY: int or float,
-        width: int or float,
-        height: int or float
-        ):
-
-        self.originX = originX
-        self.originY = originY
-        self.width = width
-        self.height = height
-
-    #return the origin coordinates
-    def getPos(self) -> Tuple[int, int]:
-        return (self.originX, self.originY)
-
-    #return the dimensions
-    def getDimensions(self) -> Tuple[int, int]:
-        return (self.width, self.height)
-
-    #return two 2-tuples representing the coordinates
-    #of the top left and bottom right corners of this rectangle
-    def getCorners(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        
-        #top left corner is just the origin coordinates
-        cornerTL = (self.originX, self.originY)
-
-        #bottom right corner is origin coordinates
-        #offset by the width and height
-        cornerBR = (self.originX + self.width, self.originY + self.height)
-
-        return (cornerTL, cornerBR)
-
-    def __str__(self):
-        return f"({repr(self.originX)}, {repr(self.originY)}, {repr(self.width)}, {repr(self.height)})"
-
-    def __repr__(self):
-        return "Rectangle"+self.__str__()
\ No newline at end of file
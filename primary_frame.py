@@ -27,6 +27,16 @@ class PrimaryFrame(Frame):
         "west"  : (2, 1)
         }
 
+    #names of the lights whose phases are offset by half a cycle
+    #from the others by the signal controller
+    CROSSING_LIGHT_NAMES = ("east", "west")
+
+    #the number of simulation ticks per second, and the maximum number of
+    #frames drawn per second; the simulation runs faster than the screen is
+    #updated, so movement is accurate without moving widgets on every tick
+    SIM_TICK_RATE = 200
+    REFRESH_RATE = 60
+
 
     #some of the initialization includes making changes to the parent
     #including setting a grid layout and setting the minimum row and column size
@@ -67,6 +77,7 @@ class PrimaryFrame(Frame):
         from road import Road
         from traffic_light import TrafficLight
         from vehicle import Vehicle
+        from signal_controller import CyclePlan
 
         #create and position road widgets
         self.vertRoad = Road(self)
@@ -76,8 +87,11 @@ class PrimaryFrame(Frame):
         self.horizRoad.grid(row=2, column=0, sticky="EW", columnspan=5)
 
         #place vehicle
+        #its drives are advanced by this frame's SimulationClock
         self.vehicle = Vehicle(self)
         self.vehicle.place(x=0, y=0)
+        self.clock.addVehicle(self.vehicle)
+        self.renderer.addVehicle(self.vehicle)
 
         #create and position each light
         for tlightName in self.TLIGHT_NAMES:
@@ -94,6 +108,16 @@ class PrimaryFrame(Frame):
             #save the light by name in the self.trafficLights dictionary
             #this allows it to be accessed later
             self.trafficLights[tlightName] = trafficLight
+
+            #have the signal controller run the light's phases
+            #lights facing east and west run half a cycle behind
+            #those facing north and south, so they take turns
+            plan = CyclePlan.createDefault()
+            if tlightName in self.CROSSING_LIGHT_NAMES:
+                offset = plan.getCycleLength() // 2
+            else:
+                offset = 0
+            self.signalController.addLight(trafficLight, plan, offset)
         
        
         
@@ -107,6 +131,9 @@ class PrimaryFrame(Frame):
         from road import Road
         from traffic_light import TrafficLight
         from vehicle import Vehicle
+        from simulation_clock import SimulationClock
+        from signal_controller import SignalController
+        from renderer import Renderer
 
         #run superclass constructor
         super().__init__(
@@ -135,10 +162,27 @@ class PrimaryFrame(Frame):
 
         #init traffic lights dictionary (with type hint)
         self.trafficLights : Dict[str, TrafficLight] = {}
+
+        #create the clock that advances the simulation
+        #vehicles are registered with it within _placeWidgets
+        self.clock = SimulationClock(self, self.SIM_TICK_RATE)
+
+        #create the renderer that draws the vehicles
+        #vehicles are added to it within _placeWidgets
+        self.renderer = Renderer(self, self.REFRESH_RATE)
+
+        #create the controller that runs the traffic lights
+        #lights are added to it within _placeWidgets
+        self.signalController = SignalController(self)
         
         #instantiate and position widgets (roads, traffic lights; etc)
         self._placeWidgets()
 
+        #start advancing the simulation, drawing it, and running the lights
+        self.clock.start()
+        self.renderer.start()
+        self.signalController.start()
+
         #initialize selected light name with the first 
         #this can be used to interact with the lights sequentially
         #using the getSelectedLight and incrementSelectedLight methods
@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from typing import ClassVar, Tuple, Dict, Any
-from dataclasses import dataclass
+from typing import ClassVar, Iterable, List, Tuple, Dict, Any
 
 #ProportionalBB (Short for Proportional Bounding Box)
-#A data class used to store a bounding box that is defined
+#A class used to store a bounding box that is defined
 #as proportions of some rectangle.
 #Each dimension is defined by a start and end bound,
 #with each of those being a floating point number from 0.0 to 1.0
-#note: a dataclass is not a great fit for this purpose
-#if this were production code, I would write a class from scratch instead
-#this design was chosen mostly because I wanted to experiement
-@dataclass
+#note: this used to be a dataclass; it is written from scratch (with __slots__)
+#because huge numbers of these are created for collision checks, and the
+#dataclass version spent most of its time validating attributes one at a time
 class ProportionalBB:
     
     #dictionary that associates the x and y axes
@@ -22,15 +20,26 @@ class ProportionalBB:
         "y": ("yStart", "yEnd")
         }
 
-    #define the instance vars for bounds
-    xStart: float
-    xEnd: float
-    yStart: float
-    yEnd: float
+    #tuple of every bound name, in the order they are passed to the constructor
+    _BOUND_NAMES : ClassVar[Tuple[str, ...]] = tuple(
+        boundName for boundNames in AXIS_BOUNDS.values() for boundName in boundNames
+        )
+
+    #dictionary that associates each bound name with a 2-tuple of
+    #(name of the opposite bound on the same axis, whether this is the start bound)
+    #this is looked up on every assignment, so it is built once here
+    _OPPOSITE_BOUNDS : ClassVar[Dict[str, Tuple[str, bool]]] = {}
+    for _startName, _endName in AXIS_BOUNDS.values():
+        _OPPOSITE_BOUNDS[_startName] = (_endName, True)
+        _OPPOSITE_BOUNDS[_endName] = (_startName, False)
+    del _startName, _endName
 
-    #define the 'silent' instance var with
-    #a default value of False
-    silent: bool = False
+    #define the instance vars for bounds
+    #as well as the 'silent' instance var
+    #and the '_version' instance var (see getVersion)
+    #__slots__ means instances have no __dict__, which makes them smaller
+    #and makes attribute access faster
+    __slots__ = ("xStart", "xEnd", "yStart", "yEnd", "silent", "_version")
 
     ### NOTES ON PROPORTIONAL AREA DEFINITION ###
     # A proportional area is defined by four bounds in total:
@@ -53,6 +62,55 @@ class ProportionalBB:
     # this necessarily changes the actual pixel position of the bound)
     ########################################
 
+    #constructor
+    #all four bounds are validated together, once, and then stored
+    #directly; this is much cheaper than setting each bound through
+    #__setattr__, which would check each one against the others separately
+    #see definition of _validateBounds for details on raised exceptions
+    def __init__(self, xStart: float, xEnd: float, yStart: float, yEnd: float, silent: bool = False):
+        bounds = self._validateBounds((xStart, xEnd, yStart, yEnd), silent)
+        self._storeBounds(bounds, silent)
+
+    #internal method
+    #stores already validated bounds (in constructor order) and the silent setting
+    #without going through __setattr__
+    def _storeBounds(self, bounds: Tuple[float, float, float, float], silent: bool):
+        objectSetattr = object.__setattr__
+        objectSetattr(self, "xStart", bounds[0])
+        objectSetattr(self, "xEnd", bounds[1])
+        objectSetattr(self, "yStart", bounds[2])
+        objectSetattr(self, "yEnd", bounds[3])
+        objectSetattr(self, "silent", silent)
+        objectSetattr(self, "_version", 0)
+
+    #internal classmethod
+    #creates an instance from bounds that are known to be valid, skipping validation
+    @classmethod
+    def _fromValidBounds(cls, bounds: Tuple[float, float, float, float], silent: bool = False) -> ProportionalBB:
+        newBB = cls.__new__(cls)
+        newBB._storeBounds(bounds, silent)
+        return newBB
+
+    #classmethod
+    #bulk constructor; given an iterable of 4-tuples (xStart, xEnd, yStart, yEnd),
+    #returns a list with one instance per tuple
+    #each distinct set of bounds is only validated once, no matter
+    #how many instances share it, which makes creating large numbers of
+    #instances with the same few bounds (the common case) cheap
+    #raises the same exceptions as the constructor
+    @classmethod
+    def createMany(cls, boundSets: Iterable[Tuple[float, float, float, float]], silent: bool = False) -> List[ProportionalBB]:
+        validatedSets = {}
+        newBBs = []
+        for bounds in boundSets:
+            bounds = tuple(bounds)
+            validBounds = validatedSets.get(bounds)
+            if validBounds == None:
+                validBounds = cls._validateBounds(bounds, silent)
+                validatedSets[bounds] = validBounds
+            newBBs.append(cls._fromValidBounds(validBounds, silent))
+        return newBBs
+
     #internal method
     #ensure that bound is within the range 0 to 1 inclusive
     #return the value as a float
@@ -84,15 +142,43 @@ class ProportionalBB:
 
         return bound
 
+    #internal classmethod
+    #validates a full set of bounds (xStart, xEnd, yStart, yEnd) at once
+    #returns the bounds as a tuple of floats
+    #raises the same exceptions as _validateBoundValue for each bound,
+    #and a ValueError if any start bound is greater than its end bound
+    @classmethod
+    def _validateBounds(cls, bounds: Tuple[float, float, float, float], silent: bool = False) -> Tuple[float, float, float, float]:
+        validateBoundValue = cls._validateBoundValue
+        xStart, xEnd, yStart, yEnd = [validateBoundValue(bound, silent) for bound in bounds]
+
+        #each start bound must not be greater than the end bound on the same axis
+        for startValue, endValue in ((xStart, xEnd), (yStart, yEnd)):
+            if startValue > endValue:
+                errMsg = f"Start bound ({startValue}) must not be greater than end bound ({endValue})"
+                raise ValueError(errMsg)
+
+        return (xStart, xEnd, yStart, yEnd)
+
     #returns a list of all configured bound names
     #as provided by AXIS_BOUNDS
     @classmethod
     def getBoundNames(cls):
-        boundNames = []
-        boundNameSets = cls.AXIS_BOUNDS.values()
-        for nameSet in boundNameSets:
-            boundNames += nameSet
-        return boundNames
+        return list(cls._BOUND_NAMES)
+
+    #returns the version stamp of this object's bounds
+    #this starts at 0 and goes up by one each time a bound is set,
+    #so users that cache results calculated from the bounds
+    #(such as PartialCollision) can tell when those results are out of date
+    def getVersion(self) -> int:
+        return self._version
+
+    #internal method
+    #sets a bound that has already been validated
+    #and advances the version stamp
+    def _setValidBound(self, name: str, value: float):
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_version", self._version + 1)
 
     #override __setattr__ (called when any attribute is set)
     #to run the bound validation method on the prospective
@@ -102,74 +188,67 @@ class ProportionalBB:
         
         #if the attribute is not a bound, use the normal
         #__setattr__ method instead of this custom one
-        if name not in self.getBoundNames():
-            #print("name not found:", name)
-            #print("current names:", self.__dict__.keys())
-            return super().__setattr__(name, value)
+        oppositeBound = self._OPPOSITE_BOUNDS.get(name)
+        if oppositeBound == None:
+            return object.__setattr__(self, name, value)
+
+        #ensure the value is of valid type and not outside the 0 to 1 range
+        value = self._validateBoundValue(value, silent = self.silent)
+
+        #determine whether this is the start or end bound
+        #and get the value of the opposite bound
+        oppositeName, isStart = oppositeBound
+        try:
+            oppositeValue = getattr(self, oppositeName)
+        except AttributeError:
+            #AttributeError may be raised if 
+            #the opposite value does not yet exist
+            #in this case, accept the value immedately
+            return self._setValidBound(name, value)
+
+        #if the opposite bound is set, 
+        #check the new value against it
+        if isStart:
+            #if the bound is the start,
+            #raise a ValueError if the 
+            #new value is greater than
+            #the end bound value
+            if value <= oppositeValue:
+                return self._setValidBound(name, value)
+            else:
+                errMsg = f"New value for top bound ({value}) must be less than bottom bound ({oppositeValue})"
+                raise ValueError(errMsg)
         
         else:
-            #ensure the value is of valid type and not outside the 0 to 1 range
-            value = self._validateBoundValue(value, silent = self.silent)
-
-            #determine whether this is the start or end bound
-            #and which axis it is on
-            isStart = None
-            selectedAxis = None
-            for axisName, boundNames in self.AXIS_BOUNDS.items():
-                
-                #check the selected name against both bound names
-                #if it matches, set isStart appropriately
-                if name == boundNames[0]:
-                    isStart = True
-                elif name == boundNames[1]:
-                    isStart = False
-
-                #if the name was matched, capture 
-                #the axis name and stop iterating
-                if isStart != None:
-                    selectedAxis = axisName
-                    break
-
-            
-            try:
-                #get the value of the opposite bound
-                if isStart:
-                    oppositeValue = getattr(self, self.AXIS_BOUNDS[selectedAxis][1])
-                else:
-                    oppositeValue = getattr(self, self.AXIS_BOUNDS[selectedAxis][0])
-
-            except AttributeError:
-                #AttributeError may be raised if 
-                #the opposite value does not yet exist
-                #in this case, accept the value immedately
-                return super().__setattr__(name, value)
-
-            #if the opposite bound is set, 
-            #check the new value against it
-            if isStart:
-                #if the bound is the start,
-                #raise a ValueError if the 
-                #new value is not less than
-                #the end bound value
-                if value >= oppositeValue:
-                    return super().__setattr__(name, value)
-                else:
-                    errMsg = f"New value for top bound ({value}) must be less than bottom bound ({oppositeValue})"
-                    raise ValueError(errMsg)
-            
+            #if the bound is the end,
+            #raise a ValueError if the 
+            #end bound value is 
+            #greater than the new value
+            if oppositeValue <= value:
+                return self._setValidBound(name, value)
             else:
-                #if the bound is the end,
-                #raise a ValueError if the 
-                #end bound value is not 
-                #less than the new value
-                if oppositeValue <= value:
-                    return super().__setattr__(name, value)
-                else:
-                    errMsg = f"New value for bottom bound ({value}) must be greater than than top bound ({oppositeValue})"
-                    raise ValueError(errMsg)
+                errMsg = f"New value for bottom bound ({value}) must be greater than than top bound ({oppositeValue})"
+                raise ValueError(errMsg)
 
     #end __setattr__        
 
+    #returns the bounds as a 4-tuple (xStart, xEnd, yStart, yEnd)
+    def getBounds(self) -> Tuple[float, float, float, float]:
+        return (self.xStart, self.xEnd, self.yStart, self.yEnd)
+
+    #ProportionalBBs are equal if their bounds and silent settings are equal
+    #(this matches the behavior of the previous dataclass version)
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.getBounds() == other.getBounds() and self.silent == other.silent
+
+    #like a dataclass that defines __eq__, mutable instances are unhashable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(xStart={repr(self.xStart)}, xEnd={repr(self.xEnd)}, yStart={repr(self.yStart)}, yEnd={repr(self.yEnd)}, silent={repr(self.silent)})"
+
     #Given a range (in the form of two numeric values rangeStart and rangeEnd),
     #calculates the actual numeric range of this ProportionalBB over that range
     #on the specified axis. The axis is controlled by isX: 
@@ -276,9 +355,39 @@ class ProportionalBB:
 
 
     #returns a shallow copy of this object
+    #the bounds of this object are already valid, so they aren't validated again
     def getCopy(self) -> ProportionalBB:
-        from dataclasses import replace
-        return replace(self)
+        return self._fromValidBounds(self.getBounds(), self.silent)
+
+    #returns a FrozenProportionalBB with the same bounds as this object
+    def getFrozen(self) -> FrozenProportionalBB:
+        return FrozenProportionalBB._fromValidBounds(self.getBounds(), self.silent)
+
+#end ProportionalBB
+
+
+#FrozenProportionalBB
+#An immutable ProportionalBB; attempting to set any attribute raises an AttributeError
+#Because its bounds can never change, it needs no validation after construction
+#and can be hashed, shared between any number of users, and used as a dict key
+class FrozenProportionalBB(ProportionalBB):
+
+    __slots__ = ()
+
+    #override __setattr__ to reject every assignment
+    #(the constructor stores bounds without going through __setattr__)
+    def __setattr__(self, name: str, value: Any) -> None:
+        errMsg = f"Cannot set {name}; {self.__class__.__name__} is immutable"
+        raise AttributeError(errMsg)
+
+    def __hash__(self) -> int:
+        return hash((self.getBounds(), self.silent))
+
+    #returns a mutable ProportionalBB with the same bounds as this object
+    def getThawed(self) -> ProportionalBB:
+        return ProportionalBB._fromValidBounds(self.getBounds(), self.silent)
+
+#end FrozenProportionalBB
 
 if __name__ == "__main__":
     print("This is a class definition used as part of a larger script")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from tkinter import TclError
+from typing import Dict, List, TYPE_CHECKING
+from frame_stats import FrameStats, recordGlobalTime
+if TYPE_CHECKING:
+    from tkinter import Misc as BaseTkObject
+    from vehicle import Vehicle
+    from world_canvas import WorldCanvas
+
+
+#Renderer
+#Draws the simulation at a capped refresh rate, separately from the rate
+#at which it is simulated
+#Without a Renderer, each Vehicle moves its widget every time its model
+#moves a pixel, so every simulation tick is also a frame. Vehicles added to a
+#Renderer only mark themselves dirty when they move; the Renderer then moves
+#the widgets of the dirty Vehicles (and renders any views, such as a
+#WorldCanvas) once per frame, from its own tkinter timer. This way a
+#SimulationClock can tick at 200 Hz for accuracy while the screen is only
+#updated 30 to 60 times per second, and a Vehicle that moved several times
+#between frames is only moved once
+#Frames are skipped rather than queued: if a frame runs late, the frames that
+#were due in the meantime are dropped, and if drawing takes up more than
+#MAX_DRAW_LOAD of the frame interval, later frames are spaced out so the
+#simulation keeps enough of the event loop to run on time
+class Renderer():
+
+    #the default number of frames per second
+    DEFAULT_REFRESH_RATE = 60
+
+    #the largest fraction of the time that drawing may take up
+    #frames are skipped to stay under this when drawing is slow
+    MAX_DRAW_LOAD = 0.5
+
+    #constructor
+    #timerWidget is any tkinter widget; it is only used to schedule the timer
+    #refreshRate is the maximum number of frames per second
+    def __init__(self, timerWidget: BaseTkObject, refreshRate: float = None):
+
+        self.timerWidget = timerWidget
+
+        self._refreshRate = None
+        self.setRefreshRate(refreshRate if refreshRate != None else self.DEFAULT_REFRESH_RATE)
+
+        #Vehicles that moved since the last frame, as an ordered set
+        self._dirtyVehicles: Dict[Vehicle, None] = {}
+
+        #views rendered every frame; each has a drawChanges method (see WorldCanvas)
+        self._views: List[WorldCanvas] = []
+
+        #number of frames drawn and skipped so far
+        self.frameCount = 0
+        self.skippedFrameCount = 0
+
+        #id of the pending after() call, or None if no call is pending
+        #(while the renderer is stopped, or while a timer frame is drawing)
+        self._afterId = None
+
+        #True from start until stop; a timer frame only schedules the next
+        #one if this is still set, so stop can be called while a frame is drawn
+        self._running = False
+
+        #the perf_counter time at which the next frame is due
+        self._nextFrameTime = None
+
+        #the perf_counter time at which the previous timer frame ran
+        #this is only used to record frame stats
+        self._lastFrameTime = None
+
+        #init frameStats to None
+        #this is set by enableFrameStats; while set, the timing
+        #of each frame is recorded in it
+        self.frameStats: FrameStats = None
+
+
+    #returns the maximum number of frames per second
+    def getRefreshRate(self) -> float:
+        return self._refreshRate
+
+    #sets the maximum number of frames per second
+    #raises a ValueError if the refresh rate is not greater than zero
+    def setRefreshRate(self, refreshRate: float):
+        if refreshRate <= 0:
+            errMsg = f"Refresh rate must be greater than zero ({repr(refreshRate)})"
+            raise ValueError(errMsg)
+        self._refreshRate = refreshRate
+
+    #returns the time between frames in seconds
+    def getFrameInterval(self) -> float:
+        return 1 / self._refreshRate
+
+
+    #has this Renderer draw a Vehicle: from now on, the Vehicle's widget is
+    #only moved when a frame is drawn, rather than every time its model moves
+    def addVehicle(self, vehicle: Vehicle):
+        vehicle.renderer = self
+
+    #stops drawing a Vehicle; it goes back to moving its widget itself
+    #if the Vehicle moved since the last frame, its widget is moved right away
+    def removeVehicle(self, vehicle: Vehicle):
+        if vehicle.renderer is not self:
+            return
+        self.renderVehicle(vehicle)
+        vehicle.renderer = None
+
+    #records that a Vehicle's model moved to a different pixel
+    #since its widget was last moved; called by the Vehicle
+    def markDirty(self, vehicle: Vehicle):
+        self._dirtyVehicles[vehicle] = None
+
+    #returns True if a Vehicle moved since its widget was last moved
+    def isDirty(self, vehicle: Vehicle) -> bool:
+        return vehicle in self._dirtyVehicles
+
+    #moves the widget of a single dirty Vehicle right away, without waiting
+    #for the next frame (e.g. so its position is correct when its drive completes)
+    #does nothing if the Vehicle isn't dirty
+    def renderVehicle(self, vehicle: Vehicle):
+        if vehicle in self._dirtyVehicles:
+            del self._dirtyVehicles[vehicle]
+            vehicle.syncFromModel()
+
+
+    #adds a view to be rendered every frame
+    #a view is anything with a drawChanges method, such as a WorldCanvas
+    def addView(self, view: WorldCanvas):
+        if view not in self._views:
+            self._views.append(view)
+
+    #removes a view added with addView
+    #returns True if the view was added, False otherwise
+    def removeView(self, view: WorldCanvas) -> bool:
+        if view not in self._views:
+            return False
+        self._views.remove(view)
+        return True
+
+
+    #draws a single frame immediately: moves the widget of every dirty
+    #Vehicle to its model's position, then renders every view
+    #this works whether or not the renderer is running
+    #returns the number of Vehicles that were moved
+    #the time spent here is recorded as draw time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.DRAW_TIME)
+    def renderFrame(self) -> int:
+        dirtyVehicles = list(self._dirtyVehicles)
+        self._dirtyVehicles.clear()
+
+        for vehicle in dirtyVehicles:
+            try:
+                vehicle.syncFromModel()
+            except TclError:
+                #the Vehicle was destroyed after it moved
+                pass
+
+        #views are drawn with drawChanges rather than render, so
+        #their draw time isn't recorded a second time inside this frame's
+        for view in self._views:
+            view.drawChanges()
+
+        self.frameCount += 1
+        return len(dirtyVehicles)
+
+
+    #internal method
+    #called by the tkinter timer; draws a frame and schedules the next one
+    def _onTimer(self):
+        from time import perf_counter
+
+        self._afterId = None
+        frameInterval = self.getFrameInterval()
+
+        frameStartTime = perf_counter()
+        if self.frameStats != None and self._lastFrameTime != None:
+            self.frameStats.recordFrame((frameStartTime - self._lastFrameTime) * 1000, frameInterval * 1000)
+        self._lastFrameTime = frameStartTime
+
+        self.renderFrame()
+
+        frameEndTime = perf_counter()
+        drawTime = frameEndTime - frameStartTime
+        if self.frameStats != None:
+            self.frameStats.record(FrameStats.DRAW_TIME, drawTime * 1000)
+
+        #schedule the next frame relative to when this one was due, the
+        #same way SimulationClock schedules its ticks
+        self._nextFrameTime += frameInterval
+
+        #if drawing took up more than MAX_DRAW_LOAD of the time, push the next
+        #frame back so drawing and the rest of the event loop share the time
+        #in that proportion
+        earliestFrameTime = frameStartTime + drawTime / self.MAX_DRAW_LOAD
+
+        #skip every frame that is due before then (including frames that
+        #were missed because this one ran late) rather than drawing them late
+        skippedFrames = 0
+        if self._nextFrameTime < earliestFrameTime:
+            skippedFrames = int((earliestFrameTime - self._nextFrameTime) // frameInterval) + 1
+            self._nextFrameTime += skippedFrames * frameInterval
+            self.skippedFrameCount += skippedFrames
+
+        #don't reschedule if the frame stopped the renderer, or if it
+        #stopped and restarted it (which already scheduled a frame)
+        if not self._running or self._afterId != None:
+            return
+
+        delayMs = max(1, int(round((self._nextFrameTime - frameEndTime) * 1000)))
+        self._afterId = self.timerWidget.after(delayMs, self._onTimer)
+
+    #starts drawing frames at the refresh rate
+    #does nothing if the renderer is already running
+    def start(self):
+        from time import perf_counter
+
+        if self.isRunning():
+            return
+
+        self._running = True
+        delayMs = max(1, int(round(self.getFrameInterval() * 1000)))
+        self._nextFrameTime = perf_counter() + delayMs / 1000
+        self._afterId = self.timerWidget.after(delayMs, self._onTimer)
+
+    #stops drawing frames
+    #Vehicles that moved since the last frame keep their old position on
+    #screen until the next renderFrame (or until the renderer is started again)
+    def stop(self):
+        self._running = False
+        if self._afterId != None:
+            self.timerWidget.after_cancel(self._afterId)
+            self._afterId = None
+        self._lastFrameTime = None
+
+    #returns True if the renderer is running, False otherwise
+    def isRunning(self) -> bool:
+        return self._running
+
+
+    #starts recording the timing of this Renderer's frames (see frame_stats.py)
+    #skipped frames show up as dropped frames, as they lengthen the frame interval
+    #returns the FrameStats they are recorded in
+    def enableFrameStats(self, capacity: int = None) -> FrameStats:
+        if self.frameStats == None:
+            self.frameStats = FrameStats(capacity)
+        return self.frameStats
+
+    #stops recording the timing of this Renderer's frames; recorded values are discarded
+    def disableFrameStats(self):
+        self.frameStats = None
+
+#end Renderer
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -3,7 +3,9 @@
 from tkinter import Canvas
 from collider import Collider
 from collision import Collision
-from typing import Iterable, List, Tuple
+from sim_core import SimRoad
+from frame_stats import FrameStats, recordGlobalTime
+from typing import Dict, Iterable, List, Tuple
 from enum import Enum
 
 #TrafficLineType
@@ -37,6 +39,10 @@ class Road(Collider, Canvas):
     #drawRoad is called without specifying a line type
     DEFAULT_LINE_TYPE = TrafficLineType.SOLID
 
+    #define the tags given to each kind of canvas item drawn by a Road
+    TRAFFIC_LINE_TAG = "trafficLine"
+    INTERSECTION_BOX_TAG = "intersectionBox"
+
     #given a TrafficLineType or a matching string,
     #returns a valid TrafficLineType
     #if the provided value is not a TrafficLineType or 
@@ -71,50 +77,57 @@ class Road(Collider, Canvas):
     #clears every object off the Canvas
     #this could apply to any Canvas subclass
     def _clearCanvas(self):
-        allObjects = self.find_all()
-        for object in allObjects:
-            self.delete(object)
-
-    #draws traffic lines down the middle of the widget
-    #if clearBeforeDrawing param is True (default),
-    #the widget will be entirely cleared before doing this
-    #lineType specifies the type of lines to draw; if none is specified,
-    #the _lineType of this Road is used by default. 
+        #"all" matches every item, so they are all deleted in one call
+        self.delete("all")
+
+        #the items tracked by this Road no longer exist
+        self._trafficLineIds = []
+        self._trafficLineCoords = []
+        self._intersectionBoxIds = {}
+
+    #classmethod
+    #calculates the traffic lines of a Road with the specified dimensions
+    #returns a list of 4-tuples (x0, y0, x1, y1), one for each line segment,
+    #with coordinates relative to the top left corner of the Road
+    #returns None if the Road is too small to draw lines on
+    #horizontal and lineType work the same as the Road attributes of the same name;
     #lineType must be a TrafficLineType or equivalent string
-    def drawRoad(self, clearBeforeDrawing = True, lineType: TrafficLineType = None) -> bool:
+    @classmethod
+    def calculateTrafficLineCoords(cls,
+        width: int,
+        height: int,
+        horizontal: bool = False,
+        lineType: TrafficLineType = None
+        ) -> List[Tuple[int, int, int, int]]:
         from math import ceil
 
-        #clear canvas if not specified otherwise
-        if clearBeforeDrawing:
-            self._clearCanvas()
-
         if lineType == None:
-            #use this Road's lineType if none was specified
-            lineType = self._lineType
+            #use the default lineType if none was specified
+            lineType = cls.DEFAULT_LINE_TYPE
         else:
             #if a lineType was specified, validate it
-            lineType = self.validateTrafficLineType(lineType)
+            lineType = cls.validateTrafficLineType(lineType)
 
         #alias width and height
-        if not self.horizontal:
-            currentWidth = self.currentWidth
-            currentHeight = self.currentHeight
+        if not horizontal:
+            currentWidth = width
+            currentHeight = height
         else:
             #if this road is to be drawn horizontally,
             #swap width and height; this effectively swaps
             #the axis that calculations are based on
-            currentHeight = self.currentWidth
-            currentWidth = self.currentHeight
+            currentHeight = width
+            currentWidth = height
 
         #determine the size of one line segment
         #the width is the closest integer approximation of
         #the line width proportion multiplied by the width of the Road
-        lineWidth = int(round(currentWidth * self.LINE_WIDTH_PROPORTION))
+        lineWidth = int(round(currentWidth * cls.LINE_WIDTH_PROPORTION))
 
-        #if line width is zero, return False to indicate failure
+        #if line width is zero, return None to indicate failure
         if lineWidth == 0:
             #print("Cannot draw zero width line!")
-            return False
+            return None
 
         #init linesIterable to an empty list
         #this will be overwritten by one of 
@@ -164,7 +177,7 @@ class Road(Collider, Canvas):
             #have them spaced one line's length apart
 
             #the height of one line segment is 4 times its width
-            lineHeight = lineWidth * self.LINE_HEIGHT_PROPORTION
+            lineHeight = lineWidth * cls.LINE_HEIGHT_PROPORTION
 
             #in order for the lines to be centered, they must
             #be offset to the right by a certain amount, shown here
@@ -218,16 +231,85 @@ class Road(Collider, Canvas):
             errMsg = f"Attempted to draw road with TrafficLineType \"{lineType}\" but found now corresponding draw function!"
             raise ValueError(errMsg)
 
-        #draw each line
+        #convert each line's position and dimensions into corner coordinates
+        lineCoords = []
         for xOffset, yOffset, lineWidth, lineHeight in linesIterable:
 
-            #draw the line using provided position and dimensions
-            if not self.horizontal:
-                self.create_rectangle(xOffset, yOffset, xOffset+lineWidth, yOffset+lineHeight, fill=self.LINE_COLOR)
+            if not horizontal:
+                lineCoords.append((xOffset, yOffset, xOffset+lineWidth, yOffset+lineHeight))
             else:
             #draw lines horizontally if needed
             #this is done by switching around which parameter goes where
-                self.create_rectangle(yOffset, xOffset, yOffset+lineHeight, xOffset+lineWidth, fill=self.LINE_COLOR)
+                lineCoords.append((yOffset, xOffset, yOffset+lineHeight, xOffset+lineWidth))
+
+        return lineCoords
+
+
+    #internal method
+    #brings this Road's traffic line items in line with the provided coordinates
+    #existing items are moved with coords() instead of being deleted and recreated;
+    #only items whose coordinates changed are touched, and items are only
+    #created or deleted when the number of line segments changes
+    def _applyTrafficLineCoords(self, lineCoords: List[Tuple[int, int, int, int]]):
+
+        lineIds = self._trafficLineIds
+        previousCoords = self._trafficLineCoords
+
+        #move the items that already exist
+        for index in range(min(len(lineIds), len(lineCoords))):
+            if previousCoords[index] != lineCoords[index]:
+                self.coords(lineIds[index], *lineCoords[index])
+
+        #create items for any segments that didn't exist before
+        createdLines = False
+        for coords in lineCoords[len(lineIds):]:
+            lineIds.append(self.create_rectangle(*coords, fill=self.LINE_COLOR, tags=(self.TRAFFIC_LINE_TAG,)))
+            createdLines = True
+
+        #delete the items of segments that no longer exist
+        if len(lineIds) > len(lineCoords):
+            self.delete(*lineIds[len(lineCoords):])
+            del lineIds[len(lineCoords):]
+
+        self._trafficLineCoords = list(lineCoords)
+
+        #new items are drawn on top of everything else;
+        #keep intersection boxes above the traffic lines
+        if createdLines:
+            self.tag_raise(self.INTERSECTION_BOX_TAG)
+
+
+    #draws traffic lines down the middle of the widget
+    #if clearBeforeDrawing param is True (default), the lines drawn by the 
+    #previous call are replaced; the existing items are updated in place
+    #if clearBeforeDrawing is False, new lines are drawn on top of the existing ones
+    #and are not updated by later calls
+    #lineType specifies the type of lines to draw; if none is specified,
+    #the _lineType of this Road is used by default. 
+    #lineType must be a TrafficLineType or equivalent string
+    #the time spent here is recorded as draw time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.DRAW_TIME)
+    def drawRoad(self, clearBeforeDrawing = True, lineType: TrafficLineType = None) -> bool:
+
+        if lineType == None:
+            #use this Road's lineType if none was specified
+            lineType = self._lineType
+
+        lineCoords = self.calculateTrafficLineCoords(self.currentWidth, self.currentHeight, self.horizontal, lineType)
+
+        #if no lines could be calculated, remove the previous
+        #lines and return False to indicate failure
+        if lineCoords == None:
+            if clearBeforeDrawing:
+                self._applyTrafficLineCoords([])
+            return False
+
+        if clearBeforeDrawing:
+            self._applyTrafficLineCoords(lineCoords)
+        else:
+            for coords in lineCoords:
+                self.create_rectangle(*coords, fill=self.LINE_COLOR)
+            self.tag_raise(self.INTERSECTION_BOX_TAG)
 
         #return True to indicate success
         return True
@@ -254,12 +336,35 @@ class Road(Collider, Canvas):
 
     #internal method
     #event handler for <Configure> event which fires when resizing
+    #also keeps the model's geometry in line with this widget's
     def _onResize(self, event):
+        self.model.setPos(*self.getPos())
+        self.model.setDimensions(*self.getDimensions())
+
         if event.width != self.currentWidth or event.height != self.currentHeight:
             self._updateSize(event.width, event.height)
 
 
-    def __init__(self, parent, horizontal=False):
+    #moves and resizes this widget to match its model
+    #this uses the place geometry manager, so it should only be used
+    #for Roads that aren't positioned by grid or pack
+    def syncFromModel(self):
+        self.place(
+            x=int(round(self.model.originX)),
+            y=int(round(self.model.originY)),
+            width=int(round(self.model.width)),
+            height=int(round(self.model.height))
+            )
+
+
+    #if a SimRoad is provided as model, this Road acts as a view of it:
+    #the widget is placed at the model's position and size, and the model's
+    #horizontal setting is used. Otherwise, a new SimRoad is created
+    #and kept up to date with this widget's geometry
+    #if detectIntersections is False, this Road doesn't look for intersections
+    #with the Roads that already exist; this is for builders that find every
+    #intersection at once (see RoadNetwork) and add them with addRoadCollision
+    def __init__(self, parent, horizontal=False, model: SimRoad = None, detectIntersections: bool = True):
         from tkinter.constants import FLAT
 
         #run superclass constructor
@@ -271,12 +376,31 @@ class Road(Collider, Canvas):
             highlightthickness=0 #remove border that is applied by default to canvas widgets
             )
 
+        #init the model of this Road
+        #the model can be used by the headless simulation core
+        modelProvided = model != None
+        if not modelProvided:
+            model = SimRoad(horizontal=horizontal)
+        else:
+            horizontal = model.horizontal
+        self.model = model
+
         #save rotation setting
         self.horizontal = horizontal
 
         #init line type to the default
         self._lineType = self.DEFAULT_LINE_TYPE
 
+        #init traffic line item storage
+        #these are the ids of the traffic line items on the canvas
+        #and the coordinates each one was last drawn at
+        self._trafficLineIds: List[int] = []
+        self._trafficLineCoords: List[Tuple[int, int, int, int]] = []
+
+        #init intersection box item storage
+        #this associates each road Collision with the id of its box item
+        self._intersectionBoxIds: Dict[Collision, int] = {}
+
         #get dimensions
         #these will be updated dynamically at runtime
         #using the <Configure> event and onResize method
@@ -284,34 +408,65 @@ class Road(Collider, Canvas):
         self.currentHeight = self.winfo_height()
         
         #bind the _onResize method to the <Configure> event
-        self.bind("<Configure>", self._onResize)
+        #add is set so the bindings made by Collider are kept
+        self.bind("<Configure>", self._onResize, add=True)
 
         #check for Collisions with other roads
         #store these Collisions in a list, then enable binding on each
         self.roadCollisions: List[Collision] = []
-        for roadCollision in self.getRoadCollisions():
-            roadCollision.addBindings()
-            self.roadCollisions.append(roadCollision)
+        if detectIntersections:
+            for roadCollision in self.getRoadCollisions():
+                self.addRoadCollision(roadCollision)
         #because each of the Collisions is bound, it will update to reflect
         #the new area of collision
 
         #bind the drawIntersectionBoxes method to the <<CollisionUpdate>> event
         #this will draw intersections over top of existing traffic lines
         self.bind("<<CollisionUpdate>>", self.drawIntersectionBoxes)
+
+        #if a model was provided, take on its geometry
+        if modelProvided:
+            self.syncFromModel()
         
 
     #draw a blank rectangle over all areas of this road
     #that intersect another road
+    #each Collision in roadCollisions has one persistent box item, which is moved
+    #with coords() when its area changes and hidden while there is no area;
+    #boxes of Collisions that were removed from roadCollisions are deleted
+    #when used as a <<CollisionUpdate>> handler, only the boxes of the
+    #Collisions reported by the event are updated
     #event parameter is provided so this can be used as an event handler
+    #the time spent here is recorded as draw time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.DRAW_TIME)
     def drawIntersectionBoxes(self, event = None):
-        for roadCollision in self.roadCollisions:
+
+        boxIds = self._intersectionBoxIds
+
+        #delete the boxes of Collisions that are no longer road collisions
+        removedCollisions = [collision for collision in boxIds if collision not in self.roadCollisions]
+        if len(removedCollisions) > 0:
+            self.delete(*[boxIds.pop(collision) for collision in removedCollisions])
+
+        #determine which Collisions need their boxes updated
+        if event != None:
+            collisionsToDraw = [collision for collision in self.getChangedCollisions() if collision in self.roadCollisions]
+        else:
+            collisionsToDraw = self.roadCollisions
+
+        for roadCollision in collisionsToDraw:
+            boxId = boxIds.get(roadCollision)
+
             #get the corners of the collision area
             try:
                 cornerTL, cornerBR = roadCollision.getCollisionCorners()
             except ValueError:
                 #ValueError is raised if the collision
                 #has no area (i.e. the two objects aren't currently colliding)
-                #in that case, continue to the next collision
+                #in that case, hide the box (if there is one)
+                #and continue to the next collision
+                if boxId != None:
+                    self.itemconfigure(boxId, state="hidden")
                 continue
             
             #the coordinates returned by the collision are relative
@@ -327,11 +482,35 @@ class Road(Collider, Canvas):
             x1 = cornerBR[0] - thisX
             y1 = cornerBR[1] - thisY
 
-            #draw a rectangle using these coordinates
-            self.create_rectangle(x0, y0, x1, y1, 
-                fill=self.ROAD_COLOR, #fill with the same color as the road
-                outline=self.ROAD_COLOR #outline same color as fill
-                )    
+            if boxId == None:
+                #draw a rectangle using these coordinates
+                boxIds[roadCollision] = self.create_rectangle(x0, y0, x1, y1, 
+                    fill=self.ROAD_COLOR, #fill with the same color as the road
+                    outline=self.ROAD_COLOR, #outline same color as fill
+                    tags=(self.INTERSECTION_BOX_TAG,)
+                    )
+            else:
+                #move the existing rectangle to these coordinates
+                #and make sure it is visible
+                self.coords(boxId, x0, y0, x1, y1)
+                self.itemconfigure(boxId, state="normal")
+
+
+    #returns the number of items that currently exist on this Road's canvas
+    #a Road should only ever have one item per traffic line segment plus one per
+    #road collision; this is meant for debugging, to watch for items
+    #that are created and never deleted
+    #note that this asks tkinter for the items, so avoid calling it every frame
+    def getCanvasItemCount(self) -> int:
+        return len(self.find_all())
+
+
+    #adds a Collision with another Road to this Road's roadCollisions
+    #and enables its bindings, so its intersection box is drawn
+    #and kept up to date
+    def addRoadCollision(self, roadCollision: Collision):
+        roadCollision.addBindings()
+        self.roadCollisions.append(roadCollision)
 
 
     #get a list of Collisions for each
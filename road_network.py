@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from collision import Collision
+from sim_core import SimRoad
+from sweep_and_prune import SweepAndPrune
+if TYPE_CHECKING:
+    from tkinter import Misc as BaseTkObject
+    from road import Road
+    from traffic_light import TrafficLight
+    from signal_controller import SignalController
+
+
+#Intersection
+#One crossing of a horizontal and a vertical Road in a RoadNetwork
+class Intersection():
+
+    def __init__(self, row: int, column: int, collision: Collision):
+
+        #position of the intersection in the grid
+        self.row = row
+        self.column = column
+
+        #the Collision of the two Roads; its area is the intersection box
+        #collisionSource is the horizontal Road, collidedWith the vertical one
+        self.collision = collision
+
+        #dict that associates each light name (see RoadNetwork.LIGHT_NAMES)
+        #with the TrafficLight at that corner of the intersection
+        self.trafficLights: Dict[str, TrafficLight] = {}
+
+    def __repr__(self):
+        return f"Intersection(row={self.row}, column={self.column})"
+
+#end Intersection
+
+
+#RoadNetwork
+#Lays out a grid of intersections: rows horizontal Roads crossing
+#columns vertical Roads, with four TrafficLights at each intersection
+#run by a single SignalController
+#All geometry is calculated up front and every widget is positioned with
+#place, so nothing needs to be measured from tkinter while building. Roads
+#are created without looking for intersections themselves (which would check
+#every new Road against every existing one); instead every intersection is
+#found at once with a sweep over the Roads' models and handed to the Roads
+#Build the network with build; the widgets are children of parent
+class RoadNetwork():
+
+    #default layout dimensions in pixels
+    #the block size must leave room for the lights of the intersections on
+    #both sides of the block (see getMinBlockSize)
+    DEFAULT_ROAD_WIDTH = 60
+    DEFAULT_BLOCK_SIZE = 180
+
+    #names of the lights at each intersection and their corner
+    #as 2-tuples (horizontal side, vertical side); -1 is left/top, 1 is right/bottom
+    #these match the names used by PrimaryFrame
+    LIGHT_CORNERS = {
+        "north" : (-1, -1),
+        "east"  : (1, -1),
+        "south" : (1, 1),
+        "west"  : (-1, 1)
+        }
+    LIGHT_NAMES = tuple(LIGHT_CORNERS)
+
+    #names of the lights whose phases are offset by half a cycle from the others
+    CROSSING_LIGHT_NAMES = ("east", "west")
+
+    #gap between a light and the edge of the road, in pixels
+    LIGHT_MARGIN = 2
+
+    #constructor
+    #rows and columns are the number of horizontal and vertical Roads;
+    #the network has rows * columns intersections
+    #roadWidth is the width of each Road and blockSize the space between Roads
+    #intersectionOffset (in milliseconds) is added to the signal offset of each
+    #intersection for each step along the grid (row + column); this can be
+    #used to make a "green wave". It is 0 by default, so all intersections
+    #change at the same time
+    #raises a ValueError if blockSize is smaller than getMinBlockSize, as the
+    #lights of neighbouring intersections would overlap
+    def __init__(self,
+        parent: BaseTkObject,
+        rows: int,
+        columns: int,
+        roadWidth: int = None,
+        blockSize: int = None,
+        intersectionOffset: int = 0
+        ):
+
+        if rows < 1 or columns < 1:
+            errMsg = f"A RoadNetwork needs at least one row and column ({rows}x{columns})"
+            raise ValueError(errMsg)
+
+        self.parent = parent
+        self.rows = rows
+        self.columns = columns
+        self.roadWidth = roadWidth if roadWidth != None else self.DEFAULT_ROAD_WIDTH
+        self.blockSize = blockSize if blockSize != None else self.DEFAULT_BLOCK_SIZE
+        if self.blockSize < self.getMinBlockSize():
+            errMsg = f"Block size must be at least {self.getMinBlockSize()} so lights don't overlap ({repr(self.blockSize)})"
+            raise ValueError(errMsg)
+        self.intersectionOffset = intersectionOffset
+
+        #Roads of the network, from top to bottom and from left to right
+        #these are filled in by build
+        self.horizontalRoads: List[Road] = []
+        self.verticalRoads: List[Road] = []
+
+        #dict that associates each (row, column) with its Intersection
+        self.intersections: Dict[Tuple[int, int], Intersection] = {}
+
+        #the controller that runs every TrafficLight of the network
+        self.signalController: SignalController = None
+
+
+    #classmethod
+    #returns the smallest block size at which the lights on either side of
+    #a block don't overlap: each side has a light (and its margin) at the
+    #corner of its intersection, along both axes
+    @classmethod
+    def getMinBlockSize(cls) -> int:
+        from traffic_light import TrafficLight
+
+        lightWidth, lightHeight = TrafficLight.getLightSize()
+        return 2 * (max(lightWidth, lightHeight) + cls.LIGHT_MARGIN)
+
+    #returns the total size of the network as a 2-tuple (width, height)
+    def getSize(self) -> Tuple[int, int]:
+        return (
+            self.columns * self.roadWidth + (self.columns + 1) * self.blockSize,
+            self.rows * self.roadWidth + (self.rows + 1) * self.blockSize
+            )
+
+    #returns the position of the Road with the specified index (along either axis)
+    #that is, the x coordinate of a vertical Road or the y coordinate of a horizontal one
+    def getRoadPos(self, index: int) -> int:
+        return self.blockSize + index * (self.roadWidth + self.blockSize)
+
+
+    #internal method
+    #creates the models of every Road of the network
+    #returns a 2-tuple (horizontal models, vertical models)
+    def _createRoadModels(self) -> Tuple[List[SimRoad], List[SimRoad]]:
+        width, height = self.getSize()
+
+        horizontalModels = [
+            SimRoad(0, self.getRoadPos(row), width, self.roadWidth, horizontal=True)
+            for row in range(self.rows)
+            ]
+        verticalModels = [
+            SimRoad(self.getRoadPos(column), 0, self.roadWidth, height, horizontal=False)
+            for column in range(self.columns)
+            ]
+        return (horizontalModels, verticalModels)
+
+    #classmethod
+    #given the models of every Road, returns a list of 2-tuples
+    #(horizontal model, vertical model), one for each pair that intersects
+    #this is found in a single sweep over all of the models
+    #parallel Roads are never treated as intersecting, even if they touch
+    @classmethod
+    def findIntersections(cls, roadModels: List[SimRoad]) -> List[Tuple[SimRoad, SimRoad]]:
+        intersectingPairs = []
+        for modelCollision in SweepAndPrune().detectAllCollisions(roadModels):
+            modelA = modelCollision.collisionSource
+            modelB = modelCollision.collidedWith
+            if modelA.horizontal == modelB.horizontal:
+                continue
+            if modelA.horizontal:
+                intersectingPairs.append((modelA, modelB))
+            else:
+                intersectingPairs.append((modelB, modelA))
+        return intersectingPairs
+
+
+    #creates every widget of the network
+    #vertical Roads are created first and horizontal Roads second, so
+    #horizontal Roads are drawn on top and draw the intersection boxes;
+    #TrafficLights are created last so they are drawn over the Roads
+    #the lights are added to signalController, which is not started: call
+    #signalController.start() (or drive it with advance) to run the lights
+    #raises a ValueError if the network was already built
+    def build(self):
+        from road import Road
+        from traffic_light import TrafficLight
+        from signal_controller import CyclePlan, SignalController
+
+        if len(self.intersections) > 0 or len(self.horizontalRoads) > 0:
+            raise ValueError("This RoadNetwork has already been built")
+
+        horizontalModels, verticalModels = self._createRoadModels()
+
+        #create the Roads as views of their models
+        roadsByModel: Dict[SimRoad, Road] = {}
+        for model in verticalModels:
+            road = Road(self.parent, model=model, detectIntersections=False)
+            roadsByModel[model] = road
+            self.verticalRoads.append(road)
+        for model in horizontalModels:
+            road = Road(self.parent, model=model, detectIntersections=False)
+            roadsByModel[model] = road
+            self.horizontalRoads.append(road)
+
+        #find every intersection at once and give each
+        #Collision to the horizontal Road, which is on top
+        rowOfModel = {model: row for row, model in enumerate(horizontalModels)}
+        columnOfModel = {model: column for column, model in enumerate(verticalModels)}
+        for horizontalModel, verticalModel in self.findIntersections(horizontalModels + verticalModels):
+            horizontalRoad = roadsByModel[horizontalModel]
+            roadCollision = Collision(horizontalRoad, roadsByModel[verticalModel])
+            horizontalRoad.addRoadCollision(roadCollision)
+
+            row = rowOfModel[horizontalModel]
+            column = columnOfModel[verticalModel]
+            self.intersections[(row, column)] = Intersection(row, column, roadCollision)
+
+        #create the lights of each intersection and have the controller run them
+        self.signalController = SignalController(self.parent)
+        plan = CyclePlan.createDefault()
+        halfCycle = plan.getCycleLength() // 2
+        lightWidth, lightHeight = TrafficLight.getLightSize()
+
+        for (row, column), intersection in sorted(self.intersections.items()):
+            left = self.getRoadPos(column)
+            top = self.getRoadPos(row)
+            intersectionOffset = (row + column) * self.intersectionOffset
+
+            for lightName, (horizontalSide, verticalSide) in self.LIGHT_CORNERS.items():
+                if horizontalSide < 0:
+                    x = left - lightWidth - self.LIGHT_MARGIN
+                else:
+                    x = left + self.roadWidth + self.LIGHT_MARGIN
+                if verticalSide < 0:
+                    y = top - lightHeight - self.LIGHT_MARGIN
+                else:
+                    y = top + self.roadWidth + self.LIGHT_MARGIN
+
+                trafficLight = TrafficLight(self.parent)
+                trafficLight.place(x=x, y=y)
+                intersection.trafficLights[lightName] = trafficLight
+
+                offset = intersectionOffset
+                if lightName in self.CROSSING_LIGHT_NAMES:
+                    offset += halfCycle
+                self.signalController.addLight(trafficLight, plan, offset)
+
+
+    #returns the Intersection at the specified row and column
+    #raises a KeyError if there is no such intersection
+    def getIntersection(self, row: int, column: int) -> Intersection:
+        return self.intersections[(row, column)]
+
+    #returns a list of every Road of the network
+    def getRoads(self) -> List[Road]:
+        return self.verticalRoads + self.horizontalRoads
+
+    #returns a list of every TrafficLight of the network
+    def getTrafficLights(self) -> List[TrafficLight]:
+        return [
+            trafficLight
+            for intersection in self.intersections.values()
+            for trafficLight in intersection.trafficLights.values()
+            ]
+
+#end RoadNetwork
+
+
+#creates a RoadNetwork of rows x columns intersections in parent,
+#builds it, and returns it
+#as with build, the network's signalController still needs to be started
+#any other keyword arguments are passed to the RoadNetwork constructor
+def buildGrid(parent: BaseTkObject, rows: int, columns: int, **kwargs) -> RoadNetwork:
+    network = RoadNetwork(parent, rows, columns, **kwargs)
+    network.build()
+    return network
+
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
+from timer_wheel import TimerHandle, TimerWheel
+if TYPE_CHECKING:
+    from tkinter import Misc as BaseTkObject
+    from traffic_light import TrafficLight
+
+
+#SignalPhase
+#One step of a CyclePlan: a lamp that is on for a duration (in milliseconds)
+#lamp is one of TrafficLight.LAMP_NAMES, or None for all lamps off
+class SignalPhase():
+
+    def __init__(self, lamp: str, duration: int):
+        if duration <= 0:
+            errMsg = f"Phase duration must be greater than zero ({repr(duration)})"
+            raise ValueError(errMsg)
+
+        self.lamp = lamp
+        self.duration = duration
+
+    def __repr__(self):
+        return f"SignalPhase(lamp={repr(self.lamp)}, duration={self.duration})"
+
+#end SignalPhase
+
+
+#CyclePlan
+#A repeating sequence of SignalPhases
+#offset (in milliseconds) shifts where the cycle starts: a light following
+#a plan with an offset of 2000 is 2 seconds behind a light following the same
+#plan with no offset. Opposing directions of an intersection can share a plan
+#and differ only in their offset
+class CyclePlan():
+
+    #the phases of the default plan; red lasts as long as green and yellow
+    #together, so two lights half a cycle apart never show green at once
+    DEFAULT_PHASES = (
+        ("green", 5000),
+        ("yellow", 2000),
+        ("red", 7000)
+        )
+
+    def __init__(self, phases: Iterable[SignalPhase], offset: int = 0):
+
+        self.phases: Tuple[SignalPhase] = tuple(phases)
+        if len(self.phases) == 0:
+            raise ValueError("A CyclePlan needs at least one phase")
+
+        self.offset = offset
+
+        #the time (within the cycle) at which each phase starts
+        self._phaseStarts: List[int] = []
+        cycleLength = 0
+        for phase in self.phases:
+            self._phaseStarts.append(cycleLength)
+            cycleLength += phase.duration
+        self._cycleLength = cycleLength
+
+    #classmethod
+    #creates a plan from DEFAULT_PHASES with the specified offset
+    @classmethod
+    def createDefault(cls, offset: int = 0) -> CyclePlan:
+        return cls([SignalPhase(lamp, duration) for lamp, duration in cls.DEFAULT_PHASES], offset)
+
+    #returns the total duration of one cycle in milliseconds
+    def getCycleLength(self) -> int:
+        return self._cycleLength
+
+    #given a time in milliseconds (and an additional offset), returns a
+    #2-tuple (phaseIndex, timeRemaining) of the phase active at that time and
+    #the number of milliseconds until it ends
+    def getPhaseAt(self, time: int, extraOffset: int = 0) -> Tuple[int, int]:
+        from bisect import bisect_right
+
+        timeInCycle = (time - self.offset - extraOffset) % self._cycleLength
+        phaseIndex = bisect_right(self._phaseStarts, timeInCycle) - 1
+        phaseEnd = self._phaseStarts[phaseIndex] + self.phases[phaseIndex].duration
+        return (phaseIndex, phaseEnd - timeInCycle)
+
+#end CyclePlan
+
+
+#internal class
+#the state of one light controlled by a SignalController
+class _ControlledLight():
+
+    __slots__ = ("light", "plan", "offset", "phaseIndex", "timer")
+
+    def __init__(self, light: TrafficLight, plan: CyclePlan, offset: int):
+        self.light = light
+        self.plan = plan
+        self.offset = offset
+        #index of the active phase of the plan
+        self.phaseIndex = None
+        #TimerHandle of the next transition
+        self.timer: TimerHandle = None
+
+#end _ControlledLight
+
+
+#SignalController
+#Drives the lamps of any number of TrafficLights according to CyclePlans
+#Every pending phase transition is kept in one TimerWheel, and only a single
+#tkinter after() call is scheduled at a time, for the earliest transition;
+#when it fires, every transition that is due runs and the next after() is
+#scheduled. Scheduling and firing a transition are O(1), so the cost of
+#running the lights depends on the number of transitions rather than on
+#the number of lights
+#Times are in milliseconds. Transitions are rounded to the controller's
+#resolution, which is the length of one tick of its TimerWheel
+class SignalController():
+
+    #the default resolution (length of a wheel tick) in milliseconds
+    DEFAULT_RESOLUTION = 10
+
+    #constructor
+    #timerWidget is any tkinter widget; it is only used to schedule the timer
+    #it may be None if the controller is only advanced manually (see advance)
+    def __init__(self, timerWidget: BaseTkObject = None, resolution: int = None):
+
+        self.timerWidget = timerWidget
+
+        if resolution == None:
+            resolution = self.DEFAULT_RESOLUTION
+        if resolution <= 0:
+            errMsg = f"Resolution must be greater than zero ({repr(resolution)})"
+            raise ValueError(errMsg)
+        self.resolution = resolution
+
+        self._wheel = TimerWheel()
+
+        #dict that associates each controlled TrafficLight with its state
+        self._lights: Dict[TrafficLight, _ControlledLight] = {}
+
+        #the id of the pending after() call and the tick it was scheduled for
+        #or None if no call is pending
+        self._afterId = None
+        self._afterTick = None
+
+        #the perf_counter time that corresponds to tick 0, or None if not running
+        self._startTime = None
+
+        #milliseconds passed to advance that didn't add up to a whole tick yet
+        #these are carried over to the next call, so advancing by deltas that
+        #aren't multiples of the resolution (e.g. 16.67 ms at 60 Hz) doesn't
+        #make the lights fall behind
+        self._pendingMilliseconds = 0
+
+        #True while transitions are being run by advance
+        #the timer is only rescheduled once the whole advance is done,
+        #rather than after each transition
+        self._advancing = False
+
+
+    #returns the controller's current time in milliseconds
+    #this is the time of the last tick that was run, so it doesn't include
+    #time passed to advance that didn't add up to a whole tick yet
+    def getTime(self) -> int:
+        return self._wheel.currentTick * self.resolution
+
+    #internal method
+    #returns the tick at which a transition that is delay milliseconds away happens
+    def _getTickAfter(self, delay: int) -> int:
+        return self._wheel.currentTick + max(1, int(round(delay / self.resolution)))
+
+
+    #starts controlling a TrafficLight with the specified plan
+    #offset (in milliseconds) is added to the plan's offset for this light only
+    #the light is immediately set to the phase that is active at the current time
+    #if the light is already controlled, its plan and offset are replaced
+    def addLight(self, light: TrafficLight, plan: CyclePlan = None, offset: int = 0):
+
+        if plan == None:
+            plan = CyclePlan.createDefault()
+
+        self.removeLight(light)
+
+        controlledLight = _ControlledLight(light, plan, offset)
+        self._lights[light] = controlledLight
+
+        phaseIndex, timeRemaining = plan.getPhaseAt(self.getTime(), offset)
+        self._enterPhase(controlledLight, phaseIndex, timeRemaining)
+
+    #stops controlling a TrafficLight; its lamps are left as they are
+    #returns True if the light was controlled, False otherwise
+    def removeLight(self, light: TrafficLight) -> bool:
+        controlledLight = self._lights.pop(light, None)
+        if controlledLight == None:
+            return False
+        if controlledLight.timer != None:
+            self._wheel.cancel(controlledLight.timer)
+        return True
+
+    #returns a list of the TrafficLights controlled by this controller
+    def getLights(self) -> List[TrafficLight]:
+        return list(self._lights)
+
+    #returns the plan of a controlled TrafficLight
+    #raises a KeyError if the light isn't controlled
+    def getPlan(self, light: TrafficLight) -> CyclePlan:
+        return self._lights[light].plan
+
+    #returns the active SignalPhase of a controlled TrafficLight
+    #raises a KeyError if the light isn't controlled
+    def getPhase(self, light: TrafficLight) -> SignalPhase:
+        controlledLight = self._lights[light]
+        return controlledLight.plan.phases[controlledLight.phaseIndex]
+
+
+    #internal method
+    #sets a light's lamp for a phase and schedules the transition to the next phase
+    def _enterPhase(self, controlledLight: _ControlledLight, phaseIndex: int, duration: int):
+        controlledLight.phaseIndex = phaseIndex
+        controlledLight.light.setActiveLamp(controlledLight.plan.phases[phaseIndex].lamp)
+
+        controlledLight.timer = self._wheel.schedule(
+            self._getTickAfter(duration),
+            lambda: self._onTransition(controlledLight)
+            )
+        if not self._advancing:
+            self._scheduleTimer()
+
+    #internal method
+    #called by the TimerWheel when a light's phase ends
+    def _onTransition(self, controlledLight: _ControlledLight):
+        plan = controlledLight.plan
+        nextIndex = (controlledLight.phaseIndex + 1) % len(plan.phases)
+        self._enterPhase(controlledLight, nextIndex, plan.phases[nextIndex].duration)
+
+
+    #runs every transition due in the next milliseconds of controller time
+    #this works whether or not the controller is running, which makes
+    #it possible to drive the lights from another clock (or without tkinter)
+    #the part of milliseconds that doesn't make up a whole tick is carried
+    #over to the next call, so the controller keeps pace with the total time
+    #passed to advance
+    #returns the number of transitions that ran
+    def advance(self, milliseconds: float) -> int:
+        self._pendingMilliseconds += milliseconds
+        tickCount = int(self._pendingMilliseconds // self.resolution)
+        self._pendingMilliseconds -= tickCount * self.resolution
+        return self._advanceTo(self._wheel.currentTick + tickCount)
+
+    #internal method
+    #runs every transition due up to the specified tick, then reschedules the timer
+    def _advanceTo(self, targetTick: int) -> int:
+        self._advancing = True
+        try:
+            transitionCount = self._wheel.advance(targetTick)
+        finally:
+            self._advancing = False
+        self._scheduleTimer()
+        return transitionCount
+
+
+    #internal method
+    #makes sure a single after() call is pending for the earliest transition
+    #an existing call is kept if it is for the same (or an earlier) tick
+    def _scheduleTimer(self):
+        from time import perf_counter
+
+        if self._startTime == None or self.timerWidget == None:
+            return
+
+        nextTick = self._wheel.getNextDeadline()
+        if nextTick == None:
+            return
+        if self._afterId != None:
+            if self._afterTick <= nextTick:
+                return
+            self.timerWidget.after_cancel(self._afterId)
+
+        elapsedMs = (perf_counter() - self._startTime) * 1000
+        delayMs = max(1, int(round(nextTick * self.resolution - elapsedMs)))
+        self._afterTick = nextTick
+        self._afterId = self.timerWidget.after(delayMs, self._onTimer)
+
+    #internal method
+    #called by the tkinter timer; runs every transition that is due
+    #according to the time that actually passed, then schedules the next timer
+    def _onTimer(self):
+        from time import perf_counter
+
+        self._afterId = None
+        self._afterTick = None
+
+        elapsedMs = (perf_counter() - self._startTime) * 1000
+        self._advanceTo(int(elapsedMs // self.resolution))
+
+    #starts running transitions in real time, using timerWidget to schedule them
+    #controller time continues from where it was
+    #does nothing if the controller is already running
+    #raises a ValueError if there is no timerWidget
+    def start(self):
+        from time import perf_counter
+
+        if self.isRunning():
+            return
+        if self.timerWidget == None:
+            raise ValueError("A SignalController needs a timerWidget to run in real time")
+
+        #time left over from advance counts as time that already passed
+        self._startTime = perf_counter() - (self.getTime() + self._pendingMilliseconds) / 1000
+        self._pendingMilliseconds = 0
+        self._scheduleTimer()
+
+    #stops running transitions in real time; lamps are left as they are
+    def stop(self):
+        if self._afterId != None:
+            self.timerWidget.after_cancel(self._afterId)
+            self._afterId = None
+            self._afterTick = None
+        self._startTime = None
+
+    #returns True if the controller is running in real time, False otherwise
+    def isRunning(self) -> bool:
+        return self._startTime != None
+
+#end SignalController
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
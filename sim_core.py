@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Tuple
+from geometry import Rectangle
+from collision import Collision
+from spatial_hash import SpatialHash
+from sweep_and_prune import SweepAndPrune
+
+#Simulation Core
+#A pure Python model of the simulation that doesn't depend on tkinter
+#Positions, dimensions, collisions, and drives are all handled here, so a
+#simulation can run without a display (and with many more entities than there
+#could be widgets). The Vehicle and Road widgets can be used as views of
+#these models; see the model parameter of their constructors
+#Units match the widgets: coordinates and dimensions are in pixels
+#and time is in seconds. Coordinates are floats; views round them when drawing
+
+
+#SimBody
+#A Rectangle that can collide with other SimBodies
+#Collisions use the same Collision class (and math) as Colliders do
+class SimBody(Rectangle):
+
+    def __init__(self,
+        originX: float = 0.0,
+        originY: float = 0.0,
+        width: float = 1.0,
+        height: float = 1.0
+        ):
+        super().__init__(originX, originY, width, height)
+
+    #returns two ranges as 2-tuples (start, stop)
+    #the first range is the x range of the object, the second is the y range
+    #this matches Collider.getDimensionRanges
+    def getDimensionRanges(self) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        return (
+            (self.originX, self.originX + self.width),
+            (self.originY, self.originY + self.height)
+            )
+
+    #creates a new Collision object involving this SimBody and another one
+    #Collisions between SimBodies can't be bound, as there are no events to bind to
+    def getCollisionWith(self, otherObj: SimBody) -> Collision:
+        if isinstance(otherObj, SimBody):
+            return Collision(self, otherObj)
+        else:
+            raise TypeError(f"{otherObj} is not a SimBody")
+
+    #moves this SimBody so its origin is at the specified coordinates
+    def setPos(self, xPos: float, yPos: float):
+        self.originX = xPos
+        self.originY = yPos
+
+    #resizes this SimBody
+    def setDimensions(self, width: float, height: float):
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return self.__class__.__name__ + self.__str__()
+
+#end SimBody
+
+
+#SimVehicle
+#Model of a vehicle that can "drive" to a destination
+#Drives behave the same way as Vehicle drives: each axis moves towards the
+#destination independently, by at most speed * time per step, and
+#the destination is never overshot
+class SimVehicle(SimBody):
+
+    DEFAULT_WIDTH = 50
+    DEFAULT_HEIGHT = 50
+
+    #The default speed in pixels per second
+    #this is the same as the default Vehicle speed
+    #(1 pixel every 16 milliseconds)
+    DEFAULT_SPEED = 1000 / 16
+
+    def __init__(self,
+        originX: float = 0.0,
+        originY: float = 0.0,
+        width: float = None,
+        height: float = None,
+        speed: float = None
+        ):
+
+        #set default dimensions and speed if none were provided
+        if width == None:
+            width = self.DEFAULT_WIDTH
+        if height == None:
+            height = self.DEFAULT_HEIGHT
+        if speed == None:
+            speed = self.DEFAULT_SPEED
+
+        super().__init__(originX, originY, width, height)
+
+        self.speed = speed
+
+        #init _destination to None
+        #this will be set to a 2-tuple (x, y) while driving
+        #being set to None indicates no active movement
+        self._destination = None
+
+        #list of functions to call when a drive completes
+        #each is called with this SimVehicle as the only argument
+        self._driveCompleteListeners: List[Callable[[SimVehicle], None]] = []
+
+
+    #adds a function to be called when a drive completes
+    #this is the headless equivalent of binding to <<DriveComplete>>
+    def addDriveCompleteListener(self, listener: Callable[[SimVehicle], None]):
+        self._driveCompleteListeners.append(listener)
+
+    #removes a function added with addDriveCompleteListener
+    def removeDriveCompleteListener(self, listener: Callable[[SimVehicle], None]):
+        self._driveCompleteListeners.remove(listener)
+
+
+    #start driving to the specified destination
+    #the drive progresses each time advance is called
+    #raises a ValueError if a drive is already active
+    def driveToPos(self, xPos: float, yPos: float):
+        if self.isDriving():
+            raise ValueError("Cannot start driving when a drive operation is already active")
+        self._destination = (xPos, yPos)
+
+    #drive in a specified cardinal direction
+    #by a specified distance (in pixels)
+    #valid directions are the strings:
+    #"up", "down", "left", and "right"
+    def driveDistance(self, distance: float, direction: str):
+
+        x, y = self.getPos()
+
+        if direction == "up":
+            y -= distance
+        elif direction == "down":
+            y += distance
+        elif direction == "left":
+            x -= distance
+        elif direction == "right":
+            x += distance
+        else:
+            #if direction is not one of the above four strings,
+            #raise a ValueError
+            raise ValueError(f"Invalid direction: {direction}")
+
+        self.driveToPos(x, y)
+
+    #methods for driving in cardinal directions by a distance
+    #all four call driveDistance internally and will behave similarly
+    def driveUp(self, distance: float):
+        self.driveDistance(distance, "up")
+
+    def driveDown(self, distance: float):
+        self.driveDistance(distance, "down")
+
+    def driveLeft(self, distance: float):
+        self.driveDistance(distance, "left")
+
+    def driveRight(self, distance: float):
+        self.driveDistance(distance, "right")
+
+    #returns True if a drive is currently active; False otherwise
+    def isDriving(self) -> bool:
+        return self._destination != None
+
+    #returns the destination of the active drive as
+    #a 2-tuple (x, y), or None if no drive is active
+    def getDestination(self) -> Tuple[float, float]:
+        return self._destination
+
+    #stop the active drive, if there is one
+    def abortDrive(self):
+        self._destination = None
+
+
+    #advances the active drive by the specified amount of time (in seconds)
+    #returns True if the drive completed during this step, False otherwise
+    #drive complete listeners are called before this returns
+    def advance(self, deltaTime: float) -> bool:
+
+        if self._destination == None:
+            return False
+
+        destX, destY = self._destination
+        distance = self.speed * deltaTime
+
+        #move each axis towards the destination; the min expressions
+        #ensure that the destination is never overshot
+        if destX > self.originX:
+            self.originX = min(destX, self.originX + distance)
+        elif destX < self.originX:
+            self.originX = max(destX, self.originX - distance)
+
+        if destY > self.originY:
+            self.originY = min(destY, self.originY + distance)
+        elif destY < self.originY:
+            self.originY = max(destY, self.originY - distance)
+
+        #if the destination has been reached, end the drive
+        if self.originX == destX and self.originY == destY:
+            self._destination = None
+            for listener in list(self._driveCompleteListeners):
+                listener(self)
+            return True
+
+        return False
+
+#end SimVehicle
+
+
+#SimRoad
+#Model of a road; the equivalent of the Road widget
+class SimRoad(SimBody):
+
+    def __init__(self,
+        originX: float = 0.0,
+        originY: float = 0.0,
+        width: float = 100,
+        height: float = 100,
+        horizontal: bool = False
+        ):
+        super().__init__(originX, originY, width, height)
+        self.horizontal = horizontal
+
+#end SimRoad
+
+
+#SimWorld
+#A collection of SimBodies that can be stepped forward in time
+#Vehicles are advanced in the order they were added, so runs are deterministic
+class SimWorld():
+
+    def __init__(self, cellSize: int = None):
+
+        #lists of bodies, by kind, in the order they were added
+        self.vehicles: List[SimVehicle] = []
+        self.roads: List[SimRoad] = []
+        self.bodies: List[SimBody] = []
+
+        #total simulated time in seconds
+        self.time = 0.0
+
+        #broad phase structures used for collision queries
+        self._spatialHash = SpatialHash(cellSize)
+        self._sweepAndPrune = SweepAndPrune()
+
+
+    #adds a SimBody (or subclass) to this world
+    #returns the body so this can be used inline
+    def addBody(self, body: SimBody) -> SimBody:
+
+        self.bodies.append(body)
+        if isinstance(body, SimVehicle):
+            self.vehicles.append(body)
+        elif isinstance(body, SimRoad):
+            self.roads.append(body)
+
+        self._spatialHash.insert(body, body.getDimensionRanges())
+        return body
+
+    #removes a SimBody from this world
+    #raises a ValueError if the body isn't in this world
+    def removeBody(self, body: SimBody):
+
+        self.bodies.remove(body)
+        if isinstance(body, SimVehicle):
+            self.vehicles.remove(body)
+        elif isinstance(body, SimRoad):
+            self.roads.remove(body)
+
+        self._spatialHash.remove(body)
+
+    #convenience methods that create a body, add it, and return it
+    def addVehicle(self, *args, **kwargs) -> SimVehicle:
+        return self.addBody(SimVehicle(*args, **kwargs))
+
+    def addRoad(self, *args, **kwargs) -> SimRoad:
+        return self.addBody(SimRoad(*args, **kwargs))
+
+
+    #records that a body moved or resized outside of step
+    #(e.g. with setPos), so collision queries see its new position
+    def updateBody(self, body: SimBody):
+        self._spatialHash.update(body, body.getDimensionRanges())
+
+
+    #advances every driving vehicle by the specified amount of time (in seconds)
+    #returns a list of the vehicles whose drives completed during this step
+    def step(self, deltaTime: float) -> List[SimVehicle]:
+
+        completed = []
+        for vehicle in self.vehicles:
+            if not vehicle.isDriving():
+                continue
+            if vehicle.advance(deltaTime):
+                completed.append(vehicle)
+            self._spatialHash.update(vehicle, vehicle.getDimensionRanges())
+
+        self.time += deltaTime
+        return completed
+
+    #advances the world by totalTime seconds in fixed steps of deltaTime seconds
+    #returns a list of the vehicles whose drives completed, in order of completion
+    def run(self, totalTime: float, deltaTime: float) -> List[SimVehicle]:
+
+        completed = []
+        steps = int(round(totalTime / deltaTime))
+        for _ in range(steps):
+            completed += self.step(deltaTime)
+        return completed
+
+
+    #returns a list of Collision objects; one for
+    #each body in this world that overlaps the specified body
+    #only bodies that share a cell of the world's spatial hash are checked
+    def getCollisions(self, body: SimBody) -> List[Collision]:
+
+        ranges = body.getDimensionRanges()
+        foundCollisions = []
+        for other in self._spatialHash.query(ranges):
+            if other is body:
+                continue
+            newCollision = body.getCollisionWith(other)
+            if newCollision.hasCollisionArea():
+                foundCollisions.append(newCollision)
+        return foundCollisions
+
+    #similar to getCollisions, but only returns the bodies that collide
+    def getCollidingBodies(self, body: SimBody) -> List[SimBody]:
+        return [collision.collidedWith for collision in self.getCollisions(body)]
+
+    #returns a list of Collision objects, one for each
+    #overlapping pair of bodies in this world
+    def detectAllCollisions(self) -> List[Collision]:
+        return self._sweepAndPrune.detectAllCollisions(self.bodies)
+
+    #returns a list of Collision objects, one for each pair of roads that intersect
+    def getRoadIntersections(self) -> List[Collision]:
+        return SweepAndPrune().detectAllCollisions(self.roads)
+
+    #returns a dict that associates each body with a 4-tuple
+    #(x, y, width, height) of its current geometry
+    #this is a cheap way for a view or a recorder to read the whole world at once
+    def getSnapshot(self) -> Dict[SimBody, Tuple[float, float, float, float]]:
+        return {body: (body.originX, body.originY, body.width, body.height) for body in self.bodies}
+
+#end SimWorld
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
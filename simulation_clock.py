@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Callable, Dict, List, TYPE_CHECKING
+from frame_stats import FrameStats, enableGlobalStats, getGlobalStats
+if TYPE_CHECKING:
+    from tkinter import Misc as BaseTkObject
+    from vehicle import Vehicle
+    from collision_manager import CollisionManager
+
+#SimulationClock
+#A fixed timestep scheduler that advances the whole simulation
+#from a single tkinter timer. Rather than each Vehicle scheduling its own
+#after() call, every registered Vehicle, light, and collision check is
+#advanced from one callback per tick, so the timer overhead depends
+#on the tick rate rather than the number of Vehicles
+#Each tick advances the simulation by exactly 1/tickRate seconds, and
+#subscribers are called in a fixed order:
+#   all vehicles (in the order they were added), then
+#   all lights, then
+#   all collision checks, then
+#   anything else (the "late" phase)
+#so runs are deterministic no matter how late the timer fires
+class SimulationClock():
+
+    #names of the phases of a tick, in the order they run
+    VEHICLE_PHASE = "vehicles"
+    LIGHT_PHASE = "lights"
+    COLLISION_PHASE = "collisions"
+    LATE_PHASE = "late"
+    PHASES = (VEHICLE_PHASE, LIGHT_PHASE, COLLISION_PHASE, LATE_PHASE)
+
+    #the default number of ticks per second
+    DEFAULT_TICK_RATE = 60
+
+    #constructor
+    #timerWidget is any tkinter widget; it is only used to schedule the timer
+    #tickRate is the number of ticks per second
+    def __init__(self, timerWidget: BaseTkObject, tickRate: float = None):
+
+        self.timerWidget = timerWidget
+
+        self._tickRate = None
+        self.setTickRate(tickRate if tickRate != None else self.DEFAULT_TICK_RATE)
+
+        #dict that associates each phase name with
+        #a list of functions to call during that phase
+        #each function is called with the tick's time step (in seconds)
+        self._subscribers: Dict[str, List[Callable[[float], None]]] = {phase: [] for phase in self.PHASES}
+
+        #list of Vehicles advanced during the vehicle phase
+        self._vehicles: List[Vehicle] = []
+
+        #number of ticks run so far, and the simulated time that they add up to
+        self.tickCount = 0
+        self.time = 0.0
+
+        #id of the pending after() call, or None if no call is pending
+        #(while the clock is stopped, or while a timer tick is running)
+        self._afterId = None
+
+        #True from start until stop; a timer tick only schedules the next
+        #one if this is still set, so stop can be called from within a tick
+        self._running = False
+
+        #the perf_counter time at which the next tick is due
+        #this is used to keep the tick rate steady when the timer fires late
+        self._nextTickTime = None
+
+        #the perf_counter time at which the previous timer tick ran
+        #this is only used to record frame stats
+        self._lastTimerTime = None
+
+
+    #returns the number of ticks per second
+    def getTickRate(self) -> float:
+        return self._tickRate
+
+    #sets the number of ticks per second
+    #raises a ValueError if the tick rate is not greater than zero
+    #this takes effect from the next tick
+    def setTickRate(self, tickRate: float):
+        if tickRate <= 0:
+            errMsg = f"Tick rate must be greater than zero ({repr(tickRate)})"
+            raise ValueError(errMsg)
+        self._tickRate = tickRate
+
+    #returns the simulated time covered by one tick, in seconds
+    def getTimeStep(self) -> float:
+        return 1 / self._tickRate
+
+
+    #adds a function to call once per tick during the specified phase
+    #the function is called with the time step of the tick (in seconds)
+    #raises a ValueError if the phase doesn't exist
+    def subscribe(self, callback: Callable[[float], None], phase: str = LATE_PHASE):
+        if phase not in self._subscribers:
+            errMsg = f"{phase} is not a valid phase! Valid phases: {self.PHASES}"
+            raise ValueError(errMsg)
+        self._subscribers[phase].append(callback)
+
+    #removes a function added with subscribe
+    #returns True if the function was subscribed, False otherwise
+    def unsubscribe(self, callback: Callable[[float], None]) -> bool:
+        for callbacks in self._subscribers.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+                return True
+        return False
+
+
+    #adds a Vehicle to be advanced by this clock
+    #while registered, the Vehicle's drives are advanced by the clock
+    #instead of by its own timer
+    def addVehicle(self, vehicle: Vehicle):
+        if vehicle in self._vehicles:
+            return
+        self._vehicles.append(vehicle)
+        vehicle.clock = self
+
+    #removes a Vehicle from this clock
+    #any active drive is aborted, as nothing would advance it anymore
+    def removeVehicle(self, vehicle: Vehicle):
+        if vehicle not in self._vehicles:
+            return
+        self._vehicles.remove(vehicle)
+        vehicle.abortDrive()
+        vehicle.clock = None
+
+    #returns a list of the Vehicles registered with this clock
+    def getVehicles(self) -> List[Vehicle]:
+        return list(self._vehicles)
+
+    #adds a CollisionManager to be updated once per tick during the collision phase
+    #the manager's autoUpdate is turned off, as the clock takes its place
+    def addCollisionManager(self, manager: CollisionManager):
+        manager.autoUpdate = False
+        self.subscribe(lambda deltaTime: manager.update(), self.COLLISION_PHASE)
+
+
+    #runs a single tick immediately
+    #this works whether or not the clock is running, which
+    #makes it possible to step through a simulation manually
+    #the time spent here is recorded as tick time in the global FrameStats, if enabled
+    def tick(self):
+        from time import perf_counter
+
+        globalStats = getGlobalStats()
+        if globalStats != None:
+            startTime = perf_counter()
+
+        self._runTick()
+
+        if globalStats != None:
+            globalStats.record(FrameStats.TICK_TIME, (perf_counter() - startTime) * 1000)
+
+    #internal method
+    #advances every vehicle and runs every subscriber for one tick
+    def _runTick(self):
+        deltaTime = self.getTimeStep()
+
+        #vehicles are advanced first, in the order they were added
+        for vehicle in self._vehicles:
+            vehicle.clockStep(deltaTime)
+
+        #then each phase's subscribers, in phase order
+        for phase in self.PHASES:
+            for callback in self._subscribers[phase]:
+                callback(deltaTime)
+
+        self.tickCount += 1
+        self.time += deltaTime
+
+
+    #internal method
+    #called by the tkinter timer; runs a tick and schedules the next one
+    def _onTimer(self):
+        from time import perf_counter
+
+        self._afterId = None
+
+        #record how long it has been since the last tick, compared to the
+        #tick interval, if stats are enabled
+        globalStats = getGlobalStats()
+        if globalStats != None:
+            timerTime = perf_counter()
+            if self._lastTimerTime != None:
+                globalStats.recordFrame((timerTime - self._lastTimerTime) * 1000, self.getTimeStep() * 1000)
+            self._lastTimerTime = timerTime
+
+        self.tick()
+
+        #schedule the next tick relative to when this one was due rather than
+        #when it actually ran, so a late timer doesn't slow the clock down
+        tickInterval = self.getTimeStep()
+        self._nextTickTime += tickInterval
+        now = perf_counter()
+
+        #if the clock has fallen more than a tick behind (e.g. the event loop
+        #was blocked), don't try to catch up; resume from now instead
+        if self._nextTickTime < now - tickInterval:
+            self._nextTickTime = now
+
+        #don't reschedule if the tick stopped the clock, or if it
+        #stopped and restarted it (which already scheduled a tick)
+        if not self._running or self._afterId != None:
+            return
+
+        delayMs = max(1, int(round((self._nextTickTime - now) * 1000)))
+        self._afterId = self.timerWidget.after(delayMs, self._onTimer)
+
+    #starts running ticks at the tick rate
+    #does nothing if the clock is already running
+    def start(self):
+        from time import perf_counter
+
+        if self.isRunning():
+            return
+
+        self._running = True
+        self._nextTickTime = perf_counter()
+        delayMs = max(1, int(round(self.getTimeStep() * 1000)))
+        self._nextTickTime += delayMs / 1000
+        self._afterId = self.timerWidget.after(delayMs, self._onTimer)
+
+    #stops running ticks
+    #this can be called from within a tick (e.g. by a subscriber)
+    def stop(self):
+        self._running = False
+        if self._afterId != None:
+            self.timerWidget.after_cancel(self._afterId)
+            self._afterId = None
+        self._lastTimerTime = None
+
+    #returns True if the clock is running, False otherwise
+    def isRunning(self) -> bool:
+        return self._running
+
+
+    #starts recording frame stats for this clock's ticks and for each
+    #registered Vehicle (see frame_stats.py)
+    #Vehicles added afterwards need their own call to enableFrameStats
+    #returns the global FrameStats, which the ticks are recorded in
+    def enableFrameStats(self, capacity: int = None) -> FrameStats:
+        for vehicle in self._vehicles:
+            vehicle.enableFrameStats(capacity)
+        return enableGlobalStats(capacity)
+
+    #returns a dict of percentile summaries of the recorded frame stats
+    #"global" holds the global stats (see FrameStats.stats), or None if disabled
+    #"vehicles" associates each registered Vehicle that has stats enabled with its own
+    def stats(self) -> dict:
+        globalStats = getGlobalStats()
+        return {
+            "global": globalStats.stats() if globalStats != None else None,
+            "vehicles": {
+                vehicle: vehicle.frameStats.stats()
+                for vehicle in self._vehicles if vehicle.frameStats != None
+                }
+            }
+
+#end SimulationClock
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+#SpatialHash
+#A uniform grid that buckets objects by the cells their
+#dimension ranges cover. This is used as a "broad phase" for
+#collision detection: instead of checking an object against every
+#other object, only objects that share at least one cell with it
+#need to be checked
+#Objects are stored by their dimension ranges ((x0, x1), (y0, y1)),
+#the same format returned by Collider.getDimensionRanges
+#SpatialHash doesn't depend on tkinter; any hashable object can be stored
+class SpatialHash():
+
+    #the default width and height of each cell in pixels
+    #this should be roughly the size of a typical object;
+    #much smaller cells mean objects cover many cells,
+    #much larger cells mean many objects share each cell
+    DEFAULT_CELL_SIZE = 64
+
+    def __init__(self, cellSize: int = None):
+
+        #use the default cell size if none was provided
+        if cellSize == None:
+            cellSize = self.DEFAULT_CELL_SIZE
+
+        #raise a ValueError if the cell size isn't usable
+        if cellSize <= 0:
+            errMsg = f"Cell size must be greater than zero ({repr(cellSize)})"
+            raise ValueError(errMsg)
+
+        self.cellSize = cellSize
+
+        #dict that associates each (column, row) cell
+        #with the set of objects that cover it
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+
+        #dict that associates each stored object with the
+        #cell span it was last inserted at as a 4-tuple
+        #(firstColumn, lastColumn, firstRow, lastRow)
+        self._objectSpans: Dict[Hashable, Tuple[int, int, int, int]] = {}
+
+
+    #internal method
+    #given dimension ranges ((x0, x1), (y0, y1)), returns a 4-tuple
+    #(firstColumn, lastColumn, firstRow, lastRow) of the cells they cover
+    #ranges are inclusive at both ends (matching Collision.getRangeOverlap)
+    #so an object whose edge lies exactly on a cell border covers both cells
+    def _getCellSpan(self, ranges: Tuple[Tuple[int, int], Tuple[int, int]]) -> Tuple[int, int, int, int]:
+
+        (xStart, xEnd), (yStart, yEnd) = ranges
+
+        #order each range the same way Collision.getRangeOverlap does
+        if xStart > xEnd:
+            xStart, xEnd = xEnd, xStart
+        if yStart > yEnd:
+            yStart, yEnd = yEnd, yStart
+
+        #floor division maps a coordinate to its cell index;
+        #this also works for negative coordinates
+        cellSize = self.cellSize
+        return (
+            int(xStart // cellSize),
+            int(xEnd // cellSize),
+            int(yStart // cellSize),
+            int(yEnd // cellSize)
+            )
+
+
+    #adds an object to the grid using its dimension ranges
+    #if the object is already stored, it is moved to the new cells instead
+    def insert(self, obj: Hashable, ranges: Tuple[Tuple[int, int], Tuple[int, int]]):
+
+        newSpan = self._getCellSpan(ranges)
+
+        #if the object is already in the same cells, there is nothing to do
+        #this is the common case for objects that only moved a few pixels
+        oldSpan = self._objectSpans.get(obj)
+        if oldSpan == newSpan:
+            return
+
+        #remove the object from its old cells before adding it to the new ones
+        if oldSpan != None:
+            self.remove(obj)
+
+        firstCol, lastCol, firstRow, lastRow = newSpan
+        for col in range(firstCol, lastCol + 1):
+            for row in range(firstRow, lastRow + 1):
+                self._cells.setdefault((col, row), set()).add(obj)
+
+        self._objectSpans[obj] = newSpan
+
+    #alias for insert that better describes moving an existing object
+    def update(self, obj: Hashable, ranges: Tuple[Tuple[int, int], Tuple[int, int]]):
+        self.insert(obj, ranges)
+
+
+    #removes an object from the grid
+    #returns True if the object was stored, False if it was not
+    def remove(self, obj: Hashable) -> bool:
+
+        span = self._objectSpans.pop(obj, None)
+        if span == None:
+            return False
+
+        firstCol, lastCol, firstRow, lastRow = span
+        for col in range(firstCol, lastCol + 1):
+            for row in range(firstRow, lastRow + 1):
+                cell = self._cells.get((col, row))
+                if cell == None:
+                    continue
+                cell.discard(obj)
+                #drop empty cells so the dict doesn't grow
+                #with every cell an object has ever visited
+                if len(cell) == 0:
+                    del self._cells[(col, row)]
+
+        return True
+
+
+    #returns a list of every stored object that shares at least one cell
+    #with the provided dimension ranges; each object appears once
+    #note that sharing a cell does not guarantee an overlap;
+    #candidates still need an exact check (e.g. with a Collision)
+    def query(self, ranges: Tuple[Tuple[int, int], Tuple[int, int]]) -> List[Hashable]:
+
+        firstCol, lastCol, firstRow, lastRow = self._getCellSpan(ranges)
+
+        #the fast path of a range that covers only one cell
+        #doesn't need to deduplicate anything
+        if firstCol == lastCol and firstRow == lastRow:
+            return list(self._cells.get((firstCol, firstRow), ()))
+
+        found = {}
+        for col in range(firstCol, lastCol + 1):
+            for row in range(firstRow, lastRow + 1):
+                cell = self._cells.get((col, row))
+                if cell == None:
+                    continue
+                #a dict is used to drop objects that
+                #cover more than one of the queried cells
+                for obj in cell:
+                    found[obj] = None
+
+        return list(found)
+
+
+    #returns True if the object is stored in the grid
+    def __contains__(self, obj: Hashable) -> bool:
+        return obj in self._objectSpans
+
+    #returns the number of stored objects
+    def __len__(self) -> int:
+        return len(self._objectSpans)
+
+    #returns an iterable of every stored object
+    def getObjects(self) -> Iterable[Hashable]:
+        return self._objectSpans.keys()
+
+    #removes every object from the grid
+    def clear(self):
+        self._cells.clear()
+        self._objectSpans.clear()
+
+    def __repr__(self):
+        return f"SpatialHash({repr(self.cellSize)})"
+
+#end SpatialHash
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
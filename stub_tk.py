@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+
+import tkinter
+from itertools import count
+from re import findall
+
+
+#Stub Tk
+#A stand-in for the Tcl interpreter behind tkinter, so that widgets can be
+#created and exercised on a machine with no display (e.g. when benchmarking)
+#Only the commands used by this project's widgets are handled: creating
+#widgets, winfo geometry queries, bind, event generate, place, after,
+#and the canvas item commands. Geometry managers other than place,
+#and drawing itself, do nothing. Anything unknown returns an empty string
+#Events and timers don't run on their own; call update to deliver queued
+#events and idle callbacks, and advance to let simulated time pass
+
+
+#StubInterpreter
+#Records the state of each widget as plain Python data and answers
+#the calls tkinter makes with it
+class StubInterpreter():
+
+    def __init__(self):
+
+        #dict that associates each widget path with its state
+        #each state is a dict with keys:
+        #   config    the widget's options
+        #   geometry  a list [x, y, width, height]
+        #   bindings  a dict that associates event sequences with Tcl scripts
+        #   items     a dict that associates canvas item ids with the item's state
+        self.widgets = {".": self._createWidgetState({})}
+
+        #Tcl commands created by tkinter (callbacks), by name
+        self._commands = {}
+
+        #queue of pending events and idle callbacks, in the order they were added
+        #each entry is a 2-tuple (kind, payload)
+        self._queue = []
+
+        #list of pending timers as 4-tuples (due time, sequence number, id, command)
+        self._timers = []
+
+        #the simulated time in milliseconds, moved forward by advance
+        self.now = 0
+
+        self._sequence = count()
+        self._itemIds = count(1)
+
+        #number of calls made to the interpreter
+        #this is a rough measure of how much work was sent to Tk
+        self.callCount = 0
+
+
+    #internal staticmethod
+    #returns a new widget state with the provided options
+    @staticmethod
+    def _createWidgetState(config: dict) -> dict:
+        width = int(config.get("width") or 1)
+        height = int(config.get("height") or 1)
+        return {
+            "config": config,
+            "geometry": [0, 0, width, height],
+            "bindings": {},
+            "items": {}
+            }
+
+
+    #methods tkinter expects from an interpreter
+    def getint(self, value):
+        return int(value)
+
+    def getdouble(self, value):
+        return float(value)
+
+    def getboolean(self, value):
+        if isinstance(value, str):
+            return value in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def splitlist(self, value):
+        if isinstance(value, (tuple, list)):
+            return tuple(value)
+        return tuple(str(value).split())
+
+    def split(self, value):
+        return self.splitlist(value)
+
+    def createcommand(self, name, function):
+        self._commands[name] = function
+
+    def deletecommand(self, name):
+        self._commands.pop(name, None)
+
+    def globalsetvar(self, *args):
+        pass
+
+    def globalgetvar(self, *args):
+        return ""
+
+    def wantobjects(self):
+        return 1
+
+
+    #handles a Tcl command sent by tkinter
+    def call(self, *args):
+
+        #tkinter sometimes passes the whole command as one tuple
+        if len(args) == 1 and isinstance(args[0], tuple):
+            args = args[0]
+
+        self.callCount += 1
+        command = args[0]
+
+        if command in ("canvas", "frame", "button", "toplevel", "label"):
+            return self._createWidget(args[1], args[2:])
+        if command == "winfo":
+            return self._winfo(args[1], args[2])
+        if command == "bind":
+            return self._bind(args[1], args[2], args[3] if len(args) > 3 else None)
+        if command == "event" and args[1] == "generate":
+            self._queue.append(("event", (args[2], args[3])))
+            return ""
+        if command == "place":
+            return self._place(args[1:])
+        if command == "after":
+            return self._after(args[1:])
+        if command == "destroy":
+            for path in args[1:]:
+                #<Destroy> is delivered right away, to the widget and each of
+                #its descendants that still exist, as Tk does
+                destroyedPaths = [
+                    widgetPath for widgetPath in self.widgets
+                    if widgetPath == path or widgetPath.startswith(path + ".")
+                    ]
+                for widgetPath in destroyedPaths:
+                    self._dispatchEvent(widgetPath, "<Destroy>")
+                for widgetPath in destroyedPaths:
+                    self.widgets.pop(widgetPath, None)
+            return ""
+        if command.startswith("."):
+            return self._widgetCommand(command, args[1], args[2:])
+        if command in self._commands:
+            return self._commands[command](*args[1:])
+
+        #grid, pack, wm, and anything else not handled above do nothing
+        return ""
+
+
+    #internal method
+    #handles widget creation commands
+    def _createWidget(self, path: str, options: tuple) -> str:
+        config = {"borderwidth": 0}
+        for name, value in zip(options[::2], options[1::2]):
+            config[name.lstrip("-")] = value
+        self.widgets[path] = self._createWidgetState(config)
+        return path
+
+    #internal method
+    #handles winfo commands
+    def _winfo(self, subcommand: str, path: str):
+        if subcommand == "exists":
+            return int(path in self.widgets)
+        if subcommand == "children":
+            parentPrefix = path if path != "." else ""
+            return tuple(
+                childPath for childPath in self.widgets
+                if childPath != path and childPath.rsplit(".", 1)[0] == parentPrefix
+                )
+
+        geometry = self.widgets[path]["geometry"]
+        geometryIndex = {"x": 0, "y": 1, "width": 2, "height": 3}.get(subcommand)
+        if geometryIndex != None:
+            return geometry[geometryIndex]
+        return 0
+
+    #internal method
+    #handles bind commands; scripts starting with + are appended
+    def _bind(self, path: str, sequence: str, script: str = None):
+        bindings = self.widgets[path]["bindings"]
+        if script == None:
+            return bindings.get(sequence, "")
+        if script.startswith("+"):
+            bindings[sequence] = bindings.get(sequence, "") + "\n" + script[1:]
+        else:
+            bindings[sequence] = script
+        return ""
+
+    #internal method
+    #handles place commands; x, y, width, and height are applied
+    #moving a widget queues a <Configure> event, as it would in Tk
+    def _place(self, args: tuple):
+        if args[0] != "configure":
+            return ""
+        path = args[1]
+        options = dict(zip(args[2::2], args[3::2]))
+
+        masterPath = path.rsplit(".", 1)[0] or "."
+        borderWidth = int(self.widgets[masterPath]["config"].get("borderwidth", 0))
+
+        geometry = self.widgets[path]["geometry"]
+        if "-x" in options:
+            geometry[0] = int(options["-x"]) + borderWidth
+        if "-y" in options:
+            geometry[1] = int(options["-y"]) + borderWidth
+        if "-width" in options:
+            geometry[2] = int(options["-width"])
+        if "-height" in options:
+            geometry[3] = int(options["-height"])
+
+        self._queue.append(("event", (path, "<Configure>")))
+        return ""
+
+    #internal method
+    #handles after commands (timers, idle callbacks, cancel, and info)
+    def _after(self, args: tuple):
+        if args[0] == "idle":
+            afterId = f"after#{next(self._sequence)}"
+            self._queue.append(("idle", (afterId, args[1])))
+            return afterId
+
+        if args[0] == "cancel":
+            afterId = args[1]
+            self._timers = [timer for timer in self._timers if timer[2] != afterId]
+            self._queue = [entry for entry in self._queue if not (entry[0] == "idle" and entry[1][0] == afterId)]
+            return ""
+
+        if args[0] == "info":
+            #with an id, returns the timer's command and type; otherwise every pending id
+            if len(args) > 1:
+                for timer in self._timers:
+                    if timer[2] == args[1]:
+                        return (timer[3], "timer")
+                for entry in self._queue:
+                    if entry[0] == "idle" and entry[1][0] == args[1]:
+                        return (entry[1][1], "idle")
+                return ()
+            return tuple(timer[2] for timer in self._timers)
+
+        afterId = f"after#{next(self._sequence)}"
+        self._timers.append((self.now + int(args[0]), next(self._sequence), afterId, args[1]))
+        return afterId
+
+
+    #internal method
+    #handles commands sent to a widget (cget, configure, and canvas commands)
+    def _widgetCommand(self, path: str, subcommand: str, args: tuple):
+        widget = self.widgets.get(path)
+        if widget == None:
+            #the same error Tk raises for a destroyed widget
+            raise tkinter.TclError(f'invalid command name "{path}"')
+        items = widget["items"]
+
+        if subcommand == "cget":
+            value = widget["config"].get(args[0].lstrip("-"), "")
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return value
+
+        if subcommand == "configure":
+            for name, value in zip(args[::2], args[1::2]):
+                widget["config"][name.lstrip("-")] = value
+            return ""
+
+        if subcommand == "create":
+            itemId = next(self._itemIds)
+            coords = []
+            options = {}
+            index = 1
+            while index < len(args):
+                arg = args[index]
+                if isinstance(arg, str) and arg.startswith("-"):
+                    options[arg[1:]] = args[index + 1]
+                    index += 2
+                else:
+                    coords.append(arg)
+                    index += 1
+            items[itemId] = {"type": args[0], "coords": coords, "options": options}
+            return itemId
+
+        if subcommand == "coords":
+            itemIds = self._findItems(items, args[0])
+            if len(args) == 1:
+                return tuple(items[itemIds[0]]["coords"]) if len(itemIds) > 0 else ()
+            for itemId in itemIds:
+                items[itemId]["coords"] = list(args[1:])
+            return ""
+
+        if subcommand == "delete":
+            for tagOrId in args:
+                for itemId in self._findItems(items, tagOrId):
+                    del items[itemId]
+            return ""
+
+        if subcommand == "find":
+            if args[0] == "all":
+                return tuple(items)
+            if args[0] == "withtag":
+                return tuple(self._findItems(items, args[1]))
+            return ()
+
+        if subcommand == "itemconfigure":
+            for itemId in self._findItems(items, args[0]):
+                for name, value in zip(args[1::2], args[2::2]):
+                    items[itemId]["options"][name.lstrip("-")] = value
+            return ""
+
+        if subcommand == "itemcget":
+            itemIds = self._findItems(items, args[0])
+            if len(itemIds) == 0:
+                return ""
+            return items[itemIds[0]]["options"].get(args[1].lstrip("-"), "")
+
+        #raise, lower, move, and anything else not handled above do nothing
+        return ""
+
+    #internal staticmethod
+    #returns a list of the ids of the canvas items matching a tag or id
+    @staticmethod
+    def _findItems(items: dict, tagOrId) -> list:
+        if isinstance(tagOrId, int) or (isinstance(tagOrId, str) and tagOrId.isdigit()):
+            itemId = int(tagOrId)
+            return [itemId] if itemId in items else []
+        if tagOrId == "all":
+            return list(items)
+
+        foundIds = []
+        for itemId, item in items.items():
+            tags = item["options"].get("tags", ())
+            if isinstance(tags, str):
+                tags = tags.split()
+            if tagOrId in tags:
+                foundIds.append(itemId)
+        return foundIds
+
+
+    #sets the geometry of a widget, as if its geometry manager had moved or resized it
+    #any value left as None is unchanged; a <Configure> event is queued
+    def setGeometry(self, path: str, x: int = None, y: int = None, width: int = None, height: int = None):
+        geometry = self.widgets[path]["geometry"]
+        for index, value in enumerate((x, y, width, height)):
+            if value != None:
+                geometry[index] = value
+        self._queue.append(("event", (path, "<Configure>")))
+
+    #internal method
+    #runs the scripts bound to an event sequence on a widget
+    #the event fields are filled in from the widget's geometry
+    def _dispatchEvent(self, path: str, sequence: str):
+        widget = self.widgets.get(path)
+        if widget == None:
+            return
+        script = widget["bindings"].get(sequence)
+        if not script:
+            return
+
+        x, y, width, height = widget["geometry"]
+        #the numeric type of the event; 22 is Configure,
+        #17 is Destroy, and 35 is a virtual event
+        eventType = {"<Configure>": "22", "<Destroy>": "17"}.get(sequence, "35")
+
+        #each tkinter binding script calls its command with the
+        #substitutions listed in tkinter.Misc._subst_format
+        for commandName in findall(r"\[(\S+) %#", script):
+            function = self._commands.get(commandName)
+            if function == None:
+                continue
+            function(
+                "0", "??", "0", str(height), "??", "0", "0", str(width), str(x), str(y),
+                "", "0", sequence, "??", path, eventType, "0", "0", ""
+                )
+
+    #delivers every queued event and runs every queued idle callback,
+    #including ones queued while this runs
+    #maxCalls limits the number of entries processed, in case callbacks keep queueing more
+    def update(self, maxCalls: int = 100000):
+        calls = 0
+        while len(self._queue) > 0 and calls < maxCalls:
+            kind, payload = self._queue.pop(0)
+            calls += 1
+            if kind == "event":
+                self._dispatchEvent(*payload)
+            else:
+                function = self._commands.get(payload[1])
+                if function != None:
+                    function()
+
+    #lets the specified number of milliseconds of simulated time pass,
+    #running every timer that becomes due (in order) and then updating
+    def advance(self, milliseconds: int):
+        endTime = self.now + milliseconds
+        while True:
+            self.update()
+            dueTimers = [timer for timer in self._timers if timer[0] <= endTime]
+            if len(dueTimers) == 0:
+                break
+            timer = min(dueTimers)
+            self._timers.remove(timer)
+            self.now = timer[0]
+            function = self._commands.get(timer[3])
+            if function != None:
+                function()
+        self.now = endTime
+        self.update()
+
+    #removes every pending timer, event, and idle callback without running them
+    def discardPending(self):
+        self._timers.clear()
+        self._queue.clear()
+
+#end StubInterpreter
+
+
+#StubRoot
+#A root widget backed by a StubInterpreter instead of a real Tk instance
+#widgets created with it as their parent (directly or indirectly)
+#work without a display
+class StubRoot(tkinter.Misc):
+
+    _w = "."
+    master = None
+    _last_child_ids = None
+
+    def __init__(self):
+        self.tk = StubInterpreter()
+        self.children = {}
+        self._tclCommands = []
+
+    def _root(self):
+        return self
+
+    #delivers queued events and idle callbacks; see StubInterpreter.update
+    def update(self):
+        self.tk.update()
+
+    def update_idletasks(self):
+        self.tk.update()
+
+#end StubRoot
+
+
+#creates a StubRoot and makes it tkinter's default root
+#so widgets created without a parent use it as well
+def createStubRoot() -> StubRoot:
+    root = StubRoot()
+    tkinter._default_root = root
+    return root
+
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
+from collision import Collision
+if TYPE_CHECKING:
+    from collider import ColliderInterface
+
+
+#SweepAndPrune
+#Finds every overlapping pair within a group of Colliders at once
+#Colliders are kept sorted by the start of their x range; sweeping through
+#them in that order, each Collider only needs to be checked against the
+#Colliders whose x range hasn't ended yet (the "active" Colliders)
+#The sorted order is kept between calls to detectAllCollisions. Since
+#objects only move a few pixels between frames, the previous order is
+#almost sorted already, and list.sort (Timsort) restores it in close to
+#linear time; a large batch of new Colliders is sorted in O(n log n)
+#SweepAndPrune doesn't depend on tkinter; any object with a
+#getDimensionRanges method can be checked
+class SweepAndPrune():
+
+    def __init__(self):
+
+        #the Colliders from the last call to detectAllCollisions,
+        #ordered by the start of their x range
+        self._sortedColliders: List[ColliderInterface] = []
+
+
+    #internal staticmethod
+    #given a range as a 2-tuple (start, stop), returns it
+    #ordered so that start is less than or equal to stop
+    #this matches the handling of ranges in Collision.getRangeOverlap
+    @staticmethod
+    def _orderRange(givenRange: Tuple[int, int]) -> Tuple[int, int]:
+        if givenRange[0] > givenRange[1]:
+            return (givenRange[1], givenRange[0])
+        return givenRange
+
+
+    #internal method
+    #brings the stored order up to date with the provided Colliders
+    #Colliders that weren't provided are dropped, new Colliders are appended,
+    #then the order is restored by sorting on the x range start
+    #rangesByCollider must contain the ordered ranges of every Collider
+    def _updateOrder(self, rangesByCollider: Dict[ColliderInterface, Tuple[Tuple[int, int], Tuple[int, int]]]):
+
+        #keep the previous order for Colliders that are still present
+        #and append the ones that weren't present last time
+        previous = [obj for obj in self._sortedColliders if obj in rangesByCollider]
+        if len(previous) != len(rangesByCollider):
+            known = set(previous)
+            previous += [obj for obj in rangesByCollider if obj not in known]
+
+        #sort by the start of the x range
+        #Timsort finds the runs that are already in order, so this is O(n)
+        #when nothing changed order and stays cheap when only a few neighbours
+        #swapped places since the last call; unlike an insertion sort, it is
+        #still O(n log n) when many Colliders were just appended
+        #the sort is stable, so Colliders that start at the same x keep their order
+        previous.sort(key=lambda obj: rangesByCollider[obj][0][0])
+
+        self._sortedColliders = previous
+
+
+    #returns a list of Collision objects, one for each pair
+    #of the provided Colliders that overlap
+    #each overlapping pair is returned once; the source of each Collision is
+    #the Collider that comes first along the x axis
+    #Collisions are not bound; call addBindings on them if needed
+    def detectAllCollisions(self, colliders: Iterable[ColliderInterface]) -> List[Collision]:
+
+        #get the ordered ranges of each Collider once
+        #rather than each time the Collider is compared
+        rangesByCollider = {}
+        for obj in colliders:
+            xRange, yRange = obj.getDimensionRanges()
+            rangesByCollider[obj] = (self._orderRange(xRange), self._orderRange(yRange))
+
+        self._updateOrder(rangesByCollider)
+
+        foundCollisions = []
+
+        #Colliders whose x range may still overlap with the next Collider
+        activeColliders = []
+
+        for obj in self._sortedColliders:
+            (xStart, xEnd), (yStart, yEnd) = rangesByCollider[obj]
+
+            #drop active Colliders whose x range ended before this one starts
+            #ranges are inclusive, so a range ending exactly at xStart still overlaps
+            activeColliders = [other for other in activeColliders if rangesByCollider[other][0][1] >= xStart]
+
+            #every remaining active Collider overlaps on the x axis;
+            #only the y axis needs to be checked
+            for other in activeColliders:
+                otherYStart, otherYEnd = rangesByCollider[other][1]
+                if otherYStart <= yEnd and yStart <= otherYEnd:
+                    foundCollisions.append(Collision(other, obj))
+
+            activeColliders.append(obj)
+
+        return foundCollisions
+
+    #removes the stored order; the next call to
+    #detectAllCollisions will sort from scratch
+    def reset(self):
+        self._sortedColliders = []
+
+#end SweepAndPrune
+
+
+#SweepAndPrune instance used by detectAllCollisions
+_defaultSweepAndPrune = SweepAndPrune()
+
+#returns a list of Collision objects, one for each pair
+#of the provided Colliders that overlap
+#this uses a shared SweepAndPrune, so the sorted order is kept between calls;
+#create a SweepAndPrune of your own if you check more than one group of Colliders
+def detectAllCollisions(colliders: Iterable[ColliderInterface]) -> List[Collision]:
+    return _defaultSweepAndPrune.detectAllCollisions(colliders)
+
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
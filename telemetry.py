@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from array import array
+from itertools import islice
+from struct import Struct
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+from sim_core import SimRoad, SimVehicle
+if TYPE_CHECKING:
+    from lamp_state import LampState
+    from sim_core import SimWorld
+    from simulation_clock import SimulationClock
+    from vehicle import Vehicle
+
+
+#Telemetry
+#Streams the state of a run, one row per vehicle and per light every tick,
+#to a file that can be read while (or after) the run goes on
+#A TelemetrySource yields the rows of a tick from a generator, and a sink
+#consumes them: CsvTelemetrySink writes them as CSV, and
+#ColumnarTelemetrySink as chunks of columns (see below), both optionally
+#compressed. Rows are never collected into a list: a sink only holds the
+#rows of its current buffer or chunk, and a source only remembers the last
+#position of each vehicle it reports, so memory use stays the same no
+#matter how long the run is
+#Every row has the fields in FIELDS:
+#   tick        the number of the tick
+#   time        the simulated time in seconds
+#   kind        KIND_VEHICLE or KIND_LIGHT
+#   entityId    the id of the vehicle or light (unique within a source)
+#   x, y        the position of the vehicle (or light)
+#   speed       the speed of the vehicle over the last tick, in pixels per second
+#   lane        the name of the lane the vehicle is in (or the light controls),
+#               or an empty string if it isn't known
+#   lampState   the lamps of the light that are on, as a bitmask (see LampState);
+#               always 0 for vehicles
+
+
+FIELDS = ("tick", "time", "kind", "entityId", "x", "y", "speed", "lane", "lampState")
+
+KIND_VEHICLE = "vehicle"
+KIND_LIGHT = "light"
+
+
+#TelemetrySource
+#Yields the telemetry rows of each tick (see the top of this file)
+#Vehicles and lights are either added one at a time, or, if a SimWorld is
+#given, every vehicle in the world is reported automatically: vehicles get
+#an id the first time they are seen and are forgotten once they leave the
+#world, and their lane is the road they are driving along
+class TelemetrySource():
+
+    def __init__(self, world: SimWorld = None):
+
+        self.world = world
+
+        #dict that associates each reported SimVehicle with a list
+        #[entityId, lane, x, y] of its id, its lane, and its position
+        #as of the last row reported for it
+        self._vehicles: Dict[SimVehicle, list] = {}
+
+        #list of 5-tuples (entityId, light, lane, x, y), one for each reported light
+        self._lights: List[Tuple[int, LampState, str, float, float]] = []
+
+        #the id the next vehicle or light gets
+        self._nextEntityId = 0
+
+        #the time of the last tick reported, or None before the first one
+        self._lastTime: float = None
+
+
+    #internal method
+    #returns a new entity id
+    def _newEntityId(self) -> int:
+        entityId = self._nextEntityId
+        self._nextEntityId += 1
+        return entityId
+
+    #starts reporting a vehicle (a Vehicle widget or a SimVehicle)
+    #lane is the name reported as the vehicle's lane; if it is None and this
+    #source has a world, the road the vehicle is driving along is reported
+    #returns the id of the vehicle
+    def addVehicle(self, vehicle: Vehicle, lane: str = None) -> int:
+        model = vehicle if isinstance(vehicle, SimVehicle) else vehicle.model
+        state = self._vehicles.get(model)
+        if state == None:
+            state = [self._newEntityId(), lane, model.originX, model.originY]
+            self._vehicles[model] = state
+        return state[0]
+
+    #stops reporting a vehicle
+    def removeVehicle(self, vehicle: Vehicle):
+        model = vehicle if isinstance(vehicle, SimVehicle) else vehicle.model
+        self._vehicles.pop(model, None)
+
+    #starts reporting a traffic light (or any other LampState)
+    #lane is the name reported as the lane the light controls, and xPos and
+    #yPos its position; by default, the position of a CanvasTrafficLight
+    #(or 0, 0 for lights that have no position)
+    #returns the id of the light
+    def addTrafficLight(self, light: LampState, lane: str = None, xPos: float = None, yPos: float = None) -> int:
+        if xPos == None or yPos == None:
+            xPos = getattr(light, "xPos", 0)
+            yPos = getattr(light, "yPos", 0)
+
+        entityId = self._newEntityId()
+        self._lights.append((entityId, light, lane if lane != None else "", xPos, yPos))
+        return entityId
+
+
+    #internal method
+    #brings the reported vehicles in line with the vehicles in the world
+    def _syncWithWorld(self):
+        vehicles = self._vehicles
+        worldVehicles = self.world.vehicles
+
+        for vehicle in worldVehicles:
+            if vehicle not in vehicles:
+                vehicles[vehicle] = [self._newEntityId(), None, vehicle.originX, vehicle.originY]
+
+        #drop the vehicles that left the world, so they aren't
+        #remembered (or reported) for the rest of the run
+        if len(vehicles) > len(worldVehicles):
+            present = set(worldVehicles)
+            self._vehicles = {vehicle: state for vehicle, state in vehicles.items() if vehicle in present}
+
+    #internal method
+    #returns the name of the road a vehicle is driving along, or an empty
+    #string if it isn't on a road of the world
+    #where two roads cross, the one that runs the way the vehicle is
+    #moving (deltaX, deltaY) is used
+    def _getRoadLane(self, vehicle: SimVehicle, deltaX: float, deltaY: float) -> str:
+        if self.world == None:
+            return ""
+
+        roads = [body for body in self.world.getCollidingBodies(vehicle) if isinstance(body, SimRoad)]
+        if len(roads) == 0:
+            return ""
+        road = roads[0]
+        if len(roads) > 1 and (deltaX != 0 or deltaY != 0):
+            movingHorizontally = abs(deltaX) >= abs(deltaY)
+            for candidate in roads:
+                if candidate.horizontal == movingHorizontally:
+                    road = candidate
+                    break
+        return f"road{self.world.roads.index(road)}"
+
+
+    #yields the rows of one tick: one for each vehicle, then one for each light
+    #time is the simulated time in seconds; each vehicle's speed is how far it
+    #moved since the previous call, divided by the time since then
+    #(the speed of every vehicle is 0 on the first call)
+    #this is a generator, so rows are made as the consumer reads them;
+    #read every row of a tick before asking for the next tick
+    def iterRows(self, tick: int, time: float) -> Iterator[tuple]:
+        if self.world != None:
+            self._syncWithWorld()
+
+        deltaTime = time - self._lastTime if self._lastTime != None else 0
+        self._lastTime = time
+
+        for vehicle, state in self._vehicles.items():
+            entityId, lane, lastX, lastY = state
+            x = vehicle.originX
+            y = vehicle.originY
+            deltaX = x - lastX
+            deltaY = y - lastY
+            state[2] = x
+            state[3] = y
+
+            speed = 0.0
+            if deltaTime > 0 and (deltaX != 0 or deltaY != 0):
+                speed = (deltaX * deltaX + deltaY * deltaY) ** 0.5 / deltaTime
+            if lane == None:
+                lane = self._getRoadLane(vehicle, deltaX, deltaY)
+
+            yield (tick, time, KIND_VEHICLE, entityId, x, y, speed, lane, 0)
+
+        for entityId, light, lane, x, y in self._lights:
+            yield (tick, time, KIND_LIGHT, entityId, x, y, 0.0, lane, light.getLampState())
+
+    #has a SimulationClock write the rows of every interval'th tick
+    #to a sink at the end of the tick
+    #returns the callback that was subscribed, so it can be unsubscribed
+    def attachToClock(self, clock: SimulationClock, sink: TelemetrySink, interval: int = 1) -> Callable[[float], None]:
+        def onTick(deltaTime: float):
+            if clock.tickCount % interval == 0:
+                sink.writeRows(self.iterRows(clock.tickCount, clock.time))
+        clock.subscribe(onTick, clock.LATE_PHASE)
+        return onTick
+
+#end TelemetrySource
+
+
+#yields only the rows of every interval'th tick from an iterable of rows
+#this can be put between a source and a sink to thin out a long run
+def everyNthTick(rows: Iterable[tuple], interval: int) -> Iterator[tuple]:
+    for row in rows:
+        if row[0] % interval == 0:
+            yield row
+
+
+#TelemetrySink
+#Base class of the telemetry sinks; a sink is written one
+#row at a time or from an iterable (such as a generator) of rows
+#Rows are buffered and only written to the file in batches of at most
+#bufferRows rows, so a sink uses the same memory however many rows it writes
+#Sinks are context managers; closing a sink writes the buffered rows
+class TelemetrySink():
+
+    #the default number of rows buffered before they are written
+    DEFAULT_BUFFER_ROWS = 4096
+
+    def __init__(self, bufferRows: int = None):
+        if bufferRows == None:
+            bufferRows = self.DEFAULT_BUFFER_ROWS
+        if bufferRows < 1:
+            errMsg = f"Buffer must hold at least one row ({repr(bufferRows)})"
+            raise ValueError(errMsg)
+
+        self.bufferRows = bufferRows
+        self._buffer: List[tuple] = []
+
+        #number of rows written so far (including buffered rows)
+        self.rowCount = 0
+
+    #writes a single row
+    def write(self, row: tuple):
+        self._buffer.append(row)
+        self.rowCount += 1
+        if len(self._buffer) >= self.bufferRows:
+            self.flush()
+
+    #writes every row of an iterable, reading at most a buffer's worth of it at once
+    def writeRows(self, rows: Iterable[tuple]):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.bufferRows - len(self._buffer)))
+            if len(batch) == 0:
+                return
+            self._buffer += batch
+            self.rowCount += len(batch)
+            if len(self._buffer) >= self.bufferRows:
+                self.flush()
+
+    #writes the buffered rows to the file
+    def flush(self):
+        if len(self._buffer) > 0:
+            self._writeBuffer(self._buffer)
+            self._buffer.clear()
+
+    #internal method
+    #writes a list of rows to the file; implemented by each sink
+    def _writeBuffer(self, rows: List[tuple]):
+        raise NotImplementedError
+
+    #writes the buffered rows and closes the file
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self) -> TelemetrySink:
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+#end TelemetrySink
+
+
+#CsvTelemetrySink
+#Writes telemetry rows as CSV, with a header row of the field names
+#If compress is True (by default, if the path ends in ".gz"), the file is gzip compressed
+class CsvTelemetrySink(TelemetrySink):
+
+    def __init__(self, path: str, compress: bool = None, bufferRows: int = None):
+        import csv
+        import gzip
+
+        super().__init__(bufferRows)
+
+        self.path = path
+        if compress == None:
+            compress = path.endswith(".gz")
+
+        if compress:
+            self._file = gzip.open(path, "wt", newline="")
+        else:
+            self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(FIELDS)
+
+    def _writeBuffer(self, rows: List[tuple]):
+        self._writer.writerows(rows)
+
+    #writes the buffered rows to the file, and the file to disk, so
+    #the rows written so far can be read while the run goes on
+    def flush(self):
+        super().flush()
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        super().flush()
+        self._file.close()
+
+#end CsvTelemetrySink
+
+
+#the columnar format starts with a header: magic bytes, format version,
+#flags, and the length of the schema that follows it
+#the schema is the columns as "name:typecode" (array typecodes), comma
+#separated; typecode "s" is a column of strings
+COLUMNAR_MAGIC = b"PTLTEL"
+COLUMNAR_VERSION = 1
+COLUMNAR_HEADER_STRUCT = Struct("<6sHHI")
+
+#flag set if each chunk's data is zlib compressed
+COLUMNAR_FLAG_COMPRESSED = 1
+
+#each chunk starts with: number of rows, length of its data
+COLUMNAR_CHUNK_STRUCT = Struct("<II")
+
+#the type of each field in the columnar format
+COLUMN_TYPES = {
+    "tick": "I",
+    "time": "d",
+    "kind": "s",
+    "entityId": "I",
+    "x": "d",
+    "y": "d",
+    "speed": "d",
+    "lane": "s",
+    "lampState": "B"
+    }
+
+#string columns are stored as indices into a table of strings, one table
+#per chunk; the table starts with its length in bytes
+STRING_INDEX_TYPE = "H"
+STRING_TABLE_STRUCT = Struct("<I")
+
+
+#ColumnarTelemetrySink
+#Writes telemetry rows in a chunked columnar format, which is several times
+#smaller and faster to read back than CSV: every bufferRows rows are written
+#as one chunk holding each field's values as a packed array (see COLUMN_TYPES),
+#and the values of string fields (which repeat a lot) as indices into a table
+#of the strings used in the chunk
+#If compress is True (the default), each chunk is zlib compressed on its own,
+#so the file can still be read one chunk at a time (see iterColumnarChunks)
+#A chunk's data is: the length of the string table (as a uint32), the table
+#(the strings joined by newlines, as UTF-8), then each column's array in order
+class ColumnarTelemetrySink(TelemetrySink):
+
+    def __init__(self, path: str, compress: bool = True, bufferRows: int = None):
+        super().__init__(bufferRows)
+
+        self.path = path
+        self.compress = compress
+
+        self._file = open(path, "wb")
+        schema = ",".join(f"{name}:{COLUMN_TYPES[name]}" for name in FIELDS).encode("ascii")
+        flags = COLUMNAR_FLAG_COMPRESSED if compress else 0
+        self._file.write(COLUMNAR_HEADER_STRUCT.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, flags, len(schema)))
+        self._file.write(schema)
+
+    def _writeBuffer(self, rows: List[tuple]):
+        import zlib
+
+        #dict that associates each string in the chunk with its index in the table
+        strings: Dict[str, int] = {}
+        columnData = []
+        for index, column in enumerate(zip(*rows)):
+            typecode = COLUMN_TYPES[FIELDS[index]]
+            if typecode == "s":
+                values = array(STRING_INDEX_TYPE, [strings.setdefault(value, len(strings)) for value in column])
+            else:
+                values = array(typecode, column)
+            columnData.append(values.tobytes())
+
+        table = "\n".join(strings).encode("utf-8")
+        data = b"".join([STRING_TABLE_STRUCT.pack(len(table)), table] + columnData)
+        if self.compress:
+            data = zlib.compress(data)
+        self._file.write(COLUMNAR_CHUNK_STRUCT.pack(len(rows), len(data)))
+        self._file.write(data)
+
+    #writes the buffered rows to the file (as a chunk), and the file to
+    #disk, so the rows written so far can be read while the run goes on
+    #flushing often makes more, smaller chunks, which compress less well
+    def flush(self):
+        super().flush()
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        super().flush()
+        self._file.close()
+
+#end ColumnarTelemetrySink
+
+
+#yields each chunk of a file written by a ColumnarTelemetrySink as a dict
+#that associates each field with a list of its values in the chunk
+#only one chunk is read into memory at a time
+#a chunk that was only partly written (by a run that is still going, or
+#that was interrupted) ends the iteration
+def iterColumnarChunks(path: str) -> Iterator[Dict[str, list]]:
+    import zlib
+
+    with open(path, "rb") as file:
+        magic, version, flags, schemaLength = COLUMNAR_HEADER_STRUCT.unpack(file.read(COLUMNAR_HEADER_STRUCT.size))
+        if magic != COLUMNAR_MAGIC:
+            errMsg = f"{path} is not a columnar telemetry file"
+            raise ValueError(errMsg)
+        if version != COLUMNAR_VERSION:
+            errMsg = f"{path} uses an unsupported telemetry format (version {version})"
+            raise ValueError(errMsg)
+
+        columns = [column.split(":") for column in file.read(schemaLength).decode("ascii").split(",")]
+
+        while True:
+            chunkHeader = file.read(COLUMNAR_CHUNK_STRUCT.size)
+            if len(chunkHeader) < COLUMNAR_CHUNK_STRUCT.size:
+                return
+            rowCount, dataLength = COLUMNAR_CHUNK_STRUCT.unpack(chunkHeader)
+            data = file.read(dataLength)
+            if len(data) < dataLength:
+                return
+            if flags & COLUMNAR_FLAG_COMPRESSED:
+                data = zlib.decompress(data)
+
+            tableLength, = STRING_TABLE_STRUCT.unpack_from(data, 0)
+            offset = STRING_TABLE_STRUCT.size + tableLength
+            table = data[STRING_TABLE_STRUCT.size:offset].decode("utf-8").split("\n")
+
+            chunk = {}
+            for name, typecode in columns:
+                values = array(STRING_INDEX_TYPE if typecode == "s" else typecode)
+                size = values.itemsize * rowCount
+                values.frombytes(data[offset:offset + size])
+                offset += size
+                chunk[name] = [table[index] for index in values] if typecode == "s" else values.tolist()
+            yield chunk
+
+#yields each row of a file written by a ColumnarTelemetrySink as a tuple
+#of its fields (in the order of the file's schema, which is FIELDS)
+def iterColumnarRows(path: str) -> Iterator[tuple]:
+    for chunk in iterColumnarChunks(path):
+        yield from zip(*chunk.values())
+
+
+#returns a new sink that writes to path: a CsvTelemetrySink if the path
+#ends in ".csv" or ".csv.gz", or a ColumnarTelemetrySink otherwise
+def openTelemetrySink(path: str, bufferRows: int = None) -> TelemetrySink:
+    if path.endswith(".csv") or path.endswith(".csv.gz"):
+        return CsvTelemetrySink(path, bufferRows=bufferRows)
+    return ColumnarTelemetrySink(path, bufferRows=bufferRows)
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+
+#TimerHandle
+#A timer scheduled on a TimerWheel; returned by TimerWheel.schedule
+#and used to cancel the timer
+class TimerHandle():
+
+    __slots__ = ("deadline", "callback", "_slot", "_level")
+
+    def __init__(self, deadline: int, callback: Callable[[], None]):
+        #the tick at which the timer fires
+        self.deadline = deadline
+        #the function called when the timer fires
+        self.callback = callback
+        #the wheel slot (a dict) that currently holds this timer,
+        #or None if the timer fired or was cancelled
+        self._slot = None
+        #the level of the wheel that slot belongs to
+        #(OVERFLOW_LEVEL if the timer is beyond the span of the wheel)
+        self._level = None
+
+    #returns True if the timer hasn't fired or been cancelled yet
+    def isPending(self) -> bool:
+        return self._slot != None
+
+    def __repr__(self):
+        return f"TimerHandle(deadline={self.deadline}, callback={self.callback})"
+
+#end TimerHandle
+
+
+#TimerWheel
+#A hierarchical timer wheel: schedules any number of timers
+#with O(1) insertion, cancellation, and firing
+#Time is measured in whole ticks. The wheel has several levels of slots;
+#level 0 has one slot per tick, level 1 one slot per SLOTS_PER_LEVEL ticks,
+#level 2 one slot per SLOTS_PER_LEVEL ** 2 ticks, and so on. A timer is
+#stored in the level that matches how far away its deadline is, and is moved
+#("cascaded") down a level each time time reaches the block of ticks its slot
+#covers, until it lands in level 0 and fires
+#TimerWheel doesn't depend on tkinter or on real time; it only moves forward
+#when advance is called. See SignalController for use with tkinter
+class TimerWheel():
+
+    #number of bits of the tick count covered by each level
+    #each level has 2 ** LEVEL_BITS slots
+    LEVEL_BITS = 6
+    SLOTS_PER_LEVEL = 2 ** LEVEL_BITS
+
+    #the default number of levels
+    #4 levels of 64 slots cover 64 ** 4 (over 16 million) ticks; timers further
+    #away than that are held in the last level until they come within range
+    DEFAULT_LEVEL_COUNT = 4
+
+    #the level recorded for timers that are beyond the span of the wheel
+    OVERFLOW_LEVEL = -1
+
+    def __init__(self, levelCount: int = None):
+
+        if levelCount == None:
+            levelCount = self.DEFAULT_LEVEL_COUNT
+        if levelCount < 1:
+            errMsg = f"A TimerWheel needs at least one level ({repr(levelCount)})"
+            raise ValueError(errMsg)
+
+        #the current tick; timers with a deadline at or before it have fired
+        self.currentTick = 0
+
+        #list of levels, each a list of slots
+        #each slot is a dict used as an ordered set of TimerHandles,
+        #so timers in a slot fire in the order they were scheduled
+        self._levels: List[List[Dict[TimerHandle, None]]] = [
+            [{} for _ in range(self.SLOTS_PER_LEVEL)] for _ in range(levelCount)
+            ]
+
+        #number of pending timers in each level
+        self._levelCounts = [0] * levelCount
+
+        #timers too far away to fit in the wheel, as an ordered set
+        #these are moved into the wheel each time the last level
+        #starts a new slot, once they come within range
+        self._overflow: Dict[TimerHandle, None] = {}
+
+        #True while advance is firing the timers of the current tick
+        self._firing = False
+
+
+    #returns the number of pending timers
+    def __len__(self) -> int:
+        return sum(self._levelCounts) + len(self._overflow)
+
+    #internal method
+    #returns the number of ticks covered by the wheel as a whole
+    def _getSpan(self) -> int:
+        return 1 << (self.LEVEL_BITS * len(self._levels))
+
+    #internal method
+    #stores a timer in the slot that matches its deadline
+    #timers with a deadline before earliestTick are stored in the slot of earliestTick
+    def _insert(self, handle: TimerHandle, earliestTick: int):
+        levelBits = self.LEVEL_BITS
+        slotMask = self.SLOTS_PER_LEVEL - 1
+        lastLevel = len(self._levels) - 1
+
+        deadline = max(handle.deadline, earliestTick)
+        delta = deadline - self.currentTick
+
+        #timers beyond the span of the wheel are kept aside
+        #until the wheel comes within range of them
+        if delta >= self._getSpan():
+            self._overflow[handle] = None
+            handle._slot = self._overflow
+            handle._level = self.OVERFLOW_LEVEL
+            return
+
+        #find the lowest level whose span covers the deadline
+        level = 0
+        while level < lastLevel and delta >= 1 << (levelBits * (level + 1)):
+            level += 1
+
+        slot = self._levels[level][(deadline >> (levelBits * level)) & slotMask]
+        slot[handle] = None
+        handle._slot = slot
+        handle._level = level
+        self._levelCounts[level] += 1
+
+    #schedules a function to be called when the wheel reaches the specified tick
+    #timers with a deadline that has already been reached fire on the next advance
+    #(or, if scheduled by the callback of a timer, later during the same tick)
+    #returns a TimerHandle that can be used to cancel the timer
+    def schedule(self, deadline: int, callback: Callable[[], None]) -> TimerHandle:
+        handle = TimerHandle(deadline, callback)
+        if self._firing:
+            #the slot of the current tick is still being fired
+            self._insert(handle, self.currentTick)
+        else:
+            self._insert(handle, self.currentTick + 1)
+        return handle
+
+    #schedules a function to be called the specified number of ticks from now
+    def scheduleAfter(self, ticks: int, callback: Callable[[], None]) -> TimerHandle:
+        return self.schedule(self.currentTick + ticks, callback)
+
+    #cancels a pending timer
+    #returns True if the timer was pending, False if it already fired or was cancelled
+    def cancel(self, handle: TimerHandle) -> bool:
+        slot = handle._slot
+        if slot == None:
+            return False
+
+        del slot[handle]
+        handle._slot = None
+        if handle._level != self.OVERFLOW_LEVEL:
+            self._levelCounts[handle._level] -= 1
+        return True
+
+
+    #internal method
+    #moves every timer in the slot of the specified level that
+    #covers the current tick down to the levels below it
+    def _cascade(self, level: int):
+        levelBits = self.LEVEL_BITS
+        slotMask = self.SLOTS_PER_LEVEL - 1
+
+        slotIndex = (self.currentTick >> (levelBits * level)) & slotMask
+        slot = self._levels[level][slotIndex]
+        if len(slot) == 0:
+            return
+
+        handles = list(slot)
+        slot.clear()
+        self._levelCounts[level] -= len(handles)
+        #cascading happens before the current tick is fired, so
+        #timers due at the current tick still fire on time
+        for handle in handles:
+            self._insert(handle, self.currentTick)
+
+    #internal method
+    #moves the overflow timers that are now within the span of the wheel into it
+    def _moveOverflow(self):
+        span = self._getSpan()
+        handles = [handle for handle in self._overflow if handle.deadline - self.currentTick < span]
+        for handle in handles:
+            del self._overflow[handle]
+            self._insert(handle, self.currentTick)
+
+    #advances the wheel to the specified tick, firing every timer whose
+    #deadline is at or before it, in order of deadline
+    #timers scheduled by a callback for a tick that is still within
+    #the advance fire during the same call
+    #returns the number of timers that fired
+    def advance(self, targetTick: int) -> int:
+        levelBits = self.LEVEL_BITS
+        slotsPerLevel = self.SLOTS_PER_LEVEL
+        slotMask = slotsPerLevel - 1
+        levelCount = len(self._levels)
+
+        firedCount = 0
+        while self.currentTick < targetTick:
+
+            #if nothing is waiting in level 0, no timer can fire before the
+            #next block of level 0 starts, so skip straight to it
+            if self._levelCounts[0] == 0:
+                nextBlock = ((self.currentTick >> levelBits) + 1) << levelBits
+                if nextBlock > targetTick:
+                    self.currentTick = targetTick
+                    break
+                self.currentTick = nextBlock
+            else:
+                self.currentTick += 1
+
+            #at the start of each block, cascade the slot of the level above
+            #that covers the block (and so on up the levels)
+            level = 1
+            while level < levelCount and (self.currentTick >> (levelBits * (level - 1))) & slotMask == 0:
+                self._cascade(level)
+                level += 1
+
+            #each time the last level starts a new slot, bring in
+            #the overflow timers that have come within range
+            if len(self._overflow) > 0 and self.currentTick & ((1 << (levelBits * (levelCount - 1))) - 1) == 0:
+                self._moveOverflow()
+
+            #fire the timers of this tick
+            slot = self._levels[0][self.currentTick & slotMask]
+            self._firing = True
+            try:
+                while len(slot) > 0:
+                    handle = next(iter(slot))
+                    del slot[handle]
+                    self._levelCounts[0] -= 1
+                    handle._slot = None
+                    firedCount += 1
+                    handle.callback()
+            finally:
+                self._firing = False
+
+        return firedCount
+
+
+    #returns the tick of the earliest pending timer, or None if there are none
+    #this is what a single real timer should be scheduled for
+    def getNextDeadline(self) -> int:
+        levelBits = self.LEVEL_BITS
+        slotMask = self.SLOTS_PER_LEVEL - 1
+
+        earliest = None
+        for level, slots in enumerate(self._levels):
+            if self._levelCounts[level] == 0:
+                continue
+
+            #check the slots of this level in the order time reaches them,
+            #starting after the slot that covers the current tick (that slot
+            #was already fired or cascaded, so anything in it is a full turn away)
+            #the first non-empty slot holds this level's earliest timers
+            startIndex = (self.currentTick >> (levelBits * level)) & slotMask
+            for offset in range(1, self.SLOTS_PER_LEVEL + 1):
+                slot = slots[(startIndex + offset) & slotMask]
+                if len(slot) > 0:
+                    slotEarliest = max(min(handle.deadline for handle in slot), self.currentTick + 1)
+                    if earliest == None or slotEarliest < earliest:
+                        earliest = slotEarliest
+                    break
+
+        #overflow timers are usually far later than anything in the wheel,
+        #but they can't be ruled out without checking them
+        for handle in self._overflow:
+            if earliest == None or handle.deadline < earliest:
+                earliest = handle.deadline
+
+        return earliest
+
+    #cancels every pending timer
+    def clear(self):
+        for slots in self._levels:
+            for slot in slots:
+                for handle in slot:
+                    handle._slot = None
+                slot.clear()
+        self._levelCounts = [0] * len(self._levels)
+        for handle in self._overflow:
+            handle._slot = None
+        self._overflow.clear()
+
+#end TimerWheel
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+import numpy as np
+from monte_carlo import Scenario
+
+#Timing Optimizer
+#Searches for the signal timings that give the lowest delay in a Scenario
+#Running the full simulation for every candidate timing would take thousands
+#of runs, so candidates are first scored with a much simpler queue model:
+#traffic is treated as a fluid that arrives at a steady rate, queues while
+#its light isn't green, and leaves at the saturation flow (one vehicle per
+#vehicle length plus gap) while it is. Every candidate is stepped through
+#time at once, as columns of NumPy arrays, so a grid of thousands of
+#candidates is scored in seconds. The best few are then confirmed with the
+#full simulation over many seeds (see monte_carlo.py)
+#Candidates are made from a grid of cycle lengths, splits, and offsets:
+#   the cycle length (in milliseconds) is the time for both lights of an
+#   intersection to go through green, yellow, and red once
+#   the split is the fraction of the cycle's green time (the cycle length
+#   minus both yellows) given to the main road; the rest goes to the crossing roads
+#   the offset (in milliseconds) delays the cycle of each intersection relative
+#   to the one before it; it only matters if there are several intersections
+#Requires NumPy
+
+
+#TimingPlan
+#One candidate timing, with its score in the queue model and
+#(once confirmed) the aggregate of its full simulation runs
+class TimingPlan():
+
+    def __init__(self, cycleLength: int, greenTime: int, crossingGreenTime: int, offset: int, modelDelay: float):
+        self.cycleLength = cycleLength
+        self.greenTime = greenTime
+        self.crossingGreenTime = crossingGreenTime
+        self.offset = offset
+
+        #the mean delay per vehicle (in seconds) predicted by the queue model
+        self.modelDelay = modelDelay
+
+        #the aggregate of the full simulation runs of this plan (see
+        #monte_carlo.summarizeRuns), or None if the plan wasn't confirmed
+        self.confirmedSummary: dict = None
+
+    #returns a copy of a Scenario that uses this plan's timings
+    def applyTo(self, scenario: Scenario) -> Scenario:
+        return scenario.withSettings(
+            greenTime=self.greenTime,
+            crossingGreenTime=self.crossingGreenTime,
+            intersectionOffset=self.offset
+            )
+
+    #returns the mean delay per vehicle (in seconds) over the full
+    #simulation runs of this plan, or None if it wasn't confirmed
+    def getConfirmedDelay(self) -> float:
+        if self.confirmedSummary == None or "meanDelay" not in self.confirmedSummary:
+            return None
+        return self.confirmedSummary["meanDelay"]["mean"]
+
+    def __repr__(self):
+        return (f"TimingPlan(cycleLength={self.cycleLength}, greenTime={self.greenTime}, "
+            f"crossingGreenTime={self.crossingGreenTime}, offset={self.offset}, modelDelay={self.modelDelay:.3f})")
+
+#end TimingPlan
+
+
+#TimingOptimizer
+#Scores candidate timings for a Scenario with the queue model, and confirms
+#the best ones with the full simulation
+#Only the timings of the Scenario are searched; its layout, arrival rates,
+#yellow time, and duration are used as they are
+class TimingOptimizer():
+
+    #the default time step of the queue model in seconds
+    DEFAULT_MODEL_TIME_STEP = 0.1
+
+    #the shortest green time (in milliseconds) a candidate may give either road
+    MIN_GREEN_TIME = 1000
+
+    #green times are rounded to this many milliseconds, which matches
+    #the resolution of a SignalController
+    TIME_RESOLUTION = 10
+
+    def __init__(self, scenario: Scenario, modelTimeStep: float = None):
+
+        self.scenario = scenario
+
+        self.modelTimeStep = modelTimeStep if modelTimeStep != None else self.DEFAULT_MODEL_TIME_STEP
+        if self.modelTimeStep <= 0:
+            errMsg = f"Model time step must be greater than zero ({repr(self.modelTimeStep)})"
+            raise ValueError(errMsg)
+
+
+    #given the values of each dimension of the grid, returns every feasible
+    #candidate as a 4-tuple of integer arrays (cycleLengths, greenTimes,
+    #crossingGreenTimes, offsets), one element per candidate
+    #candidates that give either road less than MIN_GREEN_TIME are left out,
+    #offsets are reduced modulo the cycle length, and duplicates are removed
+    #(with a single intersection, every offset is the same, so only 0 is used)
+    def createCandidates(self,
+        cycleLengths: Iterable[int],
+        splits: Iterable[float],
+        offsets: Iterable[int]
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+
+        if self.scenario.intersectionCount == 1:
+            offsets = [0]
+
+        cycleGrid, splitGrid, offsetGrid = np.meshgrid(
+            np.asarray(list(cycleLengths), dtype=np.int64),
+            np.asarray(list(splits), dtype=np.float64),
+            np.asarray(list(offsets), dtype=np.int64),
+            indexing="ij"
+            )
+        cycleGrid = cycleGrid.ravel()
+        splitGrid = splitGrid.ravel()
+        offsetGrid = offsetGrid.ravel()
+
+        availableGreen = cycleGrid - 2 * self.scenario.yellowTime
+        greenTimes = (np.round(availableGreen * splitGrid / self.TIME_RESOLUTION) * self.TIME_RESOLUTION).astype(np.int64)
+        crossingGreenTimes = availableGreen - greenTimes
+        offsetGrid = offsetGrid % cycleGrid
+
+        feasible = (greenTimes >= self.MIN_GREEN_TIME) & (crossingGreenTimes >= self.MIN_GREEN_TIME)
+        candidates = np.stack([cycleGrid, greenTimes, crossingGreenTimes, offsetGrid], axis=1)[feasible]
+        candidates = np.unique(candidates, axis=0)
+        return (candidates[:, 0], candidates[:, 1], candidates[:, 2], candidates[:, 3])
+
+    #scores candidate timings with the queue model
+    #each argument is an array with one element per candidate (see createCandidates)
+    #returns an array of the mean delay per vehicle (in seconds) of each candidate
+    #over the Scenario's duration: the total time vehicles spent queued divided by
+    #the number of vehicles that arrived
+    def evaluate(self,
+        cycleLengths: np.ndarray,
+        greenTimes: np.ndarray,
+        crossingGreenTimes: np.ndarray,
+        offsets: np.ndarray
+        ) -> np.ndarray:
+
+        scenario = self.scenario
+        timeStep = self.modelTimeStep
+        intersectionCount = scenario.intersectionCount
+        candidateCount = len(cycleLengths)
+
+        #the timings as (candidates, 1) columns in seconds, so they
+        #broadcast against (candidates, intersections) arrays
+        cycleColumn = np.asarray(cycleLengths, dtype=np.float64)[:, None] / 1000
+        greenColumn = np.asarray(greenTimes, dtype=np.float64)[:, None] / 1000
+        crossingGreenColumn = np.asarray(crossingGreenTimes, dtype=np.float64)[:, None] / 1000
+        yellowTime = scenario.yellowTime / 1000
+
+        #the time by which each intersection's cycle is delayed
+        shifts = np.asarray(offsets, dtype=np.float64)[:, None] / 1000 * np.arange(intersectionCount)[None, :]
+
+        #the crossing green starts once the main road's green and yellow end
+        crossingGreenStart = greenColumn + yellowTime
+        crossingGreenEnd = crossingGreenStart + crossingGreenColumn
+
+        #vehicles that can leave a queue per step while the light is green
+        saturationFlow = scenario.speed / (scenario.VEHICLE_SIZE + scenario.VEHICLE_GAP)
+        stepCapacity = saturationFlow * timeStep
+
+        mainArrivals = scenario.arrivalRate * timeStep
+        crossingArrivals = scenario.crossingArrivalRate * timeStep
+
+        #vehicles leaving an intersection on the main road reach the next one
+        #after travelling one block and one road width; they are held in a
+        #ring buffer of departures for that many steps
+        travelSteps = max(1, int(round((scenario.BLOCK_SIZE + scenario.ROAD_WIDTH) / scenario.speed / timeStep)))
+        inTransit = np.zeros((travelSteps, candidateCount, intersectionCount - 1))
+
+        mainQueues = np.zeros((candidateCount, intersectionCount))
+        crossingQueues = np.zeros((candidateCount, intersectionCount))
+        mainInflow = np.empty((candidateCount, intersectionCount))
+        mainInflow[:, 0] = mainArrivals
+        queuedTime = np.zeros((candidateCount, intersectionCount))
+
+        #the time within each intersection's cycle; this is advanced by a step
+        #at a time and wrapped around, which is much cheaper than taking the
+        #modulo of the time on every step
+        timeInCycle = (-shifts) % cycleColumn
+        cycleGrid = np.broadcast_to(cycleColumn, timeInCycle.shape)
+
+        #buffers reused on every step, so the loop doesn't allocate arrays
+        mainGreen = np.empty(timeInCycle.shape, dtype=bool)
+        crossingGreen = np.empty(timeInCycle.shape, dtype=bool)
+        crossingGreenCheck = np.empty(timeInCycle.shape, dtype=bool)
+        wrapped = np.empty(timeInCycle.shape, dtype=bool)
+        departures = np.empty(timeInCycle.shape)
+        crossingDepartures = np.empty(timeInCycle.shape)
+
+        stepCount = int(round(scenario.duration / timeStep))
+        for stepIndex in range(stepCount):
+            np.less(timeInCycle, greenColumn, out=mainGreen)
+            np.greater_equal(timeInCycle, crossingGreenStart, out=crossingGreen)
+            np.less(timeInCycle, crossingGreenEnd, out=crossingGreenCheck)
+            crossingGreen &= crossingGreenCheck
+
+            #departures from each intersection arrive at the next one travelSteps later
+            transitIndex = stepIndex % travelSteps
+            mainInflow[:, 1:] = inTransit[transitIndex]
+
+            mainQueues += mainInflow
+            np.multiply(mainGreen, stepCapacity, out=departures)
+            np.minimum(mainQueues, departures, out=departures)
+            mainQueues -= departures
+            inTransit[transitIndex] = departures[:, :-1]
+
+            crossingQueues += crossingArrivals
+            np.multiply(crossingGreen, stepCapacity, out=crossingDepartures)
+            np.minimum(crossingQueues, crossingDepartures, out=crossingDepartures)
+            crossingQueues -= crossingDepartures
+
+            queuedTime += mainQueues
+            queuedTime += crossingQueues
+
+            timeInCycle += timeStep
+            np.greater_equal(timeInCycle, cycleGrid, out=wrapped)
+            np.subtract(timeInCycle, cycleGrid, out=timeInCycle, where=wrapped)
+
+        totalArrivals = (mainArrivals + crossingArrivals * intersectionCount) * stepCount
+        return queuedTime.sum(axis=1) * timeStep / totalArrivals
+
+    #scores every candidate of the grid (see createCandidates) and returns
+    #the topCount best ones as TimingPlans, lowest model delay first
+    def search(self,
+        cycleLengths: Iterable[int],
+        splits: Iterable[float],
+        offsets: Iterable[int] = (0,),
+        topCount: int = 5
+        ) -> List[TimingPlan]:
+
+        candidates = self.createCandidates(cycleLengths, splits, offsets)
+        if len(candidates[0]) == 0:
+            raise ValueError("No feasible candidates; the cycle lengths are too short for the yellow and minimum green times")
+
+        delays = self.evaluate(*candidates)
+        bestIndices = np.argsort(delays, kind="stable")[:topCount]
+        return [
+            TimingPlan(
+                int(candidates[0][index]),
+                int(candidates[1][index]),
+                int(candidates[2][index]),
+                int(candidates[3][index]),
+                float(delays[index])
+                )
+            for index in bestIndices
+            ]
+
+    #runs the full simulation of each plan once for each seed
+    #(see monte_carlo.runSeeds) and stores the aggregate in its confirmedSummary
+    #returns the plans sorted by their confirmed mean delay, lowest first
+    def confirm(self, plans: List[TimingPlan], seeds: Iterable[int], maxWorkers: int = None) -> List[TimingPlan]:
+        from monte_carlo import runSeeds, summarizeRuns
+
+        seeds = list(seeds)
+        for plan in plans:
+            summaries = list(runSeeds(plan.applyTo(self.scenario), seeds, maxWorkers))
+            plan.confirmedSummary = summarizeRuns(summaries)
+
+        def getSortKey(plan: TimingPlan) -> float:
+            confirmedDelay = plan.getConfirmedDelay()
+            return confirmedDelay if confirmedDelay != None else float("inf")
+        return sorted(plans, key=getSortKey)
+
+#end TimingOptimizer
+
+
+#internal function
+#parses a range given as "start:stop:step" (stop included) or a single value
+#returns an array of the values in the range
+def _parseRange(text: str, valueType: type) -> np.ndarray:
+    parts = [valueType(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return np.asarray(parts)
+    if len(parts) != 3 or parts[2] <= 0:
+        errMsg = f"Invalid range \"{text}\"; expected start:stop:step with a positive step"
+        raise ValueError(errMsg)
+    start, stop, step = parts
+    return np.arange(start, stop + step / 2, step)
+
+#parses command line arguments, searches the grid of timings with the
+#queue model, and confirms the best plans with the full simulation
+def main(args: List[str] = None):
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description="Searches for the signal timings with the lowest delay")
+    parser.add_argument("--cycles", default="20000:120000:2000",
+        help="cycle lengths in milliseconds, as start:stop:step (default: 20000:120000:2000)")
+    parser.add_argument("--splits", default="0.1:0.9:0.02",
+        help="fractions of the green time given to the main road, as start:stop:step (default: 0.1:0.9:0.02)")
+    parser.add_argument("--offsets", default="0:60000:2000",
+        help="offsets between intersections in milliseconds, as start:stop:step (default: 0:60000:2000)")
+    parser.add_argument("--intersections", type=int, default=1, dest="intersectionCount",
+        help="number of intersections along the main road (default: 1)")
+    parser.add_argument("--arrival-rate", type=float, default=Scenario.DEFAULT_ARRIVAL_RATE, dest="arrivalRate",
+        help=f"vehicles per second arriving on the main road (default: {Scenario.DEFAULT_ARRIVAL_RATE})")
+    parser.add_argument("--crossing-arrival-rate", type=float, default=None, dest="crossingArrivalRate",
+        help="vehicles per second arriving on each crossing road (default: same as --arrival-rate)")
+    parser.add_argument("--yellow", type=int, default=Scenario.DEFAULT_YELLOW_TIME, dest="yellowTime",
+        help=f"yellow time in milliseconds (default: {Scenario.DEFAULT_YELLOW_TIME})")
+    parser.add_argument("--duration", type=float, default=Scenario.DEFAULT_DURATION,
+        help=f"simulated seconds (default: {Scenario.DEFAULT_DURATION})")
+    parser.add_argument("--top", type=int, default=5, dest="topCount",
+        help="number of plans to confirm with the full simulation (default: 5)")
+    parser.add_argument("--seeds", type=int, default=20, dest="seedCount",
+        help="number of full simulation runs per confirmed plan; 0 skips confirmation (default: 20)")
+    parser.add_argument("--workers", type=int, default=None,
+        help="number of worker processes for the full simulation (default: one per CPU)")
+    options = parser.parse_args(args)
+
+    scenario = Scenario(
+        0,
+        duration=options.duration,
+        arrivalRate=options.arrivalRate,
+        crossingArrivalRate=options.crossingArrivalRate,
+        yellowTime=options.yellowTime,
+        intersectionCount=options.intersectionCount
+        )
+    optimizer = TimingOptimizer(scenario)
+
+    cycleLengths = _parseRange(options.cycles, int)
+    splits = _parseRange(options.splits, float)
+    offsets = _parseRange(options.offsets, int)
+
+    startTime = perf_counter()
+    candidateCount = len(optimizer.createCandidates(cycleLengths, splits, offsets)[0])
+    plans = optimizer.search(cycleLengths, splits, offsets, options.topCount)
+    print(f"Scored {candidateCount} candidates in {perf_counter() - startTime:.2f} s")
+    for plan in plans:
+        print(f"  {plan}")
+
+    if options.seedCount <= 0:
+        return
+
+    startTime = perf_counter()
+    plans = optimizer.confirm(plans, range(options.seedCount), options.workers)
+    print(f"Confirmed {len(plans)} plans with {options.seedCount} runs each in {perf_counter() - startTime:.2f} s")
+    for plan in plans:
+        confirmedDelay = plan.getConfirmedDelay()
+        confirmedText = f"{confirmedDelay:.3f}" if confirmedDelay != None else "-"
+        print(f"  {plan} -> confirmed mean delay {confirmedText}")
+
+
+if __name__ == "__main__":
+    main()
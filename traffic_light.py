@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 
-from tkinter import Canvas
+from tkinter import Canvas, TclError
+from typing import Dict, Tuple
+from lamp_state import LampState
 
 #a class for a traffic light widget
+#the lamp names and the lamp state are defined by LampState
 
-class TrafficLight(Canvas):
-
-    #define which lamp names exist
-    #these are ordered from top to bottom
-    LAMP_NAMES = ("red", "yellow", "green")
+class TrafficLight(LampState, Canvas):
 
     #define the default diameter of lamps
     #the size of the widget overall is
@@ -25,41 +24,78 @@ class TrafficLight(Canvas):
         "default"   : "#000000"
         }
 
+    #TrafficLights whose lamps changed since they were last drawn
+    #(as dict keys, to remove duplicates while keeping order)
+    #these are all drawn together by flushLampChanges, once tkinter is idle
+    _lightsToRedraw: Dict["TrafficLight", None] = {}
+
+    #True while a call to flushLampChanges is scheduled
+    _flushScheduled = False
+
+    #the root widget and after_idle id of the scheduled call to
+    #flushLampChanges, so it can be cancelled if every light waiting
+    #for it is destroyed first
+    _flushRoot = None
+    _flushAfterId = None
+
+
+    #classmethod
+    #returns the size of a traffic light as a 2-tuple (width, height)
+    @classmethod
+    def getLightSize(cls) -> Tuple[int, int]:
+        return (cls.LAMP_SIZE + 3, (cls.LAMP_SIZE + 3) * 3)
+
+    #classmethod
+    #returns a dict that associates each lamp name with the bounding box
+    #of its lamp as a 4-tuple (x0, y0, x1, y1), for a light whose top left corner
+    #is at (originX, originY); these are the coordinates used by _placeLamps
+    #this is also used to draw lights onto a shared canvas (see WorldCanvas)
+    @classmethod
+    def calculateLampCoords(cls, originX: int = 0, originY: int = 0) -> Dict[str, Tuple[int, int, int, int]]:
+
+        lampCoords = {}
 
-    #internal method 
-    #draws the lamps on the internal canvas according to LAMP_ORDER and LAMP_SIZE
-    def _placeLamps(self):
-        #retrieve the default color so 
-        #the lamps can be filled with it
-        defaultColor = self.LAMP_COLORS["default"]
-        
         #previousY1 is initialized to 1 so the fist lamp
         #doesn't touch the top of the canvas 
         previousY1 = 1
-        
-        #create and position the lamps
-        #store each lamp's id in the self.lampIds dict
-        #with the appropriate color as the key
-        for lampName in self.LAMP_NAMES:
+
+        for lampName in cls.LAMP_NAMES:
             #calculate bounding box coordinates
             x0 = 2 #left side set to 2; this ensures the left side doesn't touch the border
             y0 = previousY1 + 2 #top of this lamp is 2px below the bottom of the previous one
-            x1 = x0 + self.LAMP_SIZE #right side of the lamp is <lampSize> px to the right of the left side
-            y1 = y0 + self.LAMP_SIZE #bottom of this lamp is <lampSize> px below the top
-            
-            #use calculated coordinates to draw the lamp (with the default color as the fill)
-            self.lampIds[lampName] = self.create_oval(x0, y0, x1, y1, fill=defaultColor)
+            x1 = x0 + cls.LAMP_SIZE #right side of the lamp is <lampSize> px to the right of the left side
+            y1 = y0 + cls.LAMP_SIZE #bottom of this lamp is <lampSize> px below the top
+
+            lampCoords[lampName] = (x0 + originX, y0 + originY, x1 + originX, y1 + originY)
             #set previousY1 to the y1 just used
             previousY1 = y1
 
+        return lampCoords
+
+    #internal method 
+    #draws the lamps on the internal canvas according to LAMP_NAMES and LAMP_SIZE
+    def _placeLamps(self):
+        #retrieve the default color so 
+        #the lamps can be filled with it
+        defaultColor = self.LAMP_COLORS["default"]
+
+        #create and position the lamps
+        #store each lamp's id in the self.lampIds dict
+        #with the appropriate color as the key
+        for lampName, coords in self.calculateLampCoords().items():
+            #draw the lamp (with the default color as the fill)
+            self.lampIds[lampName] = self.create_oval(*coords, fill=defaultColor)
+
 
     def __init__(self, parent):
 
         #run superclass constructor with defined width, height, and bg color
-        Canvas.__init__(self, 
+        #this also initializes the lamp state (see LampState)
+        width, height = self.getLightSize()
+        super().__init__(
             parent, 
-            width=TrafficLight.LAMP_SIZE+3, 
-            height=(TrafficLight.LAMP_SIZE+3)*3, 
+            width=width, 
+            height=height, 
             background="#FFFFFF"
             )
         
@@ -75,99 +111,84 @@ class TrafficLight(Canvas):
         #draw lamps and store their ids in self.lampIds
         self._placeLamps()
 
+        #the lamp state is kept by LampState rather than read back from the
+        #canvas, so reading it never calls into Tcl
+        #_drawnLampState is the state the canvas currently shows; the canvas
+        #is only updated (write-only) when the two differ
+        self._drawnLampState = 0
+
+        #stop waiting to be redrawn when destroyed
+        self.bind("<Destroy>", self._onDestroy, add=True)
+
         #end __init__
 
 
-    #given a lamp color ("red", "yellow", or "green"),
-    #"turns the lamp on" by setting its fill color
-    def turnLampOn(self, lampColor):
-        lampId = self.lampIds[lampColor]
-        colorStr = self.LAMP_COLORS[lampColor]
-        self.itemconfigure(lampId, fill=colorStr)
-
-
-    #similar to self.turnLampOn, but turns the lamp off
-    #by setting it to the default color
-    def turnLampOff(self, lampColor):
-        lampId = self.lampIds[lampColor]
-        colorStr = self.LAMP_COLORS["default"]
-        self.itemconfigure(lampId, fill=colorStr)
-
-
-    #returns True if the selected lamp is currently
-    #turned on, False if it is turned off
-    def isLampOn(self, lampColor):
-        lampId = self.lampIds[lampColor]
-        currentLampColor = self.itemcget(lampId, 'fill')
-        #if the current lamp color is not the default color, 
-        #then the lamp must be on; otherwise, the lamp is turned off
-        #because this evaluates to a boolean, it can be returned directly
-        return (currentLampColor != self.LAMP_COLORS["default"])
-
-
-    #returns an iterator of lamp names ("red", "yellow", "green")
-    #"containing" the names of every lamp that is currently turned on
-    #if asList is true, returns a list rather than an iterator
-    def getActiveLamps(self, asList = False):
-        activeLampsIterator = filter(self.isLampOn, self.LAMP_NAMES)
-        if not asList:
-            return activeLampsIterator
-        else:
-            return list(activeLampsIterator)
-
-
-    #turns the selected lamp on, and also
-    #turns all other lamps off
-    #if lampColor is None, all lamps are turned off
-    def setActiveLamp(self, lampColor = None):
-
-        #turn off all currently active lamps
-        for activeLamp in self.getActiveLamps():
-            self.turnLampOff(activeLamp)
-        
-        if lampColor != None:
-            #turn the selected lamp on
-            self.turnLampOn(lampColor)
-
-
-    #returns the name of the lamp that is directly 
-    #after the currently active lamp (ordering top to bottom)
-    #if no lamps are active, returns the first lamp
-    #if the last lamp is active, returns None
-    #if multiple lamps are active, only the first is considered
-    def getNextLamp(self):
-         #get a list of all currently active lamps
-        activeLamps = self.getActiveLamps(asList=True)
-        
-        #if no lamps are active, return the first lamp
-        if len(activeLamps) == 0:
-            return TrafficLight.LAMP_NAMES[0]
-        else:
-            #if at least one lamp is active, treat the first
-            #active lamp as the only active lamp
-            activeLamp = activeLamps[0]
-            
-            #if the active lamp is the last lamp, 
-            #return None 
-            if activeLamp == TrafficLight.LAMP_NAMES[-1]:
-                return None
-            
-            #otherwise, find the currently active lamp's index,
-            #add 1, then turn that lamp's name
-            else:
-                lampIndex = TrafficLight.LAMP_NAMES.index(activeLamp)
-                nextLamp = TrafficLight.LAMP_NAMES[lampIndex + 1]
-                return nextLamp
-
-
-    #increments the state of this traffic light
-    #that is, turns the current lamp off and 
-    #turns the next lamp on ("next lamp" being defined
-    # by the self.getNextLamp function)
-    def incrementState(self):
-        nextLamp = self.getNextLamp()
-        self.setActiveLamp(nextLamp)
-       
+    #internal method
+    #called by LampState when the lamp state changes
+    #the canvas is updated once tkinter is idle, together with
+    #any other lights that changed (see flushLampChanges)
+    #adds this light to the lights to redraw, scheduling
+    #a call to flushLampChanges if one isn't scheduled yet
+    #the call is scheduled on the root widget rather than on this light, so
+    #it still runs if this light is destroyed before tkinter is idle
+    def _onLampStateChanged(self):
+        TrafficLight._lightsToRedraw[self] = None
+        if not TrafficLight._flushScheduled:
+            TrafficLight._flushScheduled = True
+            TrafficLight._flushRoot = self._root()
+            TrafficLight._flushAfterId = TrafficLight._flushRoot.after_idle(TrafficLight.flushLampChanges)
+
+    #internal method
+    #event handler for the <Destroy> event
+    #<Destroy> is also raised for every child of a destroyed widget,
+    #so events that aren't about this light are ignored
+    #removes this light from the lights to redraw; if no other light is
+    #waiting to be redrawn, the scheduled flush is cancelled, so a flush that
+    #would never run (e.g. because the root is being destroyed) can't leave
+    #_flushScheduled set
+    def _onDestroy(self, event):
+        if event.widget != self:
+            return
+
+        TrafficLight._lightsToRedraw.pop(self, None)
+        if len(TrafficLight._lightsToRedraw) == 0 and TrafficLight._flushScheduled:
+            try:
+                TrafficLight._flushRoot.after_cancel(TrafficLight._flushAfterId)
+            except TclError:
+                #the root was already destroyed, along with the call
+                pass
+            TrafficLight._flushScheduled = False
+            TrafficLight._flushRoot = None
+            TrafficLight._flushAfterId = None
+
+    #internal method
+    #updates the fill of each lamp whose state differs from what the canvas shows
+    def _redrawLamps(self):
+        for lampName, isOn in self.getChangedLamps(self._drawnLampState):
+            colorStr = self.LAMP_COLORS[lampName if isOn else "default"]
+            self.itemconfigure(self.lampIds[lampName], fill=colorStr)
+
+        self._drawnLampState = self._lampState
+
+    #classmethod
+    #draws the lamp changes of every TrafficLight that changed since the last flush
+    #this runs automatically once tkinter is idle after a change, so all the
+    #changes made during a frame are drawn together; call it directly to draw
+    #pending changes right away
+    @classmethod
+    def flushLampChanges(cls):
+        lightsToRedraw = list(cls._lightsToRedraw)
+        cls._lightsToRedraw.clear()
+        cls._flushScheduled = False
+        cls._flushRoot = None
+        cls._flushAfterId = None
+
+        for light in lightsToRedraw:
+            try:
+                light._redrawLamps()
+            except TclError:
+                #the light was destroyed before its changes could be drawn
+                pass
 
 #end TrafficLight 
 
@@ -2,6 +2,8 @@
 
 from tkinter import Canvas
 from collider import Collider
+from sim_core import SimVehicle
+from frame_stats import FrameStats, getGlobalStats
 
 
 #a widget to represent a vehicle; can "drive"
@@ -19,29 +21,49 @@ class Vehicle(Collider, Canvas):
     DEFAULT_MOVEMENT_DELAY = 16
 
     #The default distance covered per frame
-    #as an integer number of pixels
+    #as a number of pixels; this is only used to
+    #derive the default speed (distance / delay)
     DEFAULT_MOVEMENT_DISTANCE = 1
 
     #override constructor
-    def __init__(self, parent, movementDelay: int = None, movementDistance: int = None):
+    #if a SimVehicle is provided as model, this Vehicle acts as a view of it:
+    #the widget takes on the model's size and position, and syncFromModel
+    #can be used to redraw it after the model moves (e.g. in a SimWorld)
+    #otherwise, a new SimVehicle is created that follows this widget's movement
+    #if movementDistance is provided, it sets the speed as distance per movementDelay;
+    #otherwise the speed of the provided model (or the default speed) is used
+    def __init__(self, parent, movementDelay: int = None, movementDistance: float = None, model: SimVehicle = None):
+
+        #init the model of this Vehicle
+        #the model can be used by the headless simulation core
+        #the model stores the position (as floats) and speed of this Vehicle
+        modelProvided = model != None
+        if not modelProvided:
+            model = SimVehicle(width=self.DEFAULT_WIDTH, height=self.DEFAULT_HEIGHT)
+        self.model = model
+
         #set defaults in superclass constructor
         super().__init__(
             parent,
-            width=self.DEFAULT_WIDTH,
-            height=self.DEFAULT_HEIGHT,
+            width=int(round(model.width)),
+            height=int(round(model.height)),
             bg=self.DEFAULT_COLOR
             )
 
         #init animation control variables
+        #movementDelay is the time between frames of movement in milliseconds
         self.movementDelay = movementDelay 
-        self.movementDistance = movementDistance
         self.lastFrameTime = None
 
         #set defaults if no value was provided for either control var
         if movementDelay == None:
              self.movementDelay = self.DEFAULT_MOVEMENT_DELAY
-        if movementDistance == None:
-             self.movementDistance = self.DEFAULT_MOVEMENT_DISTANCE
+        if movementDistance == None and not modelProvided:
+             movementDistance = self.DEFAULT_MOVEMENT_DISTANCE
+
+        #movementDistance is derived from the speed, so setting it sets the speed
+        if movementDistance != None:
+            self.movementDistance = movementDistance
 
         #init _destination to None
         #this will be set to a 2-tuple (x, y)
@@ -49,10 +71,41 @@ class Vehicle(Collider, Canvas):
         #being set to None indicates no active movement
         self._destination = None
 
+        #init clock to None
+        #this is set by SimulationClock.addVehicle; while set, drives are
+        #advanced by the clock rather than by this Vehicle's own timer
+        self.clock = None
+
+        #init frameStats to None
+        #this is set by enableFrameStats; while set, the timing
+        #of each frame of movement is recorded in it
+        self.frameStats = None
+
+        #init renderer to None
+        #this is set by Renderer.addVehicle; while set, this Vehicle's widget is
+        #moved by the renderer once per frame rather than each time the model moves
+        self.renderer = None
+
+        #if a model was provided, move to its position
+        if modelProvided:
+            self.syncFromModel()
+
     #draws vehicle
     def drawVehicle(self):
         self.create_rectangle(0,0, self.winfo_width(), self.winfo_height())
 
+    #the distance covered per frame of movement, in pixels
+    #this is not stored; it is the distance that the speed of this
+    #Vehicle covers in movementDelay milliseconds, and may be fractional
+    #setting it sets the speed to match
+    @property
+    def movementDistance(self) -> float:
+        return self.model.speed * self.movementDelay / 1000
+
+    @movementDistance.setter
+    def movementDistance(self, distance: float):
+        self.model.speed = distance * 1000 / self.movementDelay
+
 
     #given x and y coordinates (within this 
     #vehicle's parent), updates the vehicle's position
@@ -60,6 +113,23 @@ class Vehicle(Collider, Canvas):
     def setPos(self, xPos: int, yPos: int):
         self.place(x=xPos, y=yPos)
 
+        #update the cached position right away; the <Configure> event
+        #for this move won't be raised until tkinter is idle
+        self._setCachedPos(xPos, yPos)
+
+        #keep the model at the same position
+        self.model.setPos(xPos, yPos)
+
+    #moves this widget to the position of its model
+    #use this to redraw the Vehicle after its model was moved
+    #by something other than this widget (e.g. SimWorld.step)
+    #the model's position is rounded to the nearest pixel
+    def syncFromModel(self):
+        xPos = int(round(self.model.originX))
+        yPos = int(round(self.model.originY))
+        self.place(x=xPos, y=yPos)
+        self._setCachedPos(xPos, yPos)
+
     
     #move to specified destination in an animated way
     #note that this method DOES NOT BLOCK!!!
@@ -95,91 +165,148 @@ class Vehicle(Collider, Canvas):
         # Before doing this however, the method checks if a drive is already
         # active. If there is an active drive, a ValueError is raised as two
         # drive operations can't take place simultaniously
+        # If this Vehicle is registered with a SimulationClock, the clock calls
+        # clockStep once per tick instead, and _animStep isn't used at all
         if self.isDriving():
             raise ValueError("Cannot start driving when a drive operation is already active")
         else:
+            #the model's position is only reset to this widget's position if
+            #they don't agree to the pixel; this way a fractional position
+            #left over from the previous drive is kept
+            #if a renderer hasn't drawn this Vehicle's latest movement yet,
+            #the widget is behind the model, so the model is left alone
+            currentX, currentY = self.getPos()
+            if self.renderer != None and self.renderer.isDirty(self):
+                pass
+            elif (int(round(self.model.originX)), int(round(self.model.originY))) != (currentX, currentY):
+                self.model.setPos(currentX, currentY)
+
             self._destination = (xPos, yPos)
-            self._animStep()
+            self.model.driveToPos(xPos, yPos)
+            if self.clock == None:
+                self._animStep()
+
+    #starts recording the timing of this Vehicle's frames of movement
+    #returns the FrameStats they are recorded in (see frame_stats.py)
+    #frames are also recorded in the global FrameStats, if those are enabled,
+    #under the VEHICLE_ metric names
+    def enableFrameStats(self, capacity: int = None) -> FrameStats:
+        if self.frameStats == None:
+            self.frameStats = FrameStats(capacity)
+        return self.frameStats
+
+    #stops recording the timing of this Vehicle's frames; recorded values are discarded
+    def disableFrameStats(self):
+        self.frameStats = None
+
+    #internal method
+    #returns a list of the FrameStats that frames should be recorded in
+    #this is empty unless stats are enabled, in which case nothing is timed
+    def _getStatsTargets(self) -> list:
+        targets = []
+        if self.frameStats != None:
+            targets.append(self.frameStats)
+        globalStats = getGlobalStats()
+        if globalStats != None:
+            targets.append(globalStats)
+        return targets
+
+    #internal method
+    #advances the model's drive by the specified time (in seconds)
+    #and moves the widget to the model's new position
+    #the model's position is stored as floats, so movements smaller than a pixel
+    #aren't lost; they add up until the rounded position changes
+    #the widget is only moved (an expensive call into tkinter)
+    #if its position changed by at least one pixel
+    #if this Vehicle has a renderer, the widget isn't moved here; the Vehicle
+    #is marked dirty instead, and the renderer moves it on its next frame
+    #if the destination is reached, raises a <<DriveComplete>> event,
+    #ends the drive, and returns True; otherwise returns False
+    #if frame stats are enabled, the time spent moving the widget
+    #and frames that didn't move a whole pixel are recorded
+    def _advanceModel(self, deltaTime: float) -> bool:
+        from time import perf_counter
+
+        completed = self.model.advance(deltaTime)
+        statsTargets = self._getStatsTargets()
+
+        if (int(round(self.model.originX)), int(round(self.model.originY))) != self.getPos():
+            if self.renderer != None:
+                self.renderer.markDirty(self)
+            elif len(statsTargets) > 0:
+                drawStartTime = perf_counter()
+                self.syncFromModel()
+                drawTime = (perf_counter() - drawStartTime) * 1000
+                for stats in statsTargets:
+                    stats.record(FrameStats.DRAW_TIME, drawTime)
+            else:
+                self.syncFromModel()
+        else:
+            for stats in statsTargets:
+                stats.increment(FrameStats.ZERO_MOVEMENT_FRAMES)
+
+        if completed:
+            #the final position is drawn right away, so the widget
+            #is at the destination when <<DriveComplete>> is handled
+            if self.renderer != None:
+                self.renderer.renderVehicle(self)
+            self.event_generate("<<DriveComplete>>", when="tail")
+            self.abortDrive()
+
+        return completed
 
     #internal method to make one step of movement towards current destination
     #calls itself after a delay to continue moving, if needed
-    #returns immediately if no destination is set, or if destination is already reached
+    #returns immediately if no destination is set
     def _animStep(self):
-        from datetime import datetime
+        from time import perf_counter
 
         #check for missing destination        
         if self._destination == None:
             print("anim step missing destination")
             #if destination is missing, return now
             return
-        #if destination isn't missing, break it out into x and y
-        else:
-            destX, destY = self._destination
-
-        #get current position
-        currentX, currentY = self.getPos()
-        
-    
-        #if current position exactly matches destination,
-        #clear destination, raise a <<DriveComplete>> event,
-        #then return without moving the vehicle
-        if destX == currentX and destY == currentY:
-            self.event_generate("<<DriveComplete>>", when="tail")
-            self.abortDrive()
-            return
 
-        #to guarantee correct speed, the deviation of the
-        #actual delay time from the desired delay time
-        #must be matched with an equivalent deviation in distance
-        #to calculate this distance deviation, we first calculate
-        #the time deviation of the last frame
-
-        #measure current time against last frame time to find
-        #the actual time between frames in milliseconds
-        currentTime = datetime.now()
-        try:
-            actualDelay = (currentTime - self.lastFrameTime).total_seconds() * 1000
-        except TypeError:
-            #TypeError is raised if lastFrameTime isn't set
-            #in this case, set actual to the movement delay
-            actualDelay = self.movementDelay
-        
-        #adjusted distance is the same proportion of 
-        #movement distance that actual delay is of movement delay
-        adjustedDistance = int(self.movementDistance * (actualDelay/self.movementDelay))
-
-        #determine new X position based on current position,
-        #destination position, and adjusted movement distance
-        if destX > currentX:
-            #the min expression ensures that the destination is never overshot,
-            #as the adjustedDistance is selected if and only if
-            #it is less than the remaining distance to the destination
-            newX = currentX + min(destX - currentX, adjustedDistance)
-        elif destX < currentX:
-            newX = currentX - min(currentX - destX, adjustedDistance)
-        else:
-            #if destination X exactly equals current X, then newX
-            #is set to current X, resulting in no X movement
-            newX = currentX
-
-        #determine new Y position using similar logic to X position
-        if destY > currentY:
-            newY = currentY + min(destY - currentY, adjustedDistance)
-        elif destY < currentY:
-            newY = currentY - min(currentY  - destY, adjustedDistance)
+        #the distance moved each step depends on the time that actually
+        #passed since the last step, so the speed stays correct even when
+        #tkinter runs the step late (or early)
+        #perf_counter is used rather than the wall clock, as it can't jump
+        #backwards or forwards (e.g. when the system clock is adjusted)
+        currentTime = perf_counter()
+        if self.lastFrameTime == None:
+            #on the first step, assume exactly one movement delay has passed
+            deltaTime = self.movementDelay / 1000
         else:
-            newY = currentY
-
-        #set the new position
-        self.setPos(newX, newY)
+            deltaTime = currentTime - self.lastFrameTime
+
+            #record how long this frame actually took compared
+            #to the delay it was scheduled with, if stats are enabled
+            #in the shared stats, vehicle frames are kept apart from the
+            #frames of the SimulationClock (see FrameStats.VEHICLE_FRAMES)
+            if self.frameStats != None:
+                self.frameStats.recordFrame(deltaTime * 1000, self.movementDelay)
+            globalStats = getGlobalStats()
+            if globalStats != None:
+                globalStats.recordFrame(deltaTime * 1000, self.movementDelay, vehicleFrame=True)
+        self.lastFrameTime = currentTime
+
+        #move, and stop here if the destination was reached
+        if self._advanceModel(deltaTime):
+            return
 
         #repeat process after delay
         self.after(self.movementDelay, self._animStep)
-        
-        #after all processing for this animation step,
-        #set the lastFrameTime so the frameDelta 
-        #(deviation from expected delay) can be calculated
-        self.lastFrameTime = datetime.now()
+
+
+    #advances the active drive by one tick of a SimulationClock
+    #deltaTime is the simulated time covered by the tick, in seconds
+    #raises a <<DriveComplete>> event when the destination is reached
+    def clockStep(self, deltaTime: float):
+
+        if not self.isDriving():
+            return
+
+        self._advanceModel(deltaTime)
 
 
     #drive in a specified cardinal direction
@@ -236,64 +363,26 @@ class Vehicle(Collider, Canvas):
     def abortDrive(self):
         self._destination = None
         self.lastFrameTime = None
+        self.model.abortDrive()
 
 
     #returns current speed setting of
     #this vehicle in pixels per second
-    #the set of possible speeds is a subset of 
-    #the rational numbers (integers divided by integers)
-    #but does not include all of them
     def getSpeed(self) -> float:
-
-        #the speed of a vehicle is not stored directly;
-        #speed is a measure of distance over time and therefore can
-        #be calculated based on movementDistance and movementDelay
-
-        #get a number of pixels per millisecond by dividing
-        #the number of pixels traveled in one step by the duration of that step
-        pixelsPerMs = self.movementDistance / self.movementDelay
-
-        #convert pixels per millisecond to pixels per second
-        #by multiplying by the number of milliseconds in one second (1000)
-        pixelsPerSec = pixelsPerMs * 1000
-
-        return pixelsPerSec
-
-    #given a number of pixels per second, adjusts the
-    #movement speed and movement distance to make the 
-    #Vehicle "drive" at approximately the desired speed
-    #note: the actual speed set will be a rational number
-    #approximtion of the desired speed, but not nessecarily 
-    #the best rational approximation - speeds with
-    #denominators (movement delays) closer to the default are preferred
-    #returns the actual speed that was set,  
-    #same as the result of the getSpeed method
+        return self.model.speed
+
+    #sets the speed of this Vehicle in pixels per second
+    #any speed greater than zero can be set exactly; the distance moved
+    #each frame is calculated from the time that passed, so it doesn't
+    #need to be a whole number of pixels
+    #raises a ValueError if the speed is not greater than zero
+    #returns the speed that was set, same as the result of the getSpeed method
     def setSpeed(self, desiredPixelsPerSecond: float) -> float:
 
-        #convert pixels per second to pixels per millisecond,
-        #as the time unit used for delay is milliseconds
-        desiredSpeed = desiredPixelsPerSecond / 1000
-
-        #calculate the movement distance required to achieve
-        #the desired speed with the default movement delay
-        idealMovementDistance = desiredSpeed * self.DEFAULT_MOVEMENT_DELAY
-
-        #the ideal movement distance may be (probably is) fractional
-        #but the actual movement distance must be an integer greater than 
-        #or equal to 1. we can approach the desired speed by 
-        #using the closest approximation of the ideal distance 
-        #in combination with an adjusted movement delay
-
-        #set the movement distance to the closet integer approximation
-        #of the ideal distance that is 1 or greater
-        self.movementDistance = max(1, int(round(idealMovementDistance)))
+        if desiredPixelsPerSecond <= 0:
+            errMsg = f"Speed must be greater than zero ({repr(desiredPixelsPerSecond)})"
+            raise ValueError(errMsg)
 
-        #given that movement distance and the desired speed, find
-        #the ideal movement delay. since only the actual delay is
-        #needed, this ideal delay is immediately rounded to the nearest
-        #integer that is greater or equal to 1
-        self.movementDelay = max(1, int(round(self.movementDistance / desiredSpeed)))
+        self.model.speed = desiredPixelsPerSecond
 
-        #calculate the actual speed based on the set
-        #distance and delay and return the result
         return self.getSpeed()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+import numpy as np
+if TYPE_CHECKING:
+    from vehicle import Vehicle
+
+#VehicleStore
+#Stores the state of many vehicles as columns of NumPy arrays
+#(a "struct of arrays") rather than as attributes of one object per vehicle
+#This lets every driving vehicle be advanced with a handful of vectorized
+#operations per step instead of a Python loop, which is what makes
+#simulating thousands of vehicles per core possible
+#Drives behave the same way as SimVehicle drives: each axis moves towards the
+#destination independently, by at most speed * time per step, and
+#the destination is never overshot
+#Each vehicle is identified by its index (row) in the store
+#requires NumPy
+class VehicleStore():
+
+    #number of rows to allocate when the store is created
+    #the store grows (doubling in size) as needed
+    DEFAULT_CAPACITY = 64
+
+    #default dimensions and speed of added vehicles
+    #these are the same as the SimVehicle defaults
+    DEFAULT_WIDTH = 50
+    DEFAULT_HEIGHT = 50
+    DEFAULT_SPEED = 1000 / 16
+
+    #names and types of the columns of the store
+    #x, y             position of the vehicle's origin
+    #vx, vy           velocity along each axis as of the last step, in pixels per second
+    #destX, destY     destination of the active drive
+    #speed            speed in pixels per second
+    #width, height    dimensions of the vehicle
+    #driving          True while a drive is active
+    #alive            True for rows that hold a vehicle (False for removed vehicles)
+    COLUMNS = {
+        "x": np.float64,
+        "y": np.float64,
+        "vx": np.float64,
+        "vy": np.float64,
+        "destX": np.float64,
+        "destY": np.float64,
+        "speed": np.float64,
+        "width": np.float64,
+        "height": np.float64,
+        "driving": np.bool_,
+        "alive": np.bool_
+        }
+
+    def __init__(self, capacity: int = None):
+
+        if capacity == None:
+            capacity = self.DEFAULT_CAPACITY
+
+        #number of rows in use (including removed vehicles that haven't been reused)
+        self._size = 0
+
+        #indices of removed vehicles, which are reused by addVehicle
+        self._freeIndices: List[int] = []
+
+        #allocate each column; they are also available as attributes (self.x, etc)
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+        #dict that associates vehicle indices with the Vehicle
+        #widget that displays them (see attachView)
+        self._views: Dict[int, Vehicle] = {}
+
+        #list of functions to call when drives complete
+        #each is called with an array of the indices of the vehicles that arrived
+        self._arrivalListeners: List[Callable[[np.ndarray], None]] = []
+
+
+    #returns the number of rows the store has room for
+    def getCapacity(self) -> int:
+        return len(self.x)
+
+    #returns the number of vehicles in the store
+    def __len__(self) -> int:
+        return self._size - len(self._freeIndices)
+
+    #internal method
+    #grows every column so there is room for at least minCapacity rows
+    def _grow(self, minCapacity: int):
+        newCapacity = max(minCapacity, self.getCapacity() * 2)
+        for name in self.COLUMNS:
+            oldColumn = getattr(self, name)
+            newColumn = np.zeros(newCapacity, dtype=oldColumn.dtype)
+            newColumn[:len(oldColumn)] = oldColumn
+            setattr(self, name, newColumn)
+
+
+    #adds a vehicle to the store and returns its index
+    def addVehicle(self,
+        x: float = 0.0,
+        y: float = 0.0,
+        speed: float = None,
+        width: float = None,
+        height: float = None
+        ) -> int:
+
+        #reuse the index of a removed vehicle if there is one
+        if len(self._freeIndices) > 0:
+            index = self._freeIndices.pop()
+        else:
+            index = self._size
+            if index >= self.getCapacity():
+                self._grow(index + 1)
+            self._size += 1
+
+        self.x[index] = x
+        self.y[index] = y
+        self.vx[index] = 0.0
+        self.vy[index] = 0.0
+        self.destX[index] = x
+        self.destY[index] = y
+        self.speed[index] = speed if speed != None else self.DEFAULT_SPEED
+        self.width[index] = width if width != None else self.DEFAULT_WIDTH
+        self.height[index] = height if height != None else self.DEFAULT_HEIGHT
+        self.driving[index] = False
+        self.alive[index] = True
+
+        return index
+
+    #removes a vehicle from the store; its index may be reused by addVehicle
+    #raises an IndexError if there is no vehicle at the index
+    def removeVehicle(self, index: int):
+        self._checkIndex(index)
+        self.alive[index] = False
+        self.driving[index] = False
+        self._views.pop(index, None)
+        self._freeIndices.append(index)
+
+    #internal method
+    #raises an IndexError if there is no vehicle at the index
+    def _checkIndex(self, index: int):
+        if index < 0 or index >= self._size or not self.alive[index]:
+            raise IndexError(f"No vehicle at index {index}")
+
+
+    #start driving the vehicle at index to the specified destination
+    #raises a ValueError if the vehicle is already driving
+    def driveToPos(self, index: int, xPos: float, yPos: float):
+        self._checkIndex(index)
+        if self.driving[index]:
+            raise ValueError("Cannot start driving when a drive operation is already active")
+        self.destX[index] = xPos
+        self.destY[index] = yPos
+        self.driving[index] = True
+
+    #stop the active drive of the vehicle at index, if there is one
+    def abortDrive(self, index: int):
+        self._checkIndex(index)
+        self.driving[index] = False
+        self.vx[index] = 0.0
+        self.vy[index] = 0.0
+
+    #returns True if the vehicle at index is driving
+    def isDriving(self, index: int) -> bool:
+        self._checkIndex(index)
+        return bool(self.driving[index])
+
+    #returns the position of the vehicle at index as a 2-tuple (x, y)
+    def getPos(self, index: int) -> Tuple[float, float]:
+        self._checkIndex(index)
+        return (float(self.x[index]), float(self.y[index]))
+
+    #moves the vehicle at index to the specified position
+    def setPos(self, index: int, xPos: float, yPos: float):
+        self._checkIndex(index)
+        self.x[index] = xPos
+        self.y[index] = yPos
+
+    #returns the dimension ranges of every row as an array of shape (N, 4),
+    #one flattened (x0, x1, y0, y1) set of ranges per row
+    #this is the format accepted by Collision.getRectangleOverlapBatch
+    def getDimensionRanges(self) -> np.ndarray:
+        size = self._size
+        return np.stack((
+            self.x[:size],
+            self.x[:size] + self.width[:size],
+            self.y[:size],
+            self.y[:size] + self.height[:size]
+            ), axis=1)
+
+
+    #advances every driving vehicle by the specified amount of time (in seconds)
+    #returns an array of the indices of the vehicles that reached their destination
+    #during this step; those vehicles are no longer driving
+    def advance(self, deltaTime: float) -> np.ndarray:
+
+        size = self._size
+        driving = self.driving[:size]
+
+        #work only on the driving rows
+        indices = np.flatnonzero(driving)
+        if len(indices) == 0:
+            return indices
+
+        x = self.x[indices]
+        y = self.y[indices]
+        destX = self.destX[indices]
+        destY = self.destY[indices]
+        distance = self.speed[indices] * deltaTime
+
+        #move each axis towards the destination by at most distance, snapping
+        #to the destination once it is within reach; this is the same
+        #min/max arithmetic as SimVehicle.advance, so both arrive (bit for bit)
+        #on the same step. Adding a clipped difference instead (x + (destX - x))
+        #doesn't always round back to exactly destX
+        newX = np.where(destX > x, np.minimum(destX, x + distance), np.maximum(destX, x - distance))
+        newY = np.where(destY > y, np.minimum(destY, y + distance), np.maximum(destY, y - distance))
+        moveX = newX - x
+        moveY = newY - y
+
+        self.x[indices] = newX
+        self.y[indices] = newY
+
+        #record the velocity of this step along each axis
+        if deltaTime > 0:
+            self.vx[indices] = moveX / deltaTime
+            self.vy[indices] = moveY / deltaTime
+
+        #vehicles that are exactly at their destination have arrived
+        arrivedMask = (newX == destX) & (newY == destY)
+        arrived = indices[arrivedMask]
+
+        self.driving[arrived] = False
+        self.vx[arrived] = 0.0
+        self.vy[arrived] = 0.0
+
+        return arrived
+
+
+    #adds a function to be called when drives complete during step
+    #the function is called with an array of the indices of the vehicles that arrived
+    def addArrivalListener(self, listener: Callable[[np.ndarray], None]):
+        self._arrivalListeners.append(listener)
+
+    #removes a function added with addArrivalListener
+    def removeArrivalListener(self, listener: Callable[[np.ndarray], None]):
+        self._arrivalListeners.remove(listener)
+
+    #displays the vehicle at index with a Vehicle widget
+    #during step, the widget is moved to the vehicle's (rounded) position and
+    #a <<DriveComplete>> event is raised on it when the vehicle arrives
+    #the widget shouldn't be driven on its own while attached
+    def attachView(self, index: int, view: Vehicle):
+        self._checkIndex(index)
+        self._views[index] = view
+
+    #stops displaying the vehicle at index with its Vehicle widget
+    def detachView(self, index: int):
+        self._views.pop(index, None)
+
+
+    #advances the store by the specified amount of time (in seconds), then
+    #moves attached views, raises <<DriveComplete>> on the views of vehicles
+    #that arrived, and calls arrival listeners
+    #this can be subscribed to a SimulationClock's vehicle phase
+    #returns an array of the indices of the vehicles that arrived
+    def step(self, deltaTime: float) -> np.ndarray:
+
+        arrived = self.advance(deltaTime)
+
+        #move the views whose rounded position changed
+        for index, view in self._views.items():
+            xPos = int(round(self.x[index]))
+            yPos = int(round(self.y[index]))
+            if (xPos, yPos) != view.getPos():
+                view.setPos(xPos, yPos)
+
+        #raise events and call listeners for the vehicles that arrived
+        if len(arrived) > 0:
+            for index in arrived.tolist():
+                view = self._views.get(index)
+                if view != None:
+                    view.event_generate("<<DriveComplete>>", when="tail")
+            for listener in list(self._arrivalListeners):
+                listener(arrived)
+
+        return arrived
+
+#end VehicleStore
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+from tkinter import Canvas
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from lamp_state import LampState
+from sim_core import SimRoad, SimVehicle
+from frame_stats import FrameStats, recordGlobalTime
+if TYPE_CHECKING:
+    from tkinter import Misc as BaseTkObject
+    from road import TrafficLineType
+    from sim_core import SimWorld
+    from simulation_clock import SimulationClock
+
+
+#CanvasTrafficLight
+#A traffic light drawn as items on a WorldCanvas rather than as its own widget
+#It has the same lamp methods as TrafficLight (see LampState), so it can be
+#run by a SignalController; lamp changes are drawn by the WorldCanvas
+#the next time it renders
+#Create these with WorldCanvas.addTrafficLight
+class CanvasTrafficLight(LampState):
+
+    def __init__(self, worldCanvas: WorldCanvas, xPos: int, yPos: int):
+        super().__init__()
+
+        self.worldCanvas = worldCanvas
+
+        #position of the top left corner of the light on the WorldCanvas
+        self.xPos = xPos
+        self.yPos = yPos
+
+        #dict that associates each lamp name with the id of its canvas item
+        #these are filled in by WorldCanvas.addTrafficLight
+        self.lampIds: Dict[str, int] = dict.fromkeys(self.LAMP_NAMES, None)
+
+        #id of the canvas item drawn behind the lamps
+        self.backgroundId: int = None
+
+        #the lamp state the canvas currently shows
+        self._drawnLampState = 0
+
+    #internal method
+    #called by LampState when the lamp state changes
+    def _onLampStateChanged(self):
+        self.worldCanvas._queueLightRedraw(self)
+
+    def __repr__(self):
+        return f"CanvasTrafficLight(xPos={self.xPos}, yPos={self.yPos})"
+
+#end CanvasTrafficLight
+
+
+#WorldCanvas
+#Draws a whole simulation on a single Canvas
+#Every other view in this project is its own widget: each Vehicle is a Canvas
+#moved with place(), so each frame of each Vehicle goes through the geometry
+#manager and reconfigures a widget. Here every vehicle is a rectangle item,
+#and Roads and TrafficLights are drawn as items on the same Canvas, so a
+#frame is a single pass over the vehicles that moves the items of the ones
+#whose (rounded) position changed with coords()
+#WorldCanvas is a view of SimVehicle and SimRoad models; move the models
+#(e.g. with SimWorld.step) and call render (or requestRender) to draw them
+#Items are stacked roads, then intersection boxes, then lights, then vehicles
+class WorldCanvas(Canvas):
+
+    BACKGROUND_COLOR = "#FFFFFF"
+
+    #tags of the items drawn for each kind of entity
+    ROAD_TAG = "road"
+    TRAFFIC_LINE_TAG = "trafficLine"
+    INTERSECTION_BOX_TAG = "intersectionBox"
+    LIGHT_TAG = "trafficLight"
+    VEHICLE_TAG = "vehicle"
+
+    #the order in which tags are stacked, from bottom to top
+    STACKING_ORDER = (ROAD_TAG, TRAFFIC_LINE_TAG, INTERSECTION_BOX_TAG, LIGHT_TAG, VEHICLE_TAG)
+
+    def __init__(self, parent: BaseTkObject, width: int, height: int, **kwargs):
+
+        #use the default background unless one was specified
+        kwargs.setdefault("background", self.BACKGROUND_COLOR)
+        #remove the highlight border so canvas coordinates match world coordinates
+        kwargs.setdefault("highlightthickness", 0)
+
+        super().__init__(parent, width=width, height=height, **kwargs)
+
+        self.parent = parent
+
+        #dict that associates each SimVehicle with the id of its item
+        self._vehicleIds: Dict[SimVehicle, int] = {}
+        #dict that associates each SimVehicle with the coords its item was
+        #last drawn at as a 4-tuple (x0, y0, x1, y1) in whole pixels
+        self._drawnVehicleCoords: Dict[SimVehicle, Tuple[int, int, int, int]] = {}
+
+        #dict that associates each SimRoad with the ids of its items
+        self._roadIds: Dict[SimRoad, List[int]] = {}
+
+        #list of the CanvasTrafficLights drawn on this canvas
+        self._lights: List[CanvasTrafficLight] = []
+        #lights whose lamps changed since the last render, as an ordered set
+        self._lightsToRedraw: Dict[CanvasTrafficLight, None] = {}
+
+        #the id of the pending after_idle call made by requestRender
+        #or None if no render is pending
+        self._renderId = None
+
+
+    #internal method
+    #restacks the items of this canvas according to STACKING_ORDER
+    #only called when items are added, never while rendering
+    def _restackItems(self):
+        for tag in self.STACKING_ORDER:
+            self.tag_raise(tag)
+
+
+    #adds a SimVehicle to be drawn as a rectangle of the specified color
+    #returns the id of its canvas item
+    #if the vehicle was already added, returns its existing item id
+    def addVehicle(self, model: SimVehicle, color: str = None) -> int:
+        from vehicle import Vehicle
+
+        itemId = self._vehicleIds.get(model)
+        if itemId != None:
+            return itemId
+
+        if color == None:
+            color = Vehicle.DEFAULT_COLOR
+
+        coords = self._getVehicleCoords(model)
+        itemId = self.create_rectangle(*coords, fill=color, width=0, tags=(self.VEHICLE_TAG,))
+        self._vehicleIds[model] = itemId
+        self._drawnVehicleCoords[model] = coords
+        return itemId
+
+    #stops drawing a SimVehicle and deletes its item
+    #returns True if the vehicle was drawn on this canvas, False otherwise
+    def removeVehicle(self, model: SimVehicle) -> bool:
+        itemId = self._vehicleIds.pop(model, None)
+        if itemId == None:
+            return False
+        del self._drawnVehicleCoords[model]
+        self.delete(itemId)
+        return True
+
+    #returns the id of the item of a SimVehicle
+    #raises a KeyError if the vehicle isn't drawn on this canvas
+    def getVehicleItem(self, model: SimVehicle) -> int:
+        return self._vehicleIds[model]
+
+    #returns a list of the SimVehicles drawn on this canvas
+    def getVehicles(self) -> List[SimVehicle]:
+        return list(self._vehicleIds)
+
+    #internal staticmethod
+    #returns the coords of a SimVehicle's item as a 4-tuple (x0, y0, x1, y1)
+    #the model's position and size are rounded to the nearest pixel,
+    #the same way Vehicle.syncFromModel rounds them
+    @staticmethod
+    def _getVehicleCoords(model: SimVehicle) -> Tuple[int, int, int, int]:
+        x0 = int(round(model.originX))
+        y0 = int(round(model.originY))
+        return (x0, y0, x0 + int(round(model.width)), y0 + int(round(model.height)))
+
+
+    #adds a SimRoad to be drawn with traffic lines of the specified type
+    #(see Road.calculateTrafficLineCoords); the road is drawn where its model is
+    #and isn't redrawn if the model moves afterwards
+    #the boxes drawn where roads cross are updated to include the new road
+    #returns a list of the ids of the road's items
+    def addRoad(self, model: SimRoad, lineType: TrafficLineType = None) -> List[int]:
+        itemIds = self._roadIds.get(model)
+        if itemIds != None:
+            return itemIds
+
+        itemIds = self._drawRoad(model, lineType)
+        self.drawIntersectionBoxes()
+        self._restackItems()
+        return itemIds
+
+    #internal method
+    #draws a SimRoad that isn't drawn yet, without updating the intersection
+    #boxes or restacking the items, and returns the ids of its items
+    def _drawRoad(self, model: SimRoad, lineType: TrafficLineType) -> List[int]:
+        from road import Road
+
+        x0 = int(round(model.originX))
+        y0 = int(round(model.originY))
+        width = int(round(model.width))
+        height = int(round(model.height))
+
+        itemIds = [self.create_rectangle(
+            x0, y0, x0 + width, y0 + height,
+            fill=Road.ROAD_COLOR,
+            width=0,
+            tags=(self.ROAD_TAG,)
+            )]
+
+        #the line coordinates are relative to the road, so offset them by its position
+        lineCoords = Road.calculateTrafficLineCoords(width, height, model.horizontal, lineType)
+        if lineCoords != None:
+            for lineX0, lineY0, lineX1, lineY1 in lineCoords:
+                itemIds.append(self.create_rectangle(
+                    lineX0 + x0, lineY0 + y0, lineX1 + x0, lineY1 + y0,
+                    fill=Road.LINE_COLOR,
+                    width=0,
+                    tags=(self.TRAFFIC_LINE_TAG,)
+                    ))
+
+        self._roadIds[model] = itemIds
+        return itemIds
+
+    #returns a list of the SimRoads drawn on this canvas
+    def getRoads(self) -> List[SimRoad]:
+        return list(self._roadIds)
+
+    #redraws the boxes that cover the traffic lines where roads cross
+    #every intersection is found at once with RoadNetwork.findIntersections,
+    #which goes over every road drawn on this canvas; addWorld calls this
+    #once after adding all of its roads
+    #this is setup work, so it isn't recorded as draw time
+    def drawIntersectionBoxes(self):
+        from road import Road
+        from road_network import RoadNetwork
+
+        self.delete(self.INTERSECTION_BOX_TAG)
+
+        for horizontalModel, verticalModel in RoadNetwork.findIntersections(list(self._roadIds)):
+            cornerTL, cornerBR = horizontalModel.getCollisionWith(verticalModel).getCollisionCorners()
+            self.create_rectangle(
+                int(round(cornerTL[0])), int(round(cornerTL[1])),
+                int(round(cornerBR[0])), int(round(cornerBR[1])),
+                fill=Road.ROAD_COLOR,
+                width=0,
+                tags=(self.INTERSECTION_BOX_TAG,)
+                )
+
+
+    #draws a traffic light with its top left corner at the specified position
+    #returns the CanvasTrafficLight, which can be controlled like a TrafficLight
+    def addTrafficLight(self, xPos: int, yPos: int) -> CanvasTrafficLight:
+        from traffic_light import TrafficLight
+
+        light = CanvasTrafficLight(self, xPos, yPos)
+
+        width, height = TrafficLight.getLightSize()
+        light.backgroundId = self.create_rectangle(
+            xPos, yPos, xPos + width, yPos + height,
+            fill="#FFFFFF",
+            tags=(self.LIGHT_TAG,)
+            )
+
+        defaultColor = TrafficLight.LAMP_COLORS["default"]
+        for lampName, coords in TrafficLight.calculateLampCoords(xPos, yPos).items():
+            light.lampIds[lampName] = self.create_oval(*coords, fill=defaultColor, tags=(self.LIGHT_TAG,))
+
+        self._lights.append(light)
+        self._restackItems()
+        return light
+
+    #returns a list of the CanvasTrafficLights drawn on this canvas
+    def getTrafficLights(self) -> List[CanvasTrafficLight]:
+        return list(self._lights)
+
+    #internal method
+    #called by a CanvasTrafficLight when its lamps change
+    #the lamps are drawn on the next render
+    def _queueLightRedraw(self, light: CanvasTrafficLight):
+        self._lightsToRedraw[light] = None
+        self.requestRender()
+
+
+    #adds every road and vehicle of a SimWorld to this canvas
+    #the roads are all drawn first, then the intersection boxes are
+    #redrawn once for all of them
+    def addWorld(self, world: SimWorld, lineType: TrafficLineType = None):
+        for model in world.roads:
+            if model not in self._roadIds:
+                self._drawRoad(model, lineType)
+        self.drawIntersectionBoxes()
+        self._restackItems()
+
+        for model in world.vehicles:
+            self.addVehicle(model)
+
+
+    #draws every change since the last render: vehicles whose rounded position
+    #or size changed are moved, and lights whose lamps changed are recolored
+    #vehicles that didn't move a whole pixel aren't touched at all
+    #item coordinates are passed straight to the Tcl canvas command, which
+    #skips the argument handling of Canvas.coords; this is what matters
+    #when thousands of items move per frame
+    #returns the number of vehicle items that were moved
+    #the time spent here is recorded as draw time in the global FrameStats, if enabled
+    @recordGlobalTime(FrameStats.DRAW_TIME)
+    def render(self) -> int:
+        return self.drawChanges()
+
+    #does the same as render, without recording draw time
+    #this is what a Renderer calls, as it records the time of its whole frame
+    #(which includes this) as a single draw time sample
+    def drawChanges(self) -> int:
+        from traffic_light import TrafficLight
+
+        if self._renderId != None:
+            self.after_cancel(self._renderId)
+            self._renderId = None
+
+        tkCall = self.tk.call
+        widgetPath = self._w
+        getVehicleCoords = self._getVehicleCoords
+        drawnVehicleCoords = self._drawnVehicleCoords
+
+        movedCount = 0
+        for model, itemId in self._vehicleIds.items():
+            coords = getVehicleCoords(model)
+            if coords != drawnVehicleCoords[model]:
+                drawnVehicleCoords[model] = coords
+                tkCall(widgetPath, "coords", itemId, *coords)
+                movedCount += 1
+
+        if len(self._lightsToRedraw) > 0:
+            lampColors = TrafficLight.LAMP_COLORS
+            lightsToRedraw = list(self._lightsToRedraw)
+            self._lightsToRedraw.clear()
+            for light in lightsToRedraw:
+                for lampName, isOn in light.getChangedLamps(light._drawnLampState):
+                    colorStr = lampColors[lampName if isOn else "default"]
+                    tkCall(widgetPath, "itemconfigure", light.lampIds[lampName], "-fill", colorStr)
+                light._drawnLampState = light.getLampState()
+
+        return movedCount
+
+    #schedules a render for when tkinter is idle, if one isn't scheduled already
+    #any number of requests made before then result in a single render
+    def requestRender(self):
+        if self._renderId == None:
+            self._renderId = self.after_idle(self._onRenderRequest)
+
+    #internal method
+    #called by tkinter when a requested render is due
+    def _onRenderRequest(self):
+        self._renderId = None
+        self.render()
+
+
+    #has a SimulationClock drive this canvas: the canvas renders once per tick,
+    #in the clock's late phase
+    #if a SimWorld is provided, the world is also stepped once per tick in
+    #the clock's vehicle phase, so the clock runs the whole simulation
+    def attachToClock(self, clock: SimulationClock, world: SimWorld = None):
+        if world != None:
+            clock.subscribe(world.step, clock.VEHICLE_PHASE)
+        clock.subscribe(lambda deltaTime: self.render(), clock.LATE_PHASE)
+
+#end WorldCanvas
+
+if __name__ == "__main__":
+    print("This is a class definition used as part of a larger script")
+    print("Did you mean to run py_traffic_light.py?")